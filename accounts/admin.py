@@ -9,8 +9,9 @@ class CustomUserAdmin(UserAdmin):
     list_display = ('username', 'email', 'user_type', 'phone', 'is_staff', 'created_at')
     list_filter = ('user_type', 'is_staff', 'is_superuser', 'is_active')
     fieldsets = UserAdmin.fieldsets + (
-        ('额外信息', {'fields': ('phone', 'user_type', 'avatar')}),
+        ('额外信息', {'fields': ('phone', 'user_type', 'avatar', 'avatar_hash', 'avatar_pending')}),
     )
+    readonly_fields = ('avatar_hash', 'avatar_pending')
     add_fieldsets = UserAdmin.add_fieldsets + (
         ('额外信息', {'fields': ('email', 'phone', 'user_type')}),
     )
@@ -0,0 +1,96 @@
+"""
+异步视图中的会话与当前用户。
+
+Django 4.2 的 request.session 和 request.user 只有同步接口，异步视图里
+访问会抛出 SynchronousOnlyOperation。这里按会话后端用异步缓存或异步 ORM
+读取会话数据、用异步 ORM 取回用户，并回填到 request 上，之后模板等同步
+代码访问 request.user / request.session 时不会再查询。认证后端提供
+aget_user 时（如 CachedModelBackend）由后端异步取回用户。
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends import cache as cache_backend, cached_db, db, signed_cookies
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+
+MODEL_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+
+
+async def _abackend_get_user(backend_path, user_id):
+    """用会话中记录的后端异步取回用户；取不到或后端不支持异步时返回 None"""
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return None
+    model = auth.get_user_model()
+    user_id = model._meta.pk.to_python(user_id)
+    backend = auth.load_backend(backend_path)
+    if hasattr(backend, 'aget_user'):
+        return await backend.aget_user(user_id)
+    if backend_path == MODEL_BACKEND:
+        user = await model._default_manager.filter(pk=user_id).afirst()
+        return user if user is not None and backend.user_can_authenticate(user) else None
+    return None
+
+
+async def _aload_from_db(session):
+    stored = await session.model.objects.filter(
+        session_key=session.session_key, expire_date__gt=timezone.now()).afirst()
+    if stored is None:
+        session._session_key = None
+        return {}
+    return session.decode(stored.session_data)
+
+
+async def aload_session(session):
+    """异步加载会话数据，结果缓存在会话对象中"""
+    if hasattr(session, '_session_cache'):
+        return session._session_cache
+    if session.session_key is None or isinstance(session, signed_cookies.SessionStore):
+        # 没有会话，或数据就在 cookie 里，都不需要 IO
+        data = session._get_session()
+    elif isinstance(session, cached_db.SessionStore):
+        data = await session._cache.aget(session.cache_key)
+        if data is None:
+            data = await _aload_from_db(session)
+            if session.session_key is not None:
+                expiry = session.get_expiry_age(expiry=data.get('_session_expiry'))
+                await session._cache.aset(session.cache_key, data, expiry)
+    elif isinstance(session, db.SessionStore):
+        data = await _aload_from_db(session)
+    elif isinstance(session, cache_backend.SessionStore):
+        data = await session._cache.aget(session.cache_key)
+        if data is None:
+            session._session_key = None
+            data = {}
+    else:
+        data = await sync_to_async(session._get_session)()
+    session._session_cache = data
+    return data
+
+
+async def aget_user(request):
+    """
+    异步取得当前用户并回填 request.user。
+    常见情形（后端支持异步、会话哈希一致）全部走异步接口；
+    其它情形（如修改密码后会话失效）交给 Django 的同步实现处理。
+    """
+    if hasattr(request, '_cached_user'):
+        return request._cached_user
+
+    data = await aload_session(request.session)
+    user = AnonymousUser()
+    user_id = data.get(SESSION_KEY)
+    if user_id is not None:
+        user = None
+        candidate = await _abackend_get_user(data.get(BACKEND_SESSION_KEY), user_id)
+        if candidate is not None and constant_time_compare(
+                data.get(HASH_SESSION_KEY) or '', candidate.get_session_auth_hash()):
+            user = candidate
+        if user is None:
+            user = await sync_to_async(auth.get_user)(request)
+
+    request._cached_user = user
+    request.user = user
+    return user
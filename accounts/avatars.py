@@ -0,0 +1,126 @@
+"""
+头像处理。
+
+上传的原图先原样保存到 avatars/uploads/（上传时由 TemporaryFileUploadHandler
+分块写入临时文件，不整体读入内存），并标记 avatar_pending。后台 worker
+（`process_avatars --loop`）用线程池并行处理：按 EXIF 方向摆正后裁成固定
+尺寸的正方形，分别输出 JPEG 和 WebP，重新编码时不带 EXIF 等元数据。
+文件名取原图内容的 SHA-256（见 models.avatar_variant_name），相同的图片
+只存一份；处理完成后删除原图，avatar 指向大尺寸的 JPEG。
+"""
+import hashlib
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from campus_jobs.writes import write_transaction
+from .backends import user_cache_key
+from .models import User, avatar_variant_name
+
+logger = logging.getLogger(__name__)
+
+# 变体名 -> 边长（像素）。thumbnail 用于列表，large 用于个人页
+AVATAR_SIZES = {
+    'thumbnail': 96,
+    'large': 256,
+}
+
+# 格式 -> (扩展名, Pillow 保存参数)
+AVATAR_FORMATS = {
+    'JPEG': ('jpg', {'quality': 85, 'optimize': True, 'progressive': True}),
+    'WEBP': ('webp', {'quality': 80, 'method': 4}),
+}
+
+
+def file_digest(name):
+    """分块计算原图的 SHA-256"""
+    digest = hashlib.sha256()
+    with default_storage.open(name) as f:
+        for chunk in f.chunks():
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def render_variants(name):
+    """生成各尺寸、各格式的头像，返回 {(尺寸名, 扩展名): 图片字节}"""
+    with default_storage.open(name) as f:
+        image = Image.open(f)
+        # JPEG 可以直接按缩小的比例解码，手机拍的大图不必完整解码
+        image.draft('RGB', (max(AVATAR_SIZES.values()),) * 2)
+        image = ImageOps.exif_transpose(image)
+        if image.mode != 'RGB':
+            background = Image.new('RGB', image.size, 'white')
+            image = image.convert('RGBA')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+
+    variants = {}
+    for size_name, size in AVATAR_SIZES.items():
+        resized = ImageOps.fit(image, (size, size), Image.LANCZOS)
+        for image_format, (ext, options) in AVATAR_FORMATS.items():
+            buffer = io.BytesIO()
+            # 新建的图像不带原图的 EXIF、ICC 等元数据
+            resized.save(buffer, image_format, **options)
+            variants[size_name, ext] = buffer.getvalue()
+    return variants
+
+
+def process_upload(name):
+    """处理一张原图，返回内容哈希；文件无法识别为图片时返回 None"""
+    try:
+        digest = file_digest(name)
+        if all(default_storage.exists(avatar_variant_name(digest, size_name, ext))
+               for size_name in AVATAR_SIZES for ext, _ in AVATAR_FORMATS.values()):
+            return digest
+        for (size_name, ext), data in render_variants(name).items():
+            variant = avatar_variant_name(digest, size_name, ext)
+            if not default_storage.exists(variant):
+                saved = default_storage.save(variant, ContentFile(data))
+                # 相同的图片同时在别的线程处理时，存储会换一个文件名保存，多余的这份删掉
+                if saved != variant:
+                    default_storage.delete(saved)
+        return digest
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        logger.warning('头像 %s 无法处理', name, exc_info=True)
+        return None
+
+
+@write_transaction
+def _finish(user_id, upload_name, digest):
+    """用户在处理期间又上传了新头像时不覆盖，留给下一轮处理"""
+    changes = {'avatar_pending': False}
+    if digest is None:
+        changes['avatar'] = None
+    else:
+        changes.update(avatar=avatar_variant_name(digest, 'large', 'jpg'), avatar_hash=digest)
+    return User.objects.filter(pk=user_id, avatar=upload_name, avatar_pending=True).update(**changes)
+
+
+def process_pending_avatars(batch_size=50, workers=None):
+    """处理一批待处理的头像，返回 (处理数, 失败数)"""
+    pending = list(
+        User.objects.filter(avatar_pending=True).exclude(avatar='').exclude(avatar=None)
+        .values_list('pk', 'avatar')[:batch_size]
+    )
+    if not pending:
+        return 0, 0
+    workers = workers or getattr(settings, 'AVATAR_WORKERS', 4)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Pillow 解码、缩放和编码时释放 GIL，线程可以并行
+        digests = list(pool.map(process_upload, [name for _, name in pending]))
+
+    failed = 0
+    for (user_id, upload_name), digest in zip(pending, digests):
+        failed += digest is None
+        if _finish(user_id, upload_name, digest):
+            # update() 不触发 post_save，需要手动清除缓存的用户
+            cache.delete(user_cache_key(user_id))
+        # 原图可能带有拍摄地点等元数据，处理后（或已被新上传替换）即删除
+        default_storage.delete(upload_name)
+    return len(pending), failed
@@ -0,0 +1,42 @@
+"""
+带缓存的认证后端。
+
+Django 每个请求都按会话中的用户 id 查询一次用户表。这里把用户对象缓存
+USER_CACHE_TIMEOUT 秒，用户保存或删除时清除缓存（见 signals）。修改密码
+同样要保存用户，会话哈希随之改变，旧会话照常失效。缓存不跨进程共享时，
+清除只对处理修改的进程有效，其它进程最多在 USER_CACHE_TIMEOUT 秒后生效。
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from .models import User
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+class CachedModelBackend(ModelBackend):
+    """登录校验与 ModelBackend 相同，按 id 取用户时先查缓存"""
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = User._default_manager.filter(pk=user_id).first()
+            if user is None:
+                return None
+            cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+        # 停用的用户也缓存，是否允许登录每次都检查
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = await cache.aget(key)
+        if user is None:
+            user = await User._default_manager.filter(pk=user_id).afirst()
+            if user is None:
+                return None
+            await cache.aset(key, user, settings.USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
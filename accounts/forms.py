@@ -1,4 +1,5 @@
 from django import forms
+from django.conf import settings
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from .models import User
 
@@ -61,3 +62,23 @@ class LoginForm(AuthenticationForm):
             'placeholder': '请输入密码'
         })
     )
+
+
+class AvatarForm(forms.ModelForm):
+    class Meta:
+        model = User
+        fields = ('avatar',)
+        widgets = {
+            'avatar': forms.FileInput(attrs={
+                'class': 'form-input',
+                'accept': 'image/*'
+            }),
+        }
+
+    def clean_avatar(self):
+        avatar = self.cleaned_data.get('avatar')
+        if not avatar:
+            raise forms.ValidationError('请选择要上传的图片')
+        if avatar.size > settings.AVATAR_MAX_UPLOAD_SIZE:
+            raise forms.ValidationError(f'图片不能超过 {settings.AVATAR_MAX_UPLOAD_SIZE // (1024 * 1024)}MB')
+        return avatar
@@ -0,0 +1,30 @@
+"""
+参数可配置的密码哈希器。
+
+迭代次数和 work factor 从 settings 读取，可按 benchmark_hashers 在部署机器上
+的测量结果调整。参数改变后旧哈希的 must_update 为真，用户下次登录校验
+密码成功时，Django 会用新参数重新哈希并保存。
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+def scrypt_maxmem(work_factor, block_size):
+    """scrypt 需要约 128 * r * n 字节内存，OpenSSL 默认上限只有 32MB，这里留一倍余量"""
+    return 2 * 128 * block_size * work_factor
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return settings.PASSWORD_SCRYPT_WORK_FACTOR
+
+    @property
+    def maxmem(self):
+        return scrypt_maxmem(self.work_factor, self.block_size)
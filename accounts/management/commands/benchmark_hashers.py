@@ -0,0 +1,125 @@
+import json
+import os
+import statistics
+import time
+
+from django.contrib.auth import hashers
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.hashers import scrypt_maxmem
+from campus_jobs.benchmarking import git_revision
+
+PASSWORD = 'benchmark-password-2024'
+
+
+def parse_ints(value, option):
+    try:
+        return [int(item) for item in value.split(',') if item.strip()]
+    except ValueError:
+        raise CommandError(f'{option} 应为逗号分隔的整数')
+
+
+def pbkdf2_hasher(iterations):
+    hasher = hashers.PBKDF2PasswordHasher()
+    hasher.iterations = iterations
+    return hasher
+
+
+def scrypt_hasher(work_factor):
+    hasher = hashers.ScryptPasswordHasher()
+    hasher.work_factor = work_factor
+    hasher.maxmem = scrypt_maxmem(work_factor, hasher.block_size)
+    return hasher
+
+
+def hash_params(hasher, encoded):
+    """哈希串中记录的算法参数（去掉算法名、盐和哈希值）"""
+    return {
+        key: value for key, value in hasher.decode(encoded).items()
+        if key not in ('algorithm', 'salt', 'hash')
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        '在本机测量各密码哈希器和参数校验一次密码的耗时，'
+        '估算每秒可处理的登录数，输出 JSON，用于设置 PASSWORD_HASHERS 和迭代次数'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pbkdf2-iterations', default='260000,600000,870000,1200000',
+                            help='PBKDF2 迭代次数，逗号分隔')
+        parser.add_argument('--scrypt-work-factors', default='16384,32768', help='scrypt work factor，逗号分隔')
+        parser.add_argument('--rounds', type=int, default=5, help='每组参数校验密码的次数')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='处理登录的 CPU 核数（所有 worker 合计），用于估算登录容量')
+        parser.add_argument('--target-ms', type=float, default=250.0, help='单次校验可接受的最长耗时（毫秒）')
+        parser.add_argument('--output', help='结果写入文件，默认输出到标准输出')
+
+    def handle(self, *args, **options):
+        if options['rounds'] < 1:
+            raise CommandError('--rounds 至少为 1')
+        candidates = [pbkdf2_hasher(n) for n in parse_ints(options['pbkdf2_iterations'], '--pbkdf2-iterations')]
+        candidates += [scrypt_hasher(n) for n in parse_ints(options['scrypt_work_factors'], '--scrypt-work-factors')]
+        # argon2 / bcrypt 需要额外安装依赖，装了才测
+        for hasher in (hashers.Argon2PasswordHasher(), hashers.BCryptSHA256PasswordHasher()):
+            try:
+                hasher._load_library()
+            except ValueError:
+                self.stderr.write(f'{hasher.algorithm}: 未安装依赖库，跳过')
+                continue
+            candidates.append(hasher)
+
+        results = []
+        for hasher in candidates:
+            row = self.measure(hasher, options)
+            results.append(row)
+            self.stderr.write(
+                f'{row["algorithm"]} {row["params"]}: p50 {row["p50_ms"]} ms, '
+                f'约 {row["logins_per_second"]} 次登录/秒'
+            )
+
+        current = get_hasher()
+        report = {
+            'revision': git_revision(),
+            'cpu_count': os.cpu_count(),
+            'workers': options['workers'],
+            'target_ms': options['target_ms'],
+            'current': {
+                'hasher': f'{type(current).__module__}.{type(current).__name__}',
+                'algorithm': current.algorithm,
+                'params': hash_params(current, current.encode(PASSWORD, current.salt())),
+            },
+            'results': results,
+            # 每种算法在目标耗时内最强的参数
+            'recommended': {
+                row['algorithm']: row['params'] for row in sorted(results, key=lambda r: r['p50_ms'])
+                if row['p50_ms'] <= options['target_ms']
+            },
+        }
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def measure(self, hasher, options):
+        encoded = hasher.encode(PASSWORD, hasher.salt())
+        timings = []
+        for _ in range(options['rounds']):
+            start = time.perf_counter()
+            if not hasher.verify(PASSWORD, encoded):
+                raise CommandError(f'{hasher.algorithm} 校验失败')
+            timings.append((time.perf_counter() - start) * 1000)
+        p50 = statistics.median(timings)
+        return {
+            'algorithm': hasher.algorithm,
+            'params': hash_params(hasher, encoded),
+            'p50_ms': round(p50, 2),
+            'max_ms': round(max(timings), 2),
+            # 登录的 CPU 时间几乎都花在校验密码上
+            'logins_per_second': round(options['workers'] * 1000 / p50, 1),
+            'within_target': p50 <= options['target_ms'],
+        }
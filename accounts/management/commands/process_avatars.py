@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.avatars import process_pending_avatars
+
+
+class Command(BaseCommand):
+    help = '处理新上传的头像：裁剪缩放并生成 JPEG / WebP 缩略图'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='每批处理的头像数')
+        parser.add_argument('--workers', type=int, help='并行处理的线程数，默认取 AVATAR_WORKERS')
+        parser.add_argument('--loop', action='store_true', help='持续运行，作为后台 worker')
+        parser.add_argument('--interval', type=float, default=2.0, help='没有待处理头像时的轮询间隔（秒）')
+
+    def handle(self, *args, **options):
+        total = failed = 0
+        while True:
+            processed, batch_failed = process_pending_avatars(options['batch_size'], options['workers'])
+            total += processed
+            failed += batch_failed
+            if processed:
+                self.stdout.write(f'处理 {processed} 张，失败 {batch_failed} 张')
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f'共处理 {total} 张头像，失败 {failed} 张'))
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.17 on 2026-10-18 11:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='avatar_hash',
+            field=models.CharField(blank=True, max_length=64, verbose_name='头像内容哈希'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='avatar_pending',
+            field=models.BooleanField(db_index=True, default=False, verbose_name='头像待处理'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='avatar',
+            field=models.ImageField(blank=True, null=True, upload_to='avatars/uploads/', verbose_name='头像'),
+        ),
+    ]
@@ -1,8 +1,14 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.core.files.storage import default_storage
 
 # Create your models here.
 
+def avatar_variant_name(digest, size, ext):
+    """处理后的头像文件名由原图内容哈希决定，相同的图片只存一份"""
+    return f'avatars/{digest[:2]}/{digest}-{size}.{ext}'
+
+
 class User(AbstractUser):
     USER_TYPE_CHOICES = (
         ('student', '学生'),
@@ -11,7 +17,10 @@ class User(AbstractUser):
 
     phone = models.CharField(max_length=11, blank=True, verbose_name='手机号')
     user_type = models.CharField(max_length=10, choices=USER_TYPE_CHOICES, default='student', verbose_name='用户类型')
-    avatar = models.ImageField(upload_to='avatars/', blank=True, null=True, verbose_name='头像')
+    avatar = models.ImageField(upload_to='avatars/uploads/', blank=True, null=True, verbose_name='头像')
+    # 处理后的头像按内容哈希存放（见 accounts.avatars），上传新头像后由后台 worker 处理
+    avatar_hash = models.CharField(max_length=64, blank=True, verbose_name='头像内容哈希')
+    avatar_pending = models.BooleanField(default=False, db_index=True, verbose_name='头像待处理')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
 
     class Meta:
@@ -20,3 +29,24 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.username
+
+    def avatar_variant_url(self, size, ext):
+        if not self.avatar_hash:
+            return ''
+        return default_storage.url(avatar_variant_name(self.avatar_hash, size, ext))
+
+    @property
+    def avatar_thumbnail_url(self):
+        return self.avatar_variant_url('thumbnail', 'jpg')
+
+    @property
+    def avatar_thumbnail_webp_url(self):
+        return self.avatar_variant_url('thumbnail', 'webp')
+
+    @property
+    def avatar_large_url(self):
+        return self.avatar_variant_url('large', 'jpg')
+
+    @property
+    def avatar_large_webp_url(self):
+        return self.avatar_variant_url('large', 'webp')
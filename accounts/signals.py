@@ -0,0 +1,20 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .backends import user_cache_key
+from .models import User
+
+
+@receiver(pre_save, sender=User)
+def mark_new_avatar_pending(sender, instance, raw=False, **kwargs):
+    """新上传的头像（文件尚未写入存储）交给后台 worker 处理"""
+    if not raw and instance.avatar and not instance.avatar._committed:
+        instance.avatar_pending = True
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """用户资料、密码或状态变化后，下个请求重新从数据库读取"""
+    cache.delete(user_cache_key(instance.pk))
@@ -1,3 +1,233 @@
-from django.test import TestCase
+import json
+import shutil
+import tempfile
+from importlib import import_module
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import base_user
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+
+from campus_jobs.dbtrace import collect_queries
+
+from .async_auth import aget_user
+from .avatars import process_pending_avatars
+from .backends import user_cache_key
+from .models import User
+
+
+def identity_queries(queries):
+    return [q['sql'] for q in queries if 'FROM "django_session"' in q['sql'] or 'FROM "accounts_user"' in q['sql']]
+
+
+class CachedIdentityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('stu', password='pw-123456')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+        self.url = reverse('jobs:job_list')
+
+    def get(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+        return response, identity_queries(ctx.captured_queries)
+
+    def test_logged_in_page_view_issues_no_identity_queries(self):
+        # 默认配置：签名 Cookie 会话 + 本进程缓存的用户
+        self.get()
+        response, queries = self.get()
+        self.assertEqual(response.wsgi_request.user, self.user)
+        self.assertEqual(queries, [])
+
+    def test_user_falls_back_to_database(self):
+        cache.clear()
+        response, queries = self.get()
+        self.assertEqual(response.wsgi_request.user, self.user)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(self.get()[1], [])
+
+    def test_profile_edit_invalidates_cached_user(self):
+        self.get()
+        self.user.phone = '13900000000'
+        self.user.save()
+        response, queries = self.get()
+        self.assertEqual(response.wsgi_request.user.phone, '13900000000')
+        self.assertEqual(len(queries), 1)
+
+    def test_password_change_ends_session(self):
+        self.get()
+        self.user.set_password('new-pw-654321')
+        self.user.save()
+        response, _ = self.get()
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+
+    def test_deactivated_user_is_logged_out(self):
+        self.get()
+        self.user.is_active = False
+        self.user.save()
+        response, _ = self.get()
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+
+    def test_user_cache_is_short_lived(self):
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            self.get()
+        timeouts = [call.args[2] for call in cache_set.call_args_list if call.args[0] == user_cache_key(self.user.pk)]
+        self.assertEqual(timeouts, [settings.USER_CACHE_TIMEOUT])
+        self.assertLessEqual(settings.USER_CACHE_TIMEOUT, 60)
+
+    def test_existing_model_backend_sessions_stay_logged_in(self):
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+        response, _ = self.get()
+        self.assertEqual(response.wsgi_request.user, self.user)
+
+    async def test_async_user_served_from_cache(self):
+        await sync_to_async(self.get)()
+        request = RequestFactory().get(self.url)
+        request.session = import_module(settings.SESSION_ENGINE).SessionStore(
+            self.client.cookies[settings.SESSION_COOKIE_NAME].value)
+        statements = []
+        with collect_queries(lambda sql, duration: statements.append(sql)):
+            user = await aget_user(request)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(statements, [])
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class LoginTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('stu', password='pw-123456')
+
+    def login(self, password='pw-123456'):
+        return self.client.post(reverse('accounts:login'), {'username': 'stu', 'password': password})
+
+    def test_login_verifies_password_once(self):
+        with mock.patch.object(base_user, 'check_password', wraps=base_user.check_password) as check:
+            response = self.login()
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+        self.assertEqual(check.call_count, 1)
+        self.assertEqual(self.client.session['_auth_user_id'], str(self.user.pk))
+
+    def test_register_logs_in_with_cached_backend(self):
+        response = self.client.post(reverse('accounts:register'), {
+            'username': 'new', 'email': 'new@example.com', 'user_type': 'student',
+            'password1': 'Xk9-pw-123456', 'password2': 'Xk9-pw-123456',
+        })
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+        self.assertEqual(self.client.session['_auth_user_backend'], 'accounts.backends.CachedModelBackend')
+
+    def test_wrong_password_is_rejected(self):
+        response = self.login('wrong-password')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+    def test_changed_iterations_rehash_on_login(self):
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=1200):
+            self.login()
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1200$'))
+        self.assertTrue(self.user.check_password('pw-123456'))
+
+    def test_benchmark_hashers_command(self):
+        out = StringIO()
+        call_command('benchmark_hashers', '--pbkdf2-iterations', '1000,2000', '--scrypt-work-factors', '1024',
+                     '--rounds', '1', '--workers', '2', stdout=out, stderr=StringIO())
+        report = json.loads(out.getvalue())
+        self.assertEqual(
+            [(row['algorithm'], row['params'].get('iterations')) for row in report['results']],
+            [('pbkdf2_sha256', 1000), ('pbkdf2_sha256', 2000), ('scrypt', None)],
+        )
+        self.assertEqual(report['current']['params'], {'iterations': 1000})
+        self.assertEqual(report['recommended']['pbkdf2_sha256'], {'iterations': 2000})
+
+
+def make_jpeg(color='red', size=(640, 480)):
+    """带 EXIF 方向信息的 JPEG（顺时针旋转 90 度）"""
+    buffer = BytesIO()
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    Image.new('RGB', size, color).save(buffer, 'JPEG', exif=exif)
+    return buffer.getvalue()
+
+
+class AvatarTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('stu', password='pw-123456')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def upload(self, user, data):
+        self.client.force_login(user)
+        return self.client.post(reverse('accounts:avatar'), {
+            'avatar': SimpleUploadedFile('photo.jpg', data, content_type='image/jpeg'),
+        })
+
+    def test_upload_is_marked_pending(self):
+        response = self.upload(self.user, make_jpeg())
+        self.assertRedirects(response, reverse('accounts:avatar'), fetch_redirect_response=False)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.avatar_pending)
+        self.assertTrue(self.user.avatar.name.startswith('avatars/uploads/'))
+
+    def test_non_image_is_rejected(self):
+        response = self.upload(self.user, b'not an image')
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.avatar_pending)
+
+    def test_processing_writes_stripped_variants(self):
+        self.upload(self.user, make_jpeg())
+        upload_name = User.objects.get(pk=self.user.pk).avatar.name
+        self.assertEqual(process_pending_avatars(), (1, 0))
+
+        user = User.objects.get(pk=self.user.pk)
+        self.assertFalse(user.avatar_pending)
+        self.assertEqual(len(user.avatar_hash), 64)
+        self.assertEqual(user.avatar.name, f'avatars/{user.avatar_hash[:2]}/{user.avatar_hash}-large.jpg')
+        self.assertFalse(default_storage.exists(upload_name))
+        for size_name, size in (('thumbnail', 96), ('large', 256)):
+            for ext, image_format in (('jpg', 'JPEG'), ('webp', 'WEBP')):
+                with default_storage.open(f'avatars/{user.avatar_hash[:2]}/{user.avatar_hash}-{size_name}.{ext}') as f:
+                    image = Image.open(f)
+                    self.assertEqual(image.format, image_format)
+                    self.assertEqual(image.size, (size, size))
+                    self.assertNotIn(0x0112, image.getexif())
+        self.assertIn(user.avatar_hash, user.avatar_thumbnail_webp_url)
+
+    def test_identical_images_share_files(self):
+        other = User.objects.create_user('stu2', password='pw-123456')
+        data = make_jpeg('blue')
+        self.upload(self.user, data)
+        self.upload(other, data)
+        self.assertEqual(process_pending_avatars(), (2, 0))
+        first, second = User.objects.filter(pk__in=[self.user.pk, other.pk]).order_by('pk')
+        self.assertEqual(first.avatar_hash, second.avatar_hash)
+        self.assertEqual(first.avatar.name, second.avatar.name)
+        self.assertEqual(len(default_storage.listdir(f'avatars/{first.avatar_hash[:2]}')[1]), 4)
+
+    def test_process_avatars_command(self):
+        self.upload(self.user, make_jpeg())
+        out = StringIO()
+        call_command('process_avatars', '--workers', '2', stdout=out)
+        self.assertIn('共处理 1 张头像，失败 0 张', out.getvalue())
+        self.assertFalse(User.objects.get(pk=self.user.pk).avatar_pending)
@@ -1,8 +1,9 @@
+from django.conf import settings
 from django.shortcuts import render, redirect
-from django.contrib.auth import login, logout, authenticate
+from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from .forms import RegisterForm, LoginForm
+from .forms import AvatarForm, RegisterForm, LoginForm
 
 # Create your views here.
 
@@ -11,7 +12,8 @@ def register_view(request):
         form = RegisterForm(request.POST)
         if form.is_valid():
             user = form.save()
-            login(request, user)
+            # 配置了多个认证后端，新注册的用户没有经过 authenticate，需要指明后端
+            login(request, user, backend=settings.AUTHENTICATION_BACKENDS[0])
             messages.success(request, '注册成功！欢迎加入校园兼职平台！')
             return redirect('home')
         else:
@@ -25,13 +27,11 @@ def login_view(request):
     if request.method == 'POST':
         form = LoginForm(request, data=request.POST)
         if form.is_valid():
-            username = form.cleaned_data.get('username')
-            password = form.cleaned_data.get('password')
-            user = authenticate(username=username, password=password)
-            if user is not None:
-                login(request, user)
-                messages.success(request, f'欢迎回来，{username}！')
-                return redirect('home')
+            # 表单校验时已经调用过 authenticate，直接使用校验通过的用户，密码只哈希一次
+            user = form.get_user()
+            login(request, user)
+            messages.success(request, f'欢迎回来，{user.username}！')
+            return redirect('home')
         else:
             messages.error(request, '用户名或密码错误！')
     else:
@@ -44,3 +44,18 @@ def logout_view(request):
     logout(request)
     messages.info(request, '您已成功退出登录。')
     return redirect('home')
+
+
+@login_required
+def avatar_view(request):
+    if request.method == 'POST':
+        form = AvatarForm(request.POST, request.FILES, instance=request.user)
+        if form.is_valid():
+            # 原图先保存，缩略图由后台 worker（process_avatars）生成
+            form.save()
+            messages.success(request, '头像已上传，处理完成后即可显示。')
+            return redirect('accounts:avatar')
+        messages.error(request, '上传失败，请检查图片文件。')
+    else:
+        form = AvatarForm(instance=request.user)
+    return render(request, 'accounts/avatar.html', {'form': form})
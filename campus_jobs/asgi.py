@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'campus_jobs.settings')
+# 兼职的只读页面使用异步视图
+os.environ.setdefault('JOBS_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
@@ -0,0 +1,10 @@
+"""
+ASGI 部署使用的 URL 配置：与 urls 相同，只是 jobs 的只读页面换成异步视图。
+"""
+from django.urls import include, path
+
+from .urls import urlpatterns as wsgi_urlpatterns
+
+urlpatterns = [path('jobs/', include('jobs.async_urls'))] + [
+    pattern for pattern in wsgi_urlpatterns if str(pattern.pattern) != 'jobs/'
+]
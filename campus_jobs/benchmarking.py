@@ -0,0 +1,24 @@
+"""
+各 benchmark_* 管理命令共用的辅助函数。
+"""
+import statistics
+import subprocess
+
+from django.conf import settings
+
+
+def percentile(samples, p):
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method='inclusive')[p - 1]
+
+
+def git_revision():
+    """当前代码的提交号，写入压测结果便于对比；不在 git 仓库中时返回 None"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
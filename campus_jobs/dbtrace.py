@@ -0,0 +1,50 @@
+"""
+按请求收集数据库查询。
+
+每个数据库连接建立时都挂上同一个 execute_wrapper，查询交给当前上下文中
+登记的收集器。收集器保存在 ContextVar 中：异步视图的 ORM 调用经
+sync_to_async 在其它线程执行时会带上调用方的上下文，因此同步和异步请求
+的查询都能记到所属的请求上。
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+_collectors = ContextVar('query_collectors', default=())
+
+
+def _dispatch(execute, sql, params, many, context):
+    collectors = _collectors.get()
+    if not collectors:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        for collector in collectors:
+            collector(sql, duration)
+
+
+def install(connection, **kwargs):
+    if _dispatch not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_dispatch)
+
+
+connection_created.connect(install)
+
+
+@contextmanager
+def collect_queries(collector):
+    """上下文中执行的每条查询都会调用 collector(sql, duration)"""
+    # 本模块导入之前就已建立的连接收不到 connection_created
+    for connection in connections.all(initialized_only=True):
+        install(connection)
+    token = _collectors.set(_collectors.get() + (collector,))
+    try:
+        yield
+    finally:
+        _collectors.reset(token)
@@ -0,0 +1,289 @@
+"""
+进程内的请求指标：按 URL 名称统计请求耗时、数据库查询次数与耗时、
+模板渲染耗时，以 Prometheus 文本格式在 /metrics 暴露。
+
+配置了 METRICS_DIR 时，每个 worker 进程定期把自己的累计值写入该目录下
+以 pid 命名的文件，/metrics 读取并合并所有文件，因此 gunicorn 多进程
+部署下任一 worker 返回的都是全局数据。worker 退出时删除自己的文件，
+被强行杀掉的 worker 留下的文件在下次读取时清理。
+"""
+import atexit
+import hmac
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.template.backends.django import DjangoTemplates, Template
+
+from .dbtrace import collect_queries
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+# 指标名 -> (类型, 说明, 桶)
+METRICS = {
+    'http_request_duration_seconds': ('histogram', '请求处理耗时', LATENCY_BUCKETS),
+    'http_requests_total': ('counter', '请求数', None),
+    'db_queries_per_request': ('histogram', '单个请求的数据库查询次数', QUERY_COUNT_BUCKETS),
+    'db_query_duration_seconds_total': ('counter', '数据库查询累计耗时', None),
+    'template_render_duration_seconds': ('histogram', '模板渲染耗时', LATENCY_BUCKETS),
+}
+
+# 每个进程写入共享目录的最小间隔（秒）
+FLUSH_INTERVAL = 5
+
+_request_stats = ContextVar('request_stats', default=None)
+
+
+class Registry:
+    """线程安全的指标累加器"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+        self.last_flush = 0.0
+
+    def _entry(self, name, labels):
+        key = (name, tuple(sorted(labels.items())))
+        entry = self.values.get(key)
+        if entry is None:
+            buckets = METRICS[name][2]
+            entry = {'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0} if buckets else {'value': 0.0}
+            self.values[key] = entry
+        return entry
+
+    def inc(self, name, labels, amount=1):
+        with self.lock:
+            self._entry(name, labels)['value'] += amount
+
+    def observe(self, name, labels, value):
+        with self.lock:
+            entry = self._entry(name, labels)
+            for i, bound in enumerate(METRICS[name][2]):
+                if value <= bound:
+                    entry['buckets'][i] += 1
+            entry['sum'] += value
+            entry['count'] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return [
+                [name, list(labels), json.loads(json.dumps(entry))]
+                for (name, labels), entry in self.values.items()
+            ]
+
+    def flush(self, force=False):
+        """把本进程的累计值写入共享目录"""
+        directory = getattr(settings, 'METRICS_DIR', None)
+        if not directory:
+            return
+        now = time.monotonic()
+        if not force and now - self.last_flush < FLUSH_INTERVAL:
+            return
+        self.last_flush = now
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{os.getpid()}.json')
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.snapshot(), f)
+        # 原子替换，读取方不会看到写了一半的文件
+        os.replace(tmp_path, path)
+
+    def discard(self):
+        """删除本进程写入共享目录的文件"""
+        directory = getattr(settings, 'METRICS_DIR', None)
+        if directory:
+            _remove(os.path.join(directory, f'{os.getpid()}.json'))
+
+
+registry = Registry()
+atexit.register(registry.discard)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _merge(target, snapshot):
+    for name, labels, entry in snapshot:
+        if name not in METRICS:
+            continue
+        key = (name, tuple(tuple(pair) for pair in labels))
+        current = target.get(key)
+        if current is None:
+            target[key] = entry
+        elif 'value' in entry:
+            current['value'] += entry['value']
+        else:
+            current['buckets'] = [a + b for a, b in zip(current['buckets'], entry['buckets'])]
+            current['sum'] += entry['sum']
+            current['count'] += entry['count']
+
+
+def collect():
+    """合并所有 worker 进程（或仅本进程）的指标"""
+    directory = getattr(settings, 'METRICS_DIR', None)
+    if not directory:
+        merged = {}
+        _merge(merged, registry.snapshot())
+        return merged
+
+    registry.flush(force=True)
+    merged = {}
+    for filename in os.listdir(directory):
+        pid, _, extension = filename.partition('.')
+        if extension != 'json' or not pid.isdigit():
+            continue
+        # 已退出的 worker 不再计入，顺便删掉它的文件
+        if not _pid_alive(int(pid)):
+            _remove(os.path.join(directory, filename))
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as f:
+                _merge(merged, json.load(f))
+        except (OSError, ValueError):
+            continue
+    return merged
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def render_metrics(values):
+    """Prometheus 文本格式"""
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        full_name = f'campus_{name}'
+        lines.append(f'# HELP {full_name} {help_text}')
+        lines.append(f'# TYPE {full_name} {kind}')
+        for (metric, labels), entry in sorted(values.items()):
+            if metric != name:
+                continue
+            if kind == 'counter':
+                lines.append(f'{full_name}{_format_labels(labels)} {entry["value"]}')
+                continue
+            for bound, count in zip(buckets, entry['buckets']):
+                lines.append(f'{full_name}_bucket{_format_labels(labels, [("le", bound)])} {count}')
+            lines.append(f'{full_name}_bucket{_format_labels(labels, [("le", "+Inf")])} {entry["count"]}')
+            lines.append(f'{full_name}_sum{_format_labels(labels)} {entry["sum"]}')
+            lines.append(f'{full_name}_count{_format_labels(labels)} {entry["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """记录每个请求的耗时、查询次数与耗时；应放在 MIDDLEWARE 最前面"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with self.track(request) as result:
+            result['response'] = self.get_response(request)
+        return result['response']
+
+    async def __acall__(self, request):
+        with self.track(request) as result:
+            result['response'] = await self.get_response(request)
+        return result['response']
+
+    @contextmanager
+    def track(self, request):
+        stats = {'queries': 0, 'db_time': 0.0, 'template_time': 0.0}
+        token = _request_stats.set(stats)
+
+        def record_query(sql, duration):
+            stats['queries'] += 1
+            stats['db_time'] += duration
+
+        result = {}
+        start = time.perf_counter()
+        try:
+            with collect_queries(record_query):
+                yield result
+        finally:
+            _request_stats.reset(token)
+        duration = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match and match.view_name else '<unresolved>'
+        labels = {'view': view}
+        registry.observe('http_request_duration_seconds', labels, duration)
+        registry.inc('http_requests_total', dict(labels, method=request.method, status=result['response'].status_code))
+        registry.observe('db_queries_per_request', labels, stats['queries'])
+        registry.inc('db_query_duration_seconds_total', labels, stats['db_time'])
+        if stats['template_time']:
+            registry.observe('template_render_duration_seconds', labels, stats['template_time'])
+        registry.flush()
+
+
+class InstrumentedTemplate(Template):
+    def render(self, context=None, request=None):
+        stats = _request_stats.get()
+        # 模板中嵌套渲染的片段已计入外层耗时
+        if stats is None or stats.get('rendering'):
+            return super().render(context, request)
+        stats['rendering'] = True
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats['rendering'] = False
+            stats['template_time'] += time.perf_counter() - start
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """记录模板渲染耗时的 Django 模板后端"""
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return InstrumentedTemplate(template.template, self)
+
+
+def has_metrics_token(request):
+    """请求是否带有 METRICS_TOKEN；未配置令牌时一律为否"""
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+    return bool(token) and scheme.lower() == 'bearer' and hmac.compare_digest(credentials.strip(), token)
+
+
+def metrics_view(request):
+    """Prometheus 抓取入口，只对带 METRICS_TOKEN 的请求和管理员开放"""
+    if not has_metrics_token(request) and not request.user.is_staff:
+        raise Http404
+    return HttpResponse(render_metrics(collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,90 @@
+"""
+每个请求的查询预算与 N+1 检测。
+
+视图用 @query_budget(n) 声明最多允许的查询数（含会话和用户查询）。
+QueryBudgetMiddleware 统计视图执行期间的所有查询，并把 SQL 规范化为
+"形状"：同一形状的 SELECT 出现 QUERY_BUDGET_N_PLUS_ONE_THRESHOLD 次及以上
+即视为 N+1。开发和测试环境（QUERY_BUDGET_RAISE）下，声明了预算的视图
+超支或出现 N+1 时直接抛出异常；生产环境只记录日志。
+"""
+import logging
+import re
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .dbtrace import collect_queries
+
+logger = logging.getLogger(__name__)
+
+# IN (%s, %s, ...) 的参数个数不影响查询形状
+IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+NUMBER = re.compile(r'\b\d+\b')
+
+
+class QueryBudgetExceeded(Exception):
+    """视图查询数超出预算，或出现了 N+1 查询"""
+
+
+def query_budget(max_queries):
+    """声明视图在一次请求中最多执行的查询数"""
+    def decorator(view_func):
+        # 只做标记，不包装视图，异步视图仍是协程函数
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
+
+
+def query_shape(sql):
+    return NUMBER.sub('?', IN_LIST.sub('IN (...)', sql))
+
+
+class QueryBudgetMiddleware:
+    """应放在 MIDDLEWARE 最后，只统计视图本身（含惰性加载的会话和用户）的查询"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        statements = []
+        with collect_queries(lambda sql, duration: statements.append(sql)):
+            response = self.get_response(request)
+        self.check(request, self.budget(request), statements)
+        return response
+
+    async def __acall__(self, request):
+        statements = []
+        with collect_queries(lambda sql, duration: statements.append(sql)):
+            response = await self.get_response(request)
+        self.check(request, self.budget(request), statements)
+        return response
+
+    def budget(self, request):
+        match = getattr(request, 'resolver_match', None)
+        return getattr(match.func, 'query_budget', None) if match else None
+
+    def check(self, request, budget, statements):
+        threshold = getattr(settings, 'QUERY_BUDGET_N_PLUS_ONE_THRESHOLD', 3)
+        shapes = Counter(query_shape(sql) for sql in statements if sql.lstrip().upper().startswith('SELECT'))
+        repeated = [(shape, count) for shape, count in shapes.items() if count >= threshold]
+
+        problems = []
+        if budget is not None and len(statements) > budget:
+            problems.append(f'执行了 {len(statements)} 条查询，预算为 {budget}')
+        for shape, count in repeated:
+            problems.append(f'疑似 N+1，同一查询重复 {count} 次: {shape[:300]}')
+        if not problems:
+            return
+
+        message = f'{request.method} {request.path}: ' + '；'.join(problems)
+        if budget is not None and getattr(settings, 'QUERY_BUDGET_RAISE', settings.DEBUG):
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -0,0 +1,126 @@
+"""
+主库 / 只读副本路由。
+
+只有 HTTP 请求中的安全方法（GET、HEAD 等）读副本；写请求、刚写过数据库
+的浏览器（PRIMARY_PIN_SECONDS 秒内）、事务内的读取，以及管理命令、后台
+任务等请求之外的代码都读主库。副本的复制延迟应小于这个时间窗口。
+
+是否写过数据库由路由的 db_for_write 记录，与 HTTP 方法无关：通过 GET 链接
+结束招募、处理申请同样会固定到主库，本次请求中写入之后的读取也改读主库。
+会写入的视图应整个包在 use_primary() 里，写入前读出的行同样来自主库，
+不会用副本上的旧数据覆盖更新的修改。
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'primary_pin'
+PIN_SALT = 'campus_jobs.routers.primary_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+_replica_reads = ContextVar('replica_reads', default=False)
+# 当前请求是否写过数据库。值是可变的对象，sync_to_async 复制上下文后
+# 在线程里发生的写入，请求本身也能看到
+_request_writes = ContextVar('request_writes', default=None)
+
+
+class RequestWrites:
+    def __init__(self):
+        self.wrote = False
+
+
+@contextmanager
+def use_primary():
+    """
+    上下文中的读取一律走主库，例如要写入缓存的结果。也可以用作视图的
+    装饰器（@use_primary()），用于会写入数据库的视图。
+    """
+    token = _replica_reads.set(False)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """读请求分给只读副本，写入总是在主库"""
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        if not replicas or not _replica_reads.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        writes = _request_writes.get()
+        if writes is not None and writes.wrote:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        writes = _request_writes.get()
+        if writes is not None:
+            writes.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # 副本与主库数据相同
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class PrimaryPinningMiddleware:
+    """
+    决定本次请求能否读副本。请求中写过数据库时给浏览器设置一个带时间戳
+    签名的 cookie，有效期内的请求都读主库，用户能立即看到自己刚做的修改。
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        writes = RequestWrites()
+        token = _replica_reads.set(self.can_read_replica(request))
+        writes_token = _request_writes.set(writes)
+        try:
+            response = self.get_response(request)
+        finally:
+            _replica_reads.reset(token)
+            _request_writes.reset(writes_token)
+        return self.pin(writes, response)
+
+    async def __acall__(self, request):
+        writes = RequestWrites()
+        token = _replica_reads.set(self.can_read_replica(request))
+        writes_token = _request_writes.set(writes)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _replica_reads.reset(token)
+            _request_writes.reset(writes_token)
+        return self.pin(writes, response)
+
+    def can_read_replica(self, request):
+        if not getattr(settings, 'DATABASE_REPLICAS', []) or request.method not in SAFE_METHODS:
+            return False
+        pinned = request.get_signed_cookie(
+            PIN_COOKIE, default=None, salt=PIN_SALT, max_age=settings.PRIMARY_PIN_SECONDS)
+        return pinned is None
+
+    def pin(self, writes, response):
+        # 出错的请求也可能已经写入（例如事务外的部分写入），同样固定到主库
+        if getattr(settings, 'DATABASE_REPLICAS', []) and writes.wrote:
+            response.set_signed_cookie(
+                PIN_COOKIE, '1', salt=PIN_SALT, max_age=settings.PRIMARY_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
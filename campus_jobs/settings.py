@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,6 +43,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'campus_jobs.staticfiles.StaticFilesMiddleware',
+    'campus_jobs.metrics.MetricsMiddleware',
+    'campus_jobs.routers.PrimaryPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -49,16 +53,26 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'campus_jobs.querybudget.QueryBudgetMiddleware',
 ]
 
-ROOT_URLCONF = 'campus_jobs.urls'
+# ASGI 部署（asgi.py 设置 JOBS_ASYNC_VIEWS=1）时兼职的只读页面使用异步视图
+ASYNC_VIEWS = os.environ.get('JOBS_ASYNC_VIEWS') == '1'
+
+ROOT_URLCONF = 'campus_jobs.asgi_urls' if ASYNC_VIEWS else 'campus_jobs.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'campus_jobs.metrics.InstrumentedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # 编译后的模板常驻内存；开发时模板文件改动由 runserver 的自动重载清空缓存
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -75,14 +89,133 @@ WSGI_APPLICATION = 'campus_jobs.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# SQLite 生产配置：每个连接设置 WAL、busy_timeout 等 PRAGMA，事务以
+# BEGIN IMMEDIATE 开始（见 campus_jobs/sqlite_backend），写操作经
+# campus_jobs.writes.write_transaction 串行化并在锁冲突时重试。
+# WSGI 下使用持久连接，省去每个请求重新打开数据库和设置 PRAGMA；
+# ASGI 下每个请求在新线程中访问数据库，持久连接不会被复用，因此关闭。
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'campus_jobs.sqlite_backend',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 0 if ASYNC_VIEWS else 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+        },
+    }
+}
+
+# 只读副本：环境变量 DATABASE_REPLICAS 给出副本数据库文件（逗号分隔），
+# 副本连接设置 query_only，防止误写。读写路由见 campus_jobs/routers.py。
+DATABASE_REPLICAS = []
+for index, path in enumerate(filter(None, os.environ.get('DATABASE_REPLICAS', '').split(','))):
+    alias = f'replica{index + 1}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': path,
+        'OPTIONS': {**DATABASES['default']['OPTIONS'], 'pragmas': {'query_only': 'ON'}},
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['campus_jobs.routers.PrimaryReplicaRouter']
+
+# 写请求之后多少秒内，同一浏览器的请求仍读主库（应大于副本的复制延迟）
+PRIMARY_PIN_SECONDS = 10
+
+# 写事务遇到 database is locked 时的重试次数和首次退避秒数（之后指数增长）
+WRITE_RETRIES = 5
+WRITE_RETRY_BACKOFF = 0.05
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# 本地内存缓存只在单进程内共享；多个 worker 部署时改用 FileBasedCache，
+# 让兼职列表缓存的失效在各进程间同步生效。
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'campus-jobs',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
     }
 }
 
 
+# Metrics
+# 多进程部署（gunicorn）时把 METRICS_DIR 指向所有 worker 可写的同一目录，
+# /metrics 会合并各进程的数据；未设置时只统计当前进程。
+# /metrics 只对管理员和带 `Authorization: Bearer <METRICS_TOKEN>` 的请求开放
+# （Prometheus 的 bearer_token 配置）。不按来源 IP 判断：经本机 nginx 反向
+# 代理时所有请求都来自 127.0.0.1。
+
+METRICS_DIR = os.environ.get('METRICS_DIR')
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+
+# Query budget
+# 开发和测试环境下，声明了 @query_budget 的视图超出预算或出现 N+1 查询时
+# 直接报错；生产环境只写日志。
+
+QUERY_BUDGET_RAISE = DEBUG
+QUERY_BUDGET_N_PLUS_ONE_THRESHOLD = 3
+
+
+# Application intake
+# 'direct'：申请直接写入，遇到写锁退避重试；
+# 'queue'：热门兼职集中开放时，所有申请先进入暂存队列，
+# 由 `drain_application_intake --loop` 后台批量写入。队列在同一个数据库中，
+# 写入它同样要取得写锁，作用是把大量申请合并成少数几个事务。
+
+APPLICATION_INTAKE_MODE = 'direct'
+
+# Duplicate jobs
+# 发布或编辑兼职时，与本人招募中的兼职内容近似（MinHash 估计相似度 >= 0.8）：
+# 'warn'：照常保存并提示；'block'：不允许发布，列出已有的兼职。
+# 编辑已有兼职时总是只提示。阈值根据线上数据调好之前先用 'warn'。
+# 已有的重复兼职可用 `cluster_duplicate_jobs` 聚类、清理。
+
+JOB_DUPLICATE_ACTION = 'warn'
+
+
+# Sessions and authentication
+# 用户对象由 CachedModelBackend 缓存 USER_CACHE_TIMEOUT 秒，用户保存时失效。
+# 失效只作用于共享的缓存：LocMemCache 各 worker 各有一份，别的 worker 上
+# 改密码、停用、登出最多要等这么久才生效，因此只缓存几十秒。
+# 会话存在签名 Cookie 中，读取会话不查数据库也不依赖跨进程共享的缓存；
+# 登出时 Cookie 被清除，改密码后会话中的校验值不再匹配，都立即生效。
+# 会话中只放登录信息，不要写入大量数据（Cookie 大小有限）。
+# ModelBackend 保留在列表里：已有会话记录的后端是它，去掉会让所有人掉线。
+
+USER_CACHE_TIMEOUT = 30
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+
+# Password hashing
+# 列表第一项用于新密码；迭代次数 / work factor 按 `benchmark_hashers` 在部署
+# 机器上的测量结果设置。参数或首选算法改变后，用户下次登录时自动按新
+# 配置重新哈希。
+
+PASSWORD_HASHERS = [
+    'accounts.hashers.PBKDF2PasswordHasher',
+    'accounts.hashers.ScryptPasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 600000))
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.environ.get('PASSWORD_SCRYPT_WORK_FACTOR', 2 ** 14))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -117,9 +250,39 @@ USE_TZ = True
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/4.2/howto/static-files/
 
+# collectstatic 把文件收集到 STATIC_ROOT，文件名带内容哈希并预先压缩，
+# 由 campus_jobs.staticfiles.StaticFilesMiddleware 直接返回（见该模块说明）。
+# 开发时（DEBUG）runserver 仍从各源目录返回原文件名的静态文件。
+# 关闭 DEBUG 部署时必须先运行 collectstatic，没有清单时 {% static %} 报错。
+
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+STATICFILES_REQUIRE_MANIFEST = not DEBUG
 STATICFILES_DIRS = [BASE_DIR / 'static']
 
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'campus_jobs.staticfiles.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Media files
+# 上传的文件一律经 TemporaryFileUploadHandler 分块写入临时文件，
+# 不在内存中缓冲整个文件。处理后的头像文件名按内容哈希生成，内容不会
+# 改变，前端服务器可以为 MEDIA_URL 下的 avatars/ 设置长期缓存。
+
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+FILE_UPLOAD_HANDLERS = ['django.core.files.uploadhandler.TemporaryFileUploadHandler']
+
+AVATAR_MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+# `process_avatars` 处理头像的线程数
+AVATAR_WORKERS = 4
+
 LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
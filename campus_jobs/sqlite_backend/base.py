@@ -0,0 +1,42 @@
+"""
+生产环境用的 SQLite 后端。
+
+每个连接建立时设置 WAL、busy_timeout 等 PRAGMA，可在 OPTIONS['pragmas']
+中覆盖。事务以 BEGIN IMMEDIATE 开始，写锁在事务开头就取得：默认的
+BEGIN DEFERRED 在读过数据之后再升级为写锁时，如果别的连接正在写，
+SQLite 不会等待 busy_timeout，而是直接报 database is locked。
+"""
+from django.db.backends.sqlite3 import base
+
+DEFAULT_PRAGMAS = {
+    # 读写互不阻塞，写入只追加到 WAL 文件
+    'journal_mode': 'WAL',
+    # WAL 模式下 NORMAL 不会损坏数据库，断电时最多丢失最后几个事务
+    'synchronous': 'NORMAL',
+    # 遇到写锁时最多等待的毫秒数
+    'busy_timeout': 5000,
+    # 负数表示以 KiB 为单位，即 64 MB 页缓存
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        # 以下选项由本后端处理，不能传给 sqlite3.connect()
+        params.pop('pragmas', None)
+        params.pop('transaction_mode', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        pragmas = {**DEFAULT_PRAGMAS, **self.settings_dict['OPTIONS'].get('pragmas', {})}
+        for name, value in pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode', 'IMMEDIATE')
+        self.cursor().execute(f'BEGIN {mode}')
@@ -0,0 +1,190 @@
+"""
+静态文件：带内容哈希的文件名、预压缩与进程内服务。
+
+collectstatic 时 CompressedManifestStaticFilesStorage 给文件名加上内容哈希
+（css/style.css -> css/style.1a2b3c4d5e6f.css），并为文本类文件预先生成 .gz，
+安装了 brotli 时还生成 .br。StaticFilesMiddleware 直接从 STATIC_ROOT 返回
+这些文件，按 Accept-Encoding 选择预压缩版本；带哈希的文件内容永不改变，
+设置一年的 immutable 缓存，浏览器不再重新验证。
+"""
+import gzip
+import mimetypes
+import os
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:  # brotli 是可选依赖，未安装时只生成 gzip
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.xml', '.map')
+# 太小的文件压缩后省不了几个字节
+MIN_COMPRESS_SIZE = 256
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+# 不带哈希的原文件名内容可能改变，只短时间缓存
+DEFAULT_MAX_AGE = 60
+
+# (Content-Encoding, 预压缩文件后缀)，按优先级排列
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def available_encodings():
+    return [(encoding, suffix) for encoding, suffix in ENCODINGS if encoding != 'br' or brotli is not None]
+
+
+def accepted_encodings(header):
+    """解析 Accept-Encoding，返回客户端接受的编码（q=0 表示拒绝）"""
+    accepted = set()
+    for item in header.split(','):
+        encoding, _, params = item.strip().partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if encoding and quality > 0:
+            accepted.add(encoding.strip().lower())
+    return accepted
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """文件名带内容哈希，并为可压缩的文件生成 .gz / .br"""
+
+    def stored_name(self, name):
+        # 清单中缺少的文件由父类报错；没有清单时只有开发和测试环境
+        # （STATICFILES_REQUIRE_MANIFEST 为假）使用原文件名，部署时漏了 collectstatic 立即报错
+        if not self.hashed_files:
+            if getattr(settings, 'STATICFILES_REQUIRE_MANIFEST', True):
+                raise ValueError(f"没有找到静态文件清单，请先运行 collectstatic（请求的文件：'{name}'）")
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        # 原文件名和带哈希的文件名都可能被请求，都要压缩
+        for name in sorted(set(paths) | set(self.hashed_files.values())):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress_file(name)
+
+    def compress_file(self, name):
+        with self.open(name) as f:
+            data = f.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+        for encoding, suffix in available_encodings():
+            compressed = compress(data, encoding)
+            # 压缩后没有明显变小的不保存，直接返回原文件
+            if len(compressed) >= len(data) * 0.95:
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
+
+
+class StaticFilesMiddleware:
+    """
+    从 STATIC_ROOT 返回静态文件。应放在 MIDDLEWARE 最前面，
+    静态文件请求不经过会话、认证等中间件，也不计入请求指标。
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        # 静态文件放在 CDN 等其它域名上时不需要本中间件
+        if not settings.STATIC_ROOT or '://' in settings.STATIC_URL:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self._hashed_files, self._hashed_names = None, set()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.path.startswith(self.prefix):
+            response = self.serve(request, stream=True)
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if request.path.startswith(self.prefix):
+            # ASGI 下不返回同步的文件迭代器，静态文件都不大，整个读入内存
+            response = await sync_to_async(self.serve)(request, stream=False)
+            if response is not None:
+                return response
+        return await self.get_response(request)
+
+    def serve(self, request, stream):
+        """返回静态文件响应；文件不存在时返回 None，交给后面的 URL 路由处理"""
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        name = request.path[len(self.prefix):]
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        content_encoding = None
+        if name.endswith(COMPRESSIBLE_EXTENSIONS):
+            accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+            for encoding, suffix in available_encodings():
+                if encoding in accepted and os.path.isfile(path + suffix):
+                    path, content_encoding = path + suffix, encoding
+                    break
+
+        stat = os.stat(path)
+        etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+        response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+        if response is None:
+            if stream and request.method == 'GET':
+                # 文件名取请求的原文件名，而不是预压缩文件的 .gz / .br 文件名
+                response = FileResponse(open(path, 'rb'), content_type=content_type, filename=os.path.basename(name))
+            else:
+                with open(path, 'rb') as f:
+                    response = HttpResponse(f.read() if request.method == 'GET' else b'', content_type=content_type)
+                response['Content-Length'] = stat.st_size
+            if content_encoding:
+                response['Content-Encoding'] = content_encoding
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(stat.st_mtime)
+
+        if name.endswith(COMPRESSIBLE_EXTENSIONS):
+            response['Vary'] = 'Accept-Encoding'
+        if name in self.hashed_names():
+            response['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        else:
+            response['Cache-Control'] = f'public, max-age={DEFAULT_MAX_AGE}'
+        return response
+
+    def hashed_names(self):
+        """collectstatic 生成的带哈希的文件名，清单重新加载后才重建集合"""
+        hashed_files = getattr(staticfiles_storage, 'hashed_files', {})
+        if hashed_files is not self._hashed_files:
+            self._hashed_files, self._hashed_names = hashed_files, set(hashed_files.values())
+        return self._hashed_names
@@ -0,0 +1,308 @@
+import gzip
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import User
+from jobs.models import Job
+from . import metrics
+from . import staticfiles
+from .routers import PIN_COOKIE, PrimaryPinningMiddleware, PrimaryReplicaRouter, use_primary
+from .querybudget import QueryBudgetExceeded, QueryBudgetMiddleware, query_shape
+from .writes import write_transaction
+
+
+@override_settings(METRICS_TOKEN='scrape-token')
+class MetricsTests(TestCase):
+    def setUp(self):
+        metrics.registry.values.clear()
+
+    def test_records_view_latency_queries_and_templates(self):
+        self.client.get(reverse('jobs:job_list'))
+        body = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-token').content.decode()
+        self.assertIn('# TYPE campus_http_request_duration_seconds histogram', body)
+        self.assertIn('campus_http_request_duration_seconds_count{view="jobs:job_list"} 1', body)
+        self.assertIn('campus_http_requests_total{method="GET",status="200",view="jobs:job_list"} 1', body)
+        self.assertIn('campus_db_queries_per_request_bucket{view="jobs:job_list",le="+Inf"} 1', body)
+        self.assertIn('campus_template_render_duration_seconds_count{view="jobs:job_list"} 1', body)
+
+    def test_endpoint_requires_token_or_staff(self):
+        # 经本机反向代理的请求都来自 127.0.0.1，不能据此放行
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='127.0.0.1').status_code, 404)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 404)
+        with override_settings(METRICS_TOKEN=None):
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer ').status_code, 404)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-token').status_code, 200)
+        self.client.force_login(User.objects.create_user('admin', is_staff=True))
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    def test_merges_worker_files(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            # 另一个 worker 进程写下的数据
+            other = metrics.Registry()
+            other.inc('http_requests_total', {'view': 'home', 'method': 'GET', 'status': 200}, 2)
+            other_path = os.path.join(directory, f'{os.getppid()}.json')
+            with open(other_path, 'w') as f:
+                json.dump(other.snapshot(), f)
+
+            metrics.registry.inc('http_requests_total', {'view': 'home', 'method': 'GET', 'status': 200})
+            merged = metrics.collect()
+            key = ('http_requests_total', (('method', 'GET'), ('status', 200), ('view', 'home')))
+            self.assertEqual(merged[key]['value'], 3)
+            self.assertTrue(os.path.exists(os.path.join(directory, f'{os.getpid()}.json')))
+
+    def test_drops_files_of_exited_workers(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            worker = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'], capture_output=True, text=True)
+            dead_path = os.path.join(directory, f'{worker.stdout.strip()}.json')
+            other = metrics.Registry()
+            other.inc('http_requests_total', {'view': 'home', 'method': 'GET', 'status': 200}, 2)
+            with open(dead_path, 'w') as f:
+                json.dump(other.snapshot(), f)
+
+            self.assertEqual(metrics.collect(), {})
+            self.assertFalse(os.path.exists(dead_path))
+
+            own_path = os.path.join(directory, f'{os.getpid()}.json')
+            self.assertTrue(os.path.exists(own_path))
+            metrics.registry.discard()
+            self.assertFalse(os.path.exists(own_path))
+
+
+class QueryBudgetTests(SimpleTestCase):
+    def setUp(self):
+        self.middleware = QueryBudgetMiddleware(lambda request: None)
+        self.request = RequestFactory().get('/jobs/')
+
+    def test_query_shape_ignores_values_and_in_lists(self):
+        self.assertEqual(
+            query_shape('SELECT * FROM t WHERE id IN (%s, %s, %s) LIMIT 21'),
+            query_shape('SELECT * FROM t WHERE id IN (%s) LIMIT 1'),
+        )
+
+    @override_settings(QUERY_BUDGET_RAISE=True)
+    def test_raises_on_n_plus_one_and_overspend(self):
+        repeated = ['SELECT * FROM "accounts_user" WHERE "id" = %s LIMIT 21'] * 3
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'N+1'):
+            self.middleware.check(self.request, 10, repeated)
+        with self.assertRaisesMessage(QueryBudgetExceeded, '预算为 2'):
+            self.middleware.check(self.request, 2, ['SELECT 1', 'SELECT 2', 'SELECT 3'])
+        self.middleware.check(self.request, 3, ['SELECT a', 'SELECT b', 'SELECT c'])
+
+    @override_settings(QUERY_BUDGET_RAISE=False)
+    def test_logs_in_production(self):
+        with self.assertLogs('campus_jobs.querybudget', 'WARNING'):
+            self.middleware.check(self.request, 1, ['SELECT 1', 'SELECT 2'])
+
+    @override_settings(QUERY_BUDGET_RAISE=True)
+    def test_views_without_budget_only_log(self):
+        with self.assertLogs('campus_jobs.querybudget', 'WARNING'):
+            self.middleware.check(self.request, None, ['SELECT %s'] * 5)
+
+
+class SqliteBackendTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_on_connect(self):
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('cache_size'), -64000)
+
+
+@mock.patch('campus_jobs.writes.time.sleep')
+class WriteTransactionTests(TransactionTestCase):
+    def flaky(self, failures, error='database is locked'):
+        calls = []
+
+        @write_transaction
+        def write():
+            calls.append(connection.in_atomic_block)
+            if len(calls) <= failures:
+                raise OperationalError(error)
+            return 'ok'
+        return write, calls
+
+    def test_retries_lock_errors_inside_a_transaction(self, sleep):
+        write, calls = self.flaky(2)
+        self.assertEqual(write(), 'ok')
+        self.assertEqual(calls, [True, True, True])
+        self.assertEqual(sleep.call_count, 2)
+
+    @override_settings(WRITE_RETRIES=2)
+    def test_gives_up_after_retries(self, sleep):
+        write, calls = self.flaky(5)
+        with self.assertRaisesMessage(OperationalError, 'locked'):
+            write()
+        self.assertEqual(len(calls), 3)
+
+    def test_other_errors_are_not_retried(self, sleep):
+        write, calls = self.flaky(1, error='no such table: x')
+        with self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(len(calls), 1)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRoutingTests(SimpleTestCase):
+    def request(self, method='get', cookies=None, write=False):
+        """经过中间件发出请求，返回 (视图中读取所用的库, 响应)"""
+        seen = []
+
+        def view(request):
+            seen.append(PrimaryReplicaRouter().db_for_read(Job))
+            with use_primary():
+                seen.append(PrimaryReplicaRouter().db_for_read(Job))
+            if write:
+                PrimaryReplicaRouter().db_for_write(Job)
+                # 写入之后本次请求的读取改读主库
+                self.assertEqual(PrimaryReplicaRouter().db_for_read(Job), 'default')
+            return HttpResponse()
+
+        request = getattr(RequestFactory(), method)('/jobs/')
+        request.COOKIES.update(cookies or {})
+        response = PrimaryPinningMiddleware(view)(request)
+        self.assertEqual(seen[1], 'default')
+        return seen[0], response
+
+    def test_reads_go_to_replica_only_inside_safe_requests(self):
+        self.assertEqual(PrimaryReplicaRouter().db_for_read(Job), 'default')
+        self.assertEqual(self.request()[0], 'replica1')
+        self.assertEqual(PrimaryReplicaRouter().db_for_write(Job), 'default')
+
+    def test_writes_pin_the_browser_to_primary(self):
+        database, response = self.request('post')
+        self.assertEqual(database, 'default')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        # 按是否写过数据库固定，与 HTTP 方法无关
+        database, response = self.request('get', write=True)
+        self.assertEqual(database, 'replica1')
+        cookie = response.cookies[PIN_COOKIE]
+        self.assertEqual(self.request(cookies={PIN_COOKIE: cookie.value})[0], 'default')
+        with override_settings(PRIMARY_PIN_SECONDS=-1):
+            self.assertEqual(self.request(cookies={PIN_COOKIE: cookie.value})[0], 'replica1')
+        self.assertEqual(self.request(cookies={PIN_COOKIE: 'forged'})[0], 'replica1')
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class GetWritePinningTests(TransactionTestCase):
+    """结束招募等通过 GET 链接写入的视图（TestCase 的事务内总是读主库，这里不用它）"""
+
+    def setUp(self):
+        self.publisher = User.objects.create_user('boss', password='pw-123456', user_type='employer')
+        self.job = Job.objects.create(
+            title='家教', category='tutoring', description='辅导', salary=50, location='东区',
+            duration='每天2小时', contact='138', publisher=self.publisher)
+        self.client.force_login(self.publisher)
+
+    def replica_reads(self, path):
+        """请求 path，返回路由选了副本的模型；实际仍读测试库"""
+        reads = []
+        route = PrimaryReplicaRouter.db_for_read
+
+        def spy(router, model, **hints):
+            if route(router, model, **hints) != 'default':
+                reads.append(model)
+            return 'default'
+
+        with mock.patch.object(PrimaryReplicaRouter, 'db_for_read', autospec=True, side_effect=spy):
+            self.response = self.client.get(path)
+        return reads
+
+    def test_job_close_reads_primary_and_pins(self):
+        detail = reverse('jobs:job_detail', args=[self.job.pk])
+        self.assertIn(Job, self.replica_reads(detail))
+
+        self.assertNotIn(Job, self.replica_reads(reverse('jobs:job_close', args=[self.job.pk])))
+        self.assertIn(PIN_COOKIE, self.response.cookies)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'closed')
+        # 跳转回详情页时已固定到主库
+        self.assertEqual(self.replica_reads(detail), [])
+
+
+class ReplicationStandInTests(TransactionTestCase):
+    def test_copies_primary_into_replica_file(self):
+        User.objects.create_user('stu')
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'replica.sqlite3')
+            call_command('sync_replicas', to=[path], stdout=StringIO())
+            replica = sqlite3.connect(path)
+            try:
+                rows = replica.execute('SELECT username FROM accounts_user').fetchall()
+            finally:
+                replica.close()
+        self.assertEqual(rows, [('stu',)])
+
+
+class StaticFilesTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(cls.static_root.cleanup)
+        cls.enterClassContext(override_settings(STATIC_ROOT=cls.static_root.name))
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.hashed = staticfiles_storage.stored_name('css/style.css')
+        with staticfiles_storage.open('css/style.css') as f:
+            cls.original = f.read()
+
+    def test_collectstatic_fingerprints_and_precompresses(self):
+        self.assertRegex(self.hashed, r'^css/style\.[0-9a-f]{12}\.css$')
+        with staticfiles_storage.open(self.hashed + '.gz') as f:
+            self.assertEqual(gzip.decompress(f.read()), self.original)
+
+    def test_serves_precompressed_file_with_immutable_cache(self):
+        response = self.client.get('/static/' + self.hashed, HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        encoding = 'br' if staticfiles.brotli else 'gzip'
+        self.assertEqual(response['Content-Encoding'], encoding)
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(response['Content-Disposition'], f'inline; filename="{self.hashed.rsplit("/", 1)[-1]}"')
+        body = b''.join(response.streaming_content)
+        if encoding == 'gzip':
+            self.assertEqual(gzip.decompress(body), self.original)
+
+    def test_identity_when_compression_refused(self):
+        self.assertEqual(staticfiles.accepted_encodings('gzip;q=0, br;q=0.5, identity'), {'br', 'identity'})
+        response = self.client.get('/static/' + self.hashed, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(response.streaming_content), self.original)
+
+    def test_missing_manifest_is_an_error(self):
+        with tempfile.TemporaryDirectory() as empty:
+            storage = staticfiles.CompressedManifestStaticFilesStorage(location=empty)
+            with override_settings(STATICFILES_REQUIRE_MANIFEST=True):
+                with self.assertRaisesMessage(ValueError, 'collectstatic'):
+                    storage.stored_name('css/style.css')
+            with override_settings(STATICFILES_REQUIRE_MANIFEST=False):
+                self.assertEqual(storage.stored_name('css/style.css'), 'css/style.css')
+        with self.assertRaises(ValueError):
+            staticfiles_storage.stored_name('css/missing.css')
+
+    def test_unhashed_name_revalidates(self):
+        response = self.client.get('/static/css/style.css')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+        response = self.client.get('/static/css/style.css', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_pages_link_fingerprinted_assets(self):
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, '/static/' + self.hashed)
+        self.assertContains(response, '/static/' + staticfiles_storage.stored_name('js/app.js'))
+        self.assertNotContains(response, 'style=')
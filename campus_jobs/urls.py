@@ -14,13 +14,22 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
-from django.views.generic import TemplateView
+
+from jobs.views import home
+from .metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('accounts/', include('accounts.urls')),
     path('jobs/', include('jobs.urls')),
-    path('', TemplateView.as_view(template_name='home.html'), name='home'),
+    path('api/v1/', include('jobs.api_urls')),
+    path('metrics', metrics_view, name='metrics'),
+    path('', home, name='home'),
 ]
+
+# 开发环境下由 Django 返回上传的文件，生产环境由 Web 服务器处理（DEBUG 关闭时 static() 返回空列表）
+urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
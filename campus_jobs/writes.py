@@ -0,0 +1,47 @@
+"""
+写事务的串行化与重试。
+
+SQLite 同一时刻只允许一个写事务。同一进程内的写操作先取得同一把锁，
+再开启事务（sqlite_backend 以 BEGIN IMMEDIATE 开始事务），不同进程之间
+靠 busy_timeout 排队；仍然遇到 database is locked 时按指数退避重试整个事务。
+其它数据库上只有重试，不加进程锁。
+"""
+import functools
+import random
+import threading
+import time
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+_write_lock = threading.RLock()
+
+
+def is_lock_error(error):
+    message = str(error).lower()
+    return 'database is locked' in message or 'database table is locked' in message
+
+
+def write_transaction(func):
+    """在串行化的写事务中执行 func，遇到锁冲突时整体重试"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        connection = connections[DEFAULT_DB_ALIAS]
+        if connection.in_atomic_block:
+            # 已在外层事务中，出错只能由外层整体回滚
+            return func(*args, **kwargs)
+
+        retries = getattr(settings, 'WRITE_RETRIES', 5)
+        backoff = getattr(settings, 'WRITE_RETRY_BACKOFF', 0.05)
+        lock = _write_lock if connection.vendor == 'sqlite' else nullcontext()
+        for attempt in range(retries + 1):
+            try:
+                with lock, transaction.atomic():
+                    return func(*args, **kwargs)
+            except OperationalError as e:
+                if not is_lock_error(e) or attempt == retries:
+                    raise
+            # 在锁外等待，加随机抖动避免多个进程同时重试
+            time.sleep(backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+    return wrapper
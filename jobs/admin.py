@@ -5,7 +5,8 @@ from .models import Job, Application
 
 @admin.register(Job)
 class JobAdmin(admin.ModelAdmin):
-    list_display = ('title', 'category', 'salary', 'salary_type', 'publisher', 'status', 'created_at')
+    list_display = ('title', 'category', 'salary', 'salary_type', 'salary_hourly', 'publisher', 'status',
+                    'applied_count', 'accepted_count', 'created_at')
     list_filter = ('category', 'status', 'salary_type', 'created_at')
     search_fields = ('title', 'description', 'location')
     readonly_fields = ('created_at', 'updated_at')
@@ -0,0 +1,166 @@
+"""
+只读 JSON 接口（v1），供移动端使用。
+
+筛选和排序参数与兼职列表页完全相同；fields= 指定返回的字段（逗号分隔），
+数据库也只读取这些列；列表用 cursor= 游标翻页。响应按客户端的
+Accept-Encoding 进行 gzip 压缩。
+"""
+import functools
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_GET
+
+from campus_jobs.querybudget import query_budget
+from .filters import JobFilters
+from .models import Application, Job
+from .pagination import KeysetPaginator
+
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+
+# 字段名 -> 需要读取的列
+JOB_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'category': 'category',
+    'description': 'description',
+    'requirements': 'requirements',
+    'salary': 'salary',
+    'salary_type': 'salary_type',
+    'salary_hourly': 'salary_hourly',
+    'location': 'location',
+    'duration': 'duration',
+    'positions': 'positions',
+    'contact': 'contact',
+    'status': 'status',
+    'publisher': 'publisher__username',
+    'applied_count': 'applied_count',
+    'accepted_count': 'accepted_count',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+JOB_LIST_DEFAULT_FIELDS = (
+    'id', 'title', 'category', 'salary', 'salary_type', 'location', 'positions', 'applied_count', 'created_at',
+)
+
+APPLICATION_FIELDS = {
+    'id': 'id',
+    'job': 'job_id',
+    'job_title': 'job__title',
+    'message': 'message',
+    'status': 'status',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+    'completed_at': 'completed_at',
+}
+APPLICATION_DEFAULT_FIELDS = ('id', 'job', 'job_title', 'status', 'created_at')
+
+
+class InvalidParameter(Exception):
+    """请求参数不合法"""
+
+
+def json_response(data, status=200):
+    # 紧凑格式，中文不转义，每个汉字 3 字节而不是 6 字节
+    return JsonResponse(
+        data, status=status, encoder=DjangoJSONEncoder,
+        json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')},
+    )
+
+
+def api_view(view_func):
+    """只接受 GET，参数错误返回 400，响应 gzip 压缩"""
+    @functools.wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view_func(request, *args, **kwargs)
+        except InvalidParameter as e:
+            return json_response({'error': str(e)}, status=400)
+    return require_GET(gzip_page(wrapper))
+
+
+def parse_fields(request, available, default):
+    """解析 fields= 参数，未指定时返回默认字段"""
+    raw = request.GET.get('fields', '')
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    if not fields:
+        return list(default)
+    unknown = [name for name in fields if name not in available]
+    if unknown:
+        raise InvalidParameter(f'未知字段: {", ".join(unknown)}')
+    return list(dict.fromkeys(fields))
+
+
+def parse_page_size(request):
+    try:
+        page_size = int(request.GET.get('page_size', API_PAGE_SIZE))
+    except ValueError:
+        raise InvalidParameter('page_size 必须是整数')
+    return max(1, min(page_size, API_MAX_PAGE_SIZE))
+
+
+def load_only(queryset, available, fields, *extra):
+    """只读取所需字段对应的列；需要关联对象的字段一并 JOIN 取回"""
+    columns = [available[name] for name in fields] + list(extra)
+    related = {column.split('__')[0] for column in columns if '__' in column}
+    if related:
+        queryset = queryset.select_related(*related)
+    return queryset.only(*columns)
+
+
+def serialize(obj, available, fields):
+    data = {}
+    for name in fields:
+        value = obj
+        for attr in available[name].split('__'):
+            value = getattr(value, attr)
+        data[name] = value
+    return data
+
+
+def paginated_response(request, queryset, ordering, available, fields):
+    paginator = KeysetPaginator(queryset, ordering, page_size=parse_page_size(request))
+    page = paginator.get_page(request.GET.get('cursor'))
+    return json_response({
+        'results': [serialize(obj, available, fields) for obj in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+
+
+@api_view
+@query_budget(3)
+def job_list(request):
+    """兼职搜索"""
+    filters = JobFilters.from_query(request.GET)
+    fields = parse_fields(request, JOB_FIELDS, JOB_LIST_DEFAULT_FIELDS)
+    ordering = filters.ordering
+    # 游标需要排序字段的值，相关度是注解字段，不在列里
+    extra = () if ordering.lstrip('-') == 'search_rank' else (ordering.lstrip('-'),)
+    jobs = load_only(filters.apply(), JOB_FIELDS, fields, *extra)
+    return paginated_response(request, jobs, ordering, JOB_FIELDS, fields)
+
+
+@api_view
+@query_budget(3)
+def job_detail(request, pk):
+    """兼职详情"""
+    fields = parse_fields(request, JOB_FIELDS, JOB_FIELDS)
+    job = load_only(Job.objects.filter(pk=pk), JOB_FIELDS, fields).first()
+    if job is None:
+        return json_response({'error': '兼职不存在'}, status=404)
+    return json_response(serialize(job, JOB_FIELDS, fields))
+
+
+@api_view
+@query_budget(3)
+def my_applications(request):
+    """当前用户的申请"""
+    if not request.user.is_authenticated:
+        return json_response({'error': '请先登录'}, status=401)
+    fields = parse_fields(request, APPLICATION_FIELDS, APPLICATION_DEFAULT_FIELDS)
+    applications = load_only(
+        Application.objects.filter(applicant=request.user), APPLICATION_FIELDS, fields, 'created_at')
+    return paginated_response(request, applications, '-created_at', APPLICATION_FIELDS, fields)
@@ -0,0 +1,10 @@
+from django.urls import path
+from . import api
+
+app_name = 'api'
+
+urlpatterns = [
+    path('jobs/', api.job_list, name='job_list'),
+    path('jobs/<int:pk>/', api.job_detail, name='job_detail'),
+    path('my/applications/', api.my_applications, name='my_applications'),
+]
@@ -0,0 +1,17 @@
+from django.urls import path
+
+from . import async_views, urls
+
+app_name = urls.app_name
+
+# 只读页面换成异步视图，其余路由与 jobs.urls 相同
+ASYNC_VIEWS = {
+    'job_list': async_views.job_list,
+    'job_detail': async_views.job_detail,
+    'my_applications': async_views.my_applications,
+}
+
+urlpatterns = [
+    path(str(pattern.pattern), ASYNC_VIEWS.get(pattern.name, pattern.callback), name=pattern.name)
+    for pattern in urls.urlpatterns
+]
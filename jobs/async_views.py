@@ -0,0 +1,86 @@
+"""
+只读页面的异步版本，ASGI 部署时替换 views 中的同名视图（见 async_urls）。
+
+查询走异步 ORM，缓存走异步接口，会话和当前用户由 aget_user 异步读取；
+模板渲染本身不做 IO，仍在事件循环中同步执行。Django 4.2 的异步 ORM
+内部仍在线程中执行查询，实际收益以 benchmark_asgi 的测量为准。
+"""
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404
+from django.shortcuts import render
+
+from accounts.async_auth import aget_user
+from campus_jobs.querybudget import query_budget
+from .caching import aconditional_render, aget_job_page, alist_version, arender_job_cards, make_etag
+from .facets import aget_facets
+from .filters import JobFilters
+from .models import Application, ApplicationIntake, Job
+from .pagination import KeysetPaginator, abounded_count
+from .recommendations import aget_recommendation, arecommended_jobs
+from .views import JOB_LIST_COUNT_LIMIT, JOB_LIST_PAGE_SIZE, detail_etag, job_list_context
+
+
+@query_budget(5)
+async def job_list(request):
+    """兼职列表页面"""
+    filters = JobFilters.from_query(request.GET)
+    cursor = request.GET.get('cursor')
+    user = await aget_user(request)
+
+    async def render_page():
+        async def build_page():
+            jobs = filters.apply().select_related('publisher')
+            paginator = KeysetPaginator(jobs, filters.ordering, page_size=JOB_LIST_PAGE_SIZE)
+            page = await paginator.aget_page(cursor)
+            return (page,) + await abounded_count(jobs, JOB_LIST_COUNT_LIMIT)
+
+        page, total_count, count_capped = await aget_job_page(filters, cursor, build_page)
+        facets = await aget_facets(filters)
+        context = job_list_context(request, filters, page, total_count, count_capped, facets)
+        # 卡片先异步取缓存，模板中的 job_cards 标签直接使用
+        context['rendered_cards'] = await arender_job_cards(page, 'jobs/job_card.html')
+        return render(request, 'jobs/job_list.html', context)
+
+    etag = make_etag(await alist_version(), filters.key(), filters.ordering, cursor, user.pk)
+    return await aconditional_render(request, etag, None, render_page)
+
+
+@query_budget(6)
+async def job_detail(request, pk):
+    """兼职详情页面"""
+    job = await Job.objects.select_related('publisher').filter(pk=pk).afirst()
+    if job is None:
+        raise Http404('兼职不存在')
+
+    user = await aget_user(request)
+    user_application = None
+    if user.is_authenticated:
+        user_application = await Application.objects.filter(job=job, applicant_id=user.pk).afirst()
+    recommendation = await aget_recommendation(user)
+
+    etag = detail_etag(job, user, user_application, recommendation)
+
+    async def render_page():
+        context = {
+            'job': job,
+            'has_applied': user_application is not None,
+            'user_application': user_application,
+            'recommended_jobs': await arecommended_jobs(recommendation, exclude=job.pk),
+        }
+        return render(request, 'jobs/job_detail.html', context)
+
+    return await aconditional_render(request, etag, None, render_page)
+
+
+@query_budget(4)
+async def my_applications(request):
+    """我的申请"""
+    user = await aget_user(request)
+    if not user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+    applications = [
+        application async for application in
+        Application.objects.filter(applicant_id=user.pk).select_related('job')
+    ]
+    queued = [item async for item in ApplicationIntake.objects.filter(applicant_id=user.pk).select_related('job')]
+    return render(request, 'jobs/my_applications.html', {'applications': applications, 'queued': queued})
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import time
+
+from django.contrib import messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.utils.safestring import mark_safe
+
+from campus_jobs.routers import use_primary
+
+from .models import Job
+from .pagination import KeysetPage
+
+LIST_VERSION_KEY = 'jobs:list-version'
+LIST_CACHE_TIMEOUT = 300
+CARD_CACHE_TIMEOUT = 24 * 3600
+
+
+def list_version():
+    """
+    兼职列表的版本号。任何兼职发布、编辑、结束或删除都会使其递增，
+    旧版本的缓存条目不再被读取，随过期或淘汰自然清除。
+    """
+    version = cache.get(LIST_VERSION_KEY)
+    if version is None:
+        # 版本号被淘汰后用当前时间重新起算，避免与仍在缓存中的旧版本号重复
+        cache.add(LIST_VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(LIST_VERSION_KEY)
+    return version
+
+
+async def alist_version():
+    version = await cache.aget(LIST_VERSION_KEY)
+    if version is None:
+        await cache.aadd(LIST_VERSION_KEY, int(time.time() * 1000), None)
+        version = await cache.aget(LIST_VERSION_KEY)
+    return version
+
+
+def bump_list_version():
+    """使所有兼职列表缓存失效"""
+    try:
+        cache.incr(LIST_VERSION_KEY)
+    except ValueError:
+        cache.set(LIST_VERSION_KEY, int(time.time() * 1000), None)
+
+
+def _digest(parts):
+    return hashlib.md5(json.dumps(parts, ensure_ascii=False).encode()).hexdigest()
+
+
+def versioned_key(prefix, *parts):
+    return f'{prefix}:{list_version()}:{_digest(parts)}'
+
+
+async def aversioned_key(prefix, *parts):
+    return f'{prefix}:{await alist_version()}:{_digest(parts)}'
+
+
+def _page_from_entry(entry, jobs):
+    rows = [jobs[pk] for pk in entry['ids'] if pk in jobs]
+    return KeysetPage(rows, entry['next'], entry['previous']), entry['total'], entry['capped']
+
+
+def _entry(page, total_count, count_capped):
+    return {
+        'ids': [job.pk for job in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+        'total': total_count,
+        'capped': count_capped,
+    }
+
+
+def get_job_page(filters, cursor, build):
+    """
+    读取缓存的列表页。缓存中只保存结果 id、翻页游标和总数，
+    命中时按主键一次取回兼职；未命中时调用 build() 计算并写入缓存。
+    build() 返回 (KeysetPage, total_count, count_capped)。
+    """
+    key = versioned_key('jobs:list', filters.key(), filters.ordering, cursor or '')
+    entry = cache.get(key)
+    if entry is not None:
+        return _page_from_entry(entry, Job.objects.select_related('publisher').in_bulk(entry['ids']))
+
+    # 写入缓存的结果从主库读取，避免把副本上尚未同步的旧数据缓存下来
+    with use_primary():
+        page, total_count, count_capped = build()
+    cache.set(key, _entry(page, total_count, count_capped), LIST_CACHE_TIMEOUT)
+    return page, total_count, count_capped
+
+
+async def aget_job_page(filters, cursor, abuild):
+    """get_job_page 的异步版本，abuild 是返回同样结果的协程函数"""
+    key = await aversioned_key('jobs:list', filters.key(), filters.ordering, cursor or '')
+    entry = await cache.aget(key)
+    if entry is not None:
+        jobs = {job.pk: job async for job in Job.objects.select_related('publisher').filter(pk__in=entry['ids'])}
+        return _page_from_entry(entry, jobs)
+
+    with use_primary():
+        page, total_count, count_capped = await abuild()
+    await cache.aset(key, _entry(page, total_count, count_capped), LIST_CACHE_TIMEOUT)
+    return page, total_count, count_capped
+
+
+def card_key(template_name, job):
+    # 计数变化不会更新 updated_at，卡片上显示申请人数，因此也要计入
+    return 'jobs:card:{}:{}:{}:{}:{}'.format(
+        template_name, job.pk, job.updated_at.timestamp(), job.applied_count, job.accepted_count)
+
+
+def render_job_cards(jobs, template_name):
+    """
+    渲染兼职卡片。每张卡片的 HTML 按兼职及其更新时间缓存，整页只做一次
+    get_many，未命中的卡片渲染后一次 set_many 写回；兼职修改后键随之变化，
+    旧卡片自然过期。
+    """
+    keys = {card_key(template_name, job): job for job in jobs}
+    cached = cache.get_many(keys)
+    missing = _render_missing(keys, cached, template_name)
+    if missing:
+        cache.set_many(missing, CARD_CACHE_TIMEOUT)
+    return _join_cards(keys, cached, missing)
+
+
+async def arender_job_cards(jobs, template_name):
+    keys = {card_key(template_name, job): job for job in jobs}
+    cached = await cache.aget_many(keys)
+    missing = _render_missing(keys, cached, template_name)
+    if missing:
+        await cache.aset_many(missing, CARD_CACHE_TIMEOUT)
+    return _join_cards(keys, cached, missing)
+
+
+def _render_missing(keys, cached, template_name):
+    return {
+        key: render_to_string(template_name, {'job': job})
+        for key, job in keys.items() if key not in cached
+    }
+
+
+def _join_cards(keys, cached, missing):
+    cached.update(missing)
+    return mark_safe(''.join(cached[key] for key in keys))
+
+
+def make_etag(*parts):
+    return hashlib.md5(json.dumps(parts, ensure_ascii=False, default=str).encode()).hexdigest()
+
+
+def _add_validators(response, etag, last_modified):
+    response['ETag'] = quote_etag(etag)
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _not_modified(request, etag, last_modified):
+    """内容未变化时返回 304 响应，否则返回 None"""
+    # 有待显示的提示消息时必须完整渲染，否则消息会一直留到下一次
+    if request.method not in ('GET', 'HEAD') or messages.get_messages(request):
+        return None
+    headers = _add_validators(HttpResponse(), etag, last_modified)
+    response = get_conditional_response(
+        request, etag=headers['ETag'],
+        last_modified=int(last_modified.timestamp()) if last_modified is not None else None,
+        response=headers,
+    )
+    return None if response is headers else response
+
+
+def conditional_render(request, etag, last_modified, render_page):
+    """
+    条件 GET：请求带回的 ETag / Last-Modified 与当前一致时直接返回 304，
+    不再查询列表或渲染模板；否则调用 render_page() 生成完整响应。
+    页面因用户而异，只允许浏览器私有缓存，且每次使用前都要重新验证。
+    """
+    response = _not_modified(request, etag, last_modified)
+    if response is not None:
+        return response
+    return _add_validators(render_page(), etag, last_modified)
+
+
+async def aconditional_render(request, etag, last_modified, arender_page):
+    response = _not_modified(request, etag, last_modified)
+    if response is not None:
+        return response
+    return _add_validators(await arender_page(), etag, last_modified)
@@ -0,0 +1,186 @@
+"""
+发布时的近似重复检测。
+
+兼职保存时对标题和描述计算 MinHash 签名：文本按 search 模块的规则切分，
+汉字逐字、英文和数字按整词作为记号，取连续 SHINGLE_SIZE 个记号为一个
+片段。签名存于 JobFingerprint，按 LSH 分为 BANDS 段，每段的哈希写入
+JobBucket 的 (bucket, job) 索引。发布或编辑时只需一次索引查询取出与
+任一段相同的兼职，再比较签名估计 Jaccard 相似度，与兼职总数无关。
+"""
+import hashlib
+import random
+import struct
+import zlib
+from itertools import groupby
+
+from django.db.models import Count
+
+from .search import _runs
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+# 估计的 Jaccard 相似度达到该值视为重复
+DUPLICATE_THRESHOLD = 0.8
+# 聚类时每次读取的签名数
+SIGNATURE_CHUNK = 500
+
+# 小于 2**32 的最大素数；a * h + b 不超过 64 位
+_PRIME = 4294967291
+# 固定种子，不同进程、不同时间算出的签名可以比较
+_rng = random.Random(20241018)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_SIGNATURE_FORMAT = f'<{NUM_PERM}I'
+_BAND_FORMAT = f'<{ROWS + 1}I'
+
+
+def _tokens(text):
+    tokens = []
+    for is_cjk, run in _runs(text):
+        tokens.extend(run if is_cjk else [run])
+    return tokens
+
+
+def shingles(title, description):
+    """标题和描述的片段集合，两者之间不跨界"""
+    result = set()
+    for text in (title, description):
+        tokens = _tokens(text)
+        if 0 < len(tokens) < SHINGLE_SIZE:
+            result.add(' '.join(tokens))
+        result.update(' '.join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1))
+    return result
+
+
+def minhash(title, description):
+    """MinHash 签名（NUM_PERM 个整数）；没有可用文本时返回 None"""
+    hashes = [zlib.crc32(shingle.encode()) for shingle in shingles(title, description)]
+    if not hashes:
+        return None
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def pack(signature):
+    return struct.pack(_SIGNATURE_FORMAT, *signature)
+
+
+def unpack(data):
+    return struct.unpack(_SIGNATURE_FORMAT, bytes(data))
+
+
+def band_keys(signature):
+    """每段签名的哈希，带上段号，不同段的相同取值不会混在一起"""
+    keys = []
+    for band in range(BANDS):
+        data = struct.pack(_BAND_FORMAT, band, *signature[band * ROWS:(band + 1) * ROWS])
+        keys.append(int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little', signed=True))
+    return keys
+
+
+def similarity(signature, other):
+    """两个签名相同位置取值相等的比例，即 Jaccard 相似度的估计"""
+    return sum(a == b for a, b in zip(signature, other)) / NUM_PERM
+
+
+def build_fingerprint(job):
+    """返回 (JobFingerprint, [JobBucket])；没有可用文本时返回 (None, [])"""
+    from .models import JobBucket, JobFingerprint
+
+    signature = minhash(job.title, job.description)
+    if signature is None:
+        return None, []
+    fingerprint = JobFingerprint(job_id=job.pk, signature=pack(signature))
+    return fingerprint, [JobBucket(job_id=job.pk, bucket=key) for key in band_keys(signature)]
+
+
+def index_job_fingerprint(job):
+    """重建单个兼职的签名和分段索引"""
+    from .models import JobBucket, JobFingerprint
+
+    JobFingerprint.objects.filter(job=job).delete()
+    JobBucket.objects.filter(job=job).delete()
+    fingerprint, buckets = build_fingerprint(job)
+    if fingerprint is not None:
+        fingerprint.save(force_insert=True)
+        JobBucket.objects.bulk_create(buckets)
+
+
+def find_duplicates(title, description, publisher=None, exclude=None, threshold=DUPLICATE_THRESHOLD):
+    """
+    与给定标题、描述近似重复的招募中兼职，按相似度降序返回 [(兼职, 相似度)]。
+    publisher 限定发布者，exclude 为要排除的兼职 id（编辑时排除自身）。
+    """
+    from .models import JobBucket, JobFingerprint
+
+    signature = minhash(title, description)
+    if signature is None:
+        return []
+    candidates = JobFingerprint.objects.filter(
+        job__in=JobBucket.objects.filter(bucket__in=band_keys(signature)).values('job'),
+        job__status='open',
+    ).select_related('job').only('signature', 'job__id', 'job__title', 'job__created_at')
+    if publisher is not None:
+        candidates = candidates.filter(job__publisher=publisher)
+    if exclude is not None:
+        candidates = candidates.exclude(job_id=exclude)
+
+    matches = []
+    for fingerprint in candidates:
+        score = similarity(signature, unpack(fingerprint.signature))
+        if score >= threshold:
+            matches.append((fingerprint.job, score))
+    matches.sort(key=lambda match: (-match[1], -match[0].pk))
+    return matches
+
+
+def cluster_duplicates(jobs, threshold=DUPLICATE_THRESHOLD):
+    """
+    把 jobs（Job 查询集）中的近似重复聚成组，返回按组大小降序的 [[兼职 id, ...]]。
+    同一分段里的兼职只与该段第一个兼职比较签名，重复的兼职共有多个分段，
+    通过并查集仍能连到一起，一大批相同的兼职不会产生成对比较。
+    """
+    from .models import JobBucket, JobFingerprint
+
+    job_ids = jobs.values('pk')
+    parent = {}
+
+    def find(job_id):
+        root = job_id
+        while parent[root] != root:
+            root = parent[root]
+        while job_id != root:
+            parent[job_id], job_id = root, parent[job_id]
+        return root
+
+    # 至少两个兼职共有的分段，按段分组读出
+    shared = (
+        JobBucket.objects.filter(job__in=job_ids)
+        .values('bucket').order_by().annotate(n=Count('job')).filter(n__gt=1).values('bucket')
+    )
+    rows = (
+        JobBucket.objects.filter(bucket__in=shared, job__in=job_ids)
+        .order_by('bucket', 'job').values_list('bucket', 'job')
+    )
+    groups = [[job_id for _, job_id in group] for _, group in groupby(rows.iterator(), key=lambda row: row[0])]
+    signatures = {}
+    for group in groups:
+        missing = [job_id for job_id in group if job_id not in signatures]
+        for start in range(0, len(missing), SIGNATURE_CHUNK):
+            signatures.update(
+                (job_id, unpack(data))
+                for job_id, data in JobFingerprint.objects.filter(
+                    job_id__in=missing[start:start + SIGNATURE_CHUNK]).values_list('job_id', 'signature')
+            )
+        anchor = group[0]
+        parent.setdefault(anchor, anchor)
+        for job_id in group[1:]:
+            parent.setdefault(job_id, job_id)
+            if find(job_id) != find(anchor) and similarity(signatures[anchor], signatures[job_id]) >= threshold:
+                parent[find(job_id)] = find(anchor)
+
+    clusters = {}
+    for job_id in parent:
+        clusters.setdefault(find(job_id), []).append(job_id)
+    clusters = [members for members in clusters.values() if len(members) > 1]
+    return sorted((sorted(members) for members in clusters), key=lambda members: (-len(members), members[0]))
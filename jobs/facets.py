@@ -0,0 +1,87 @@
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from campus_jobs.routers import use_primary
+from .caching import aversioned_key, versioned_key
+from .models import Job
+
+# 折合时薪区间分面：(最低, 最高, 显示名)，None 表示不限
+SALARY_BUCKETS = (
+    (None, 20, '20元/时以下'),
+    (20, 30, '20-30元/时'),
+    (30, 50, '30-50元/时'),
+    (50, None, '50元/时以上'),
+)
+
+FACET_CACHE_TIMEOUT = 300
+
+
+def _bucket_q(low, high):
+    condition = Q()
+    if low is not None:
+        condition &= Q(salary_hourly__gte=low)
+    if high is not None:
+        condition &= Q(salary_hourly__lt=high)
+    return condition
+
+
+def _others(conditions, name):
+    """除 name 以外其它分面条件的合取"""
+    combined = Q()
+    for other, condition in conditions.items():
+        if other != name:
+            combined &= condition
+    return combined
+
+
+def _aggregates(filters):
+    conditions = filters.facet_conditions()
+    aggregates = {}
+    for value, _ in Job.CATEGORY_CHOICES:
+        aggregates[f'category:{value}'] = Count(
+            'pk', filter=Q(category=value) & _others(conditions, 'category'))
+    for value, _ in Job.SALARY_TYPE_CHOICES:
+        aggregates[f'salary_type:{value}'] = Count(
+            'pk', filter=Q(salary_type=value) & _others(conditions, 'salary_type'))
+    for index, (low, high, _) in enumerate(SALARY_BUCKETS):
+        aggregates[f'salary:{index}'] = Count(
+            'pk', filter=_bucket_q(low, high) & _others(conditions, 'salary'))
+    return aggregates
+
+
+def _facets(counts):
+    return {
+        'category': {value: counts[f'category:{value}'] for value, _ in Job.CATEGORY_CHOICES},
+        'salary_type': {value: counts[f'salary_type:{value}'] for value, _ in Job.SALARY_TYPE_CHOICES},
+        'salary': [counts[f'salary:{index}'] for index in range(len(SALARY_BUCKETS))],
+    }
+
+
+def compute_facets(filters):
+    """
+    一次聚合查询算出所有分面计数。
+    每个分面只套用其它分面的筛选条件，这样当前已选的分类下仍能看到
+    切换到其它分类会有多少结果。
+    """
+    return _facets(filters.base_queryset().aggregate(**_aggregates(filters)))
+
+
+def get_facets(filters):
+    """按规范化筛选条件缓存的分面计数，随兼职列表版本号失效"""
+    key = versioned_key('jobs:facets', filters.key())
+    facets = cache.get(key)
+    if facets is None:
+        with use_primary():
+            facets = compute_facets(filters)
+        cache.set(key, facets, FACET_CACHE_TIMEOUT)
+    return facets
+
+
+async def aget_facets(filters):
+    key = await aversioned_key('jobs:facets', filters.key())
+    facets = await cache.aget(key)
+    if facets is None:
+        with use_primary():
+            facets = _facets(await filters.base_queryset().aaggregate(**_aggregates(filters)))
+        await cache.aset(key, facets, FACET_CACHE_TIMEOUT)
+    return facets
@@ -0,0 +1,102 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+
+from .locations import filter_location
+from .models import Job
+from .search import apply_search
+
+# 排序参数 -> 排序字段
+ORDERINGS = {
+    'newest': '-created_at',
+    'oldest': 'created_at',
+    # 薪资按折合时薪排序，时薪、日薪和总计薪资放在一起比较
+    'salary_high': '-salary_hourly',
+    'salary_low': 'salary_hourly',
+    'positions_high': '-positions',
+    'positions_low': 'positions',
+}
+DEFAULT_ORDERING = '-created_at'
+
+
+def _parse_amount(value):
+    try:
+        amount = Decimal(value)
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+    return amount if amount.is_finite() else None
+
+
+class JobFilters:
+    """兼职列表的筛选条件，由 GET 参数解析并规范化"""
+
+    def __init__(self, search='', category='', salary_type='', min_salary=None, max_salary=None,
+                 location='', nearby=False, order_by=''):
+        self.search = search.strip()
+        self.category = category.strip()
+        self.salary_type = salary_type.strip()
+        self.min_salary = min_salary
+        self.max_salary = max_salary
+        self.location = location.strip()
+        self.nearby = nearby
+        self.order_by = order_by.strip()
+
+    @classmethod
+    def from_query(cls, params):
+        return cls(
+            search=params.get('search', ''),
+            category=params.get('category', ''),
+            salary_type=params.get('salary_type', ''),
+            min_salary=_parse_amount(params.get('min_salary')) if params.get('min_salary') else None,
+            max_salary=_parse_amount(params.get('max_salary')) if params.get('max_salary') else None,
+            location=params.get('location', ''),
+            nearby=params.get('nearby', '') in ('1', 'on', 'true'),
+            order_by=params.get('order_by', ''),
+        )
+
+    @property
+    def ordering(self):
+        """排序字段；有关键词且未指定排序时按相关度排序"""
+        if self.search and self.order_by in ('', 'relevance'):
+            return '-search_rank'
+        return ORDERINGS.get(self.order_by, DEFAULT_ORDERING)
+
+    def facet_conditions(self):
+        """可分面统计的筛选条件：分类、薪资类型、薪资区间（按折合时薪）"""
+        salary = Q()
+        if self.min_salary is not None:
+            salary &= Q(salary_hourly__gte=self.min_salary)
+        if self.max_salary is not None:
+            salary &= Q(salary_hourly__lte=self.max_salary)
+        return {
+            'category': Q(category=self.category) if self.category else Q(),
+            'salary_type': Q(salary_type=self.salary_type) if self.salary_type else Q(),
+            'salary': salary,
+        }
+
+    def base_queryset(self):
+        """只应用关键词和地点筛选的招募中兼职"""
+        jobs = Job.objects.filter(status='open')
+        if self.search:
+            jobs = apply_search(jobs, self.search)
+        if self.location:
+            jobs = filter_location(jobs, self.location, self.nearby)
+        return jobs
+
+    def apply(self):
+        """应用全部筛选条件"""
+        jobs = self.base_queryset()
+        for condition in self.facet_conditions().values():
+            if condition:
+                jobs = jobs.filter(condition)
+        return jobs
+
+    def key(self):
+        """规范化后的筛选条件，用于缓存键"""
+        return (
+            self.search, self.category, self.salary_type,
+            str(self.min_salary) if self.min_salary is not None else '',
+            str(self.max_salary) if self.max_salary is not None else '',
+            self.location,
+            self.nearby,
+        )
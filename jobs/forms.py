@@ -1,8 +1,34 @@
 from django import forms
+from django.conf import settings
+from .duplicates import find_duplicates
 from .models import Job, Application
 
 
 class JobForm(forms.ModelForm):
+    """
+    传入 publisher 时检查该发布者是否已有内容近似的招募中兼职（编辑时排除自身），
+    结果放在 duplicates 上。JOB_DUPLICATE_ACTION 为 'block' 时不允许发布新兼职，
+    为 'warn'（默认）时照常保存，由视图提示。编辑已有兼职时只提示，否则
+    已经与别的兼职重复的兼职将无法再修改。
+    """
+
+    def __init__(self, *args, publisher=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.publisher = publisher
+        self.duplicates = []
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if self.publisher is not None and cleaned_data.get('title') and cleaned_data.get('description'):
+            self.duplicates = [job for job, _ in find_duplicates(
+                cleaned_data['title'], cleaned_data['description'],
+                publisher=self.publisher, exclude=self.instance.pk,
+            )]
+            if (self.duplicates and self.instance.pk is None
+                    and getattr(settings, 'JOB_DUPLICATE_ACTION', 'warn') == 'block'):
+                raise forms.ValidationError('您已发布过内容几乎相同的兼职，请直接编辑原兼职，不要重复发布。')
+        return cleaned_data
+
     class Meta:
         model = Job
         fields = ['title', 'category', 'description', 'requirements', 'salary', 'salary_type',
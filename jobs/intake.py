@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import F
+
+from campus_jobs.writes import write_transaction
+from .models import Application, ApplicationIntake, Job
+
+# submit_application 的结果
+CREATED = 'created'
+DUPLICATE = 'duplicate'
+QUEUED = 'queued'
+CLOSED = 'closed'
+
+
+def _accepting(job_ids):
+    """
+    仍在招募且尚有名额的兼职。提交申请不占用名额，这里只拒绝已经招满的
+    兼职；名额在接受申请时才以条件更新预占（见 Job.accept_applications）。
+    """
+    return Job.objects.filter(
+        pk__in=job_ids, status='open',
+        accepted_count__lt=F('positions') - F('completed_count'),
+    )
+
+
+@write_transaction
+def apply_now(job, applicant, message):
+    """
+    直接写入申请。依赖 (job, applicant) 唯一约束而不是事先查询，
+    并发重复提交只会有一个成功；申请过（包括已撤回）的不能再次申请。
+    """
+    if not _accepting([job.pk]).exists():
+        return CLOSED
+    application = Application(job=job, applicant=applicant, message=message)
+    try:
+        application.submit()
+    except IntegrityError:
+        return DUPLICATE
+    return CREATED
+
+
+@write_transaction
+def enqueue(job, applicant, message):
+    """写入暂存队列；同一用户对同一兼职重复提交只保留一条，之前未能处理的条目被替换"""
+    ApplicationIntake.objects.filter(job=job, applicant=applicant).exclude(status='pending').delete()
+    ApplicationIntake.objects.bulk_create(
+        [ApplicationIntake(job=job, applicant=applicant, message=message)],
+        ignore_conflicts=True,
+    )
+    return QUEUED
+
+
+def submit_application(job, applicant, message):
+    """
+    提交申请。APPLICATION_INTAKE_MODE 为 'queue' 时一律进入暂存队列；
+    为 'direct' 时直接写入，遇到写锁由 write_transaction 退避重试。
+    暂存队列与申请表在同一个 SQLite 数据库中，写锁繁忙时写队列同样要等锁，
+    因此不作为写锁的退路；它的作用是把高峰期的写入合并成批，缩短持锁时间。
+    """
+    if getattr(settings, 'APPLICATION_INTAKE_MODE', 'direct') == 'queue':
+        return enqueue(job, applicant, message)
+    return apply_now(job, applicant, message)
+
+
+@write_transaction
+def drain_intake(batch_size=500):
+    """
+    把一批暂存申请转为正式申请，整批在一个事务中写入。
+    每条申请在各自的保存点中提交，唯一约束冲突只回滚这一条，其余照常写入；
+    转为申请的条目删除，未能转为申请的标上原因留给用户查看。
+    返回 (处理数, 新建数, 丢弃数)。
+    """
+    batch = list(ApplicationIntake.objects.filter(status='pending').select_related('job').order_by('pk')[:batch_size])
+    if not batch:
+        return 0, 0, 0
+
+    accepting = set(_accepting({item.job_id for item in batch}).values_list('pk', flat=True))
+    created, refused = [], {DUPLICATE: [], CLOSED: []}
+    for item in batch:
+        if item.job_id not in accepting or item.job.publisher_id == item.applicant_id:
+            refused[CLOSED].append(item.pk)
+            continue
+        application = Application(job_id=item.job_id, applicant_id=item.applicant_id, message=item.message)
+        try:
+            application.submit()
+        except IntegrityError:
+            refused[DUPLICATE].append(item.pk)
+        else:
+            created.append(item.pk)
+
+    ApplicationIntake.objects.filter(pk__in=created).delete()
+    for status, pks in refused.items():
+        ApplicationIntake.objects.filter(pk__in=pks).update(status=status)
+    return len(batch), len(created), len(batch) - len(created)
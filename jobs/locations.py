@@ -0,0 +1,181 @@
+"""
+工作地点的结构化索引。
+
+兼职保存时把自由填写的地点（如"东区 3 号宿舍楼"、"南门快递站"）按校园
+地名表解析为校区（校内 / 校外 / 线上）、片区和建筑，写入 JobLocation；
+地点筛选在 (value, job) 索引上精确查找，不再对地点字段做子串扫描。
+勾选"附近"时，片区扩展到相邻片区，只写了建筑的按建筑所在片区扩展。
+地名表以外的地点（如"中关村"）仍按子串匹配，先由全文索引缩小范围。
+"""
+import re
+import unicodedata
+from typing import NamedTuple
+
+from django.db.models import Exists, OuterRef
+
+CAMPUS_INSIDE = '校内'
+CAMPUS_OUTSIDE = '校外'
+CAMPUS_ONLINE = '线上'
+
+# 片区 -> 相邻片区
+DISTRICTS = {
+    '东区': ('北区', '南区', '中区'),
+    '西区': ('北区', '南区', '中区'),
+    '南区': ('东区', '西区', '中区'),
+    '北区': ('东区', '西区', '中区'),
+    '中区': ('东区', '西区', '南区', '北区'),
+}
+# 其它写法 -> 片区
+DISTRICT_ALIASES = {
+    '东校区': '东区', '西校区': '西区', '南校区': '南区', '北校区': '北区',
+    '东门': '东区', '西门': '西区', '南门': '南区', '北门': '北区',
+}
+# 校内建筑 -> 所在片区；各片区都有的（如食堂）为 None
+BUILDINGS = {
+    '图书馆': '东区',
+    '体育馆': '北区',
+    '主楼': '中区',
+    '计算机楼': '中区',
+    '学生活动中心': '中区',
+    '食堂': None,
+    '快递站': None,
+    '宿舍楼': None,
+    '教学楼': None,
+    '实验楼': None,
+}
+# 校外地点
+OFF_CAMPUS_PLACES = ('万达广场',)
+OFF_CAMPUS_WORDS = ('校外',)
+ONLINE_WORDS = ('线上', '远程', '在线', 'online')
+
+# 名称长的优先匹配，"学生活动中心"不会被拆开
+_NAMES = sorted(
+    [(name, 'district') for name in list(DISTRICTS) + list(DISTRICT_ALIASES)]
+    + [(name, 'building') for name in BUILDINGS]
+    + [(name, 'building') for name in OFF_CAMPUS_PLACES],
+    key=lambda item: -len(item[0]),
+)
+NUMBERED_BUILDING = re.compile(r'(\d+)号(' + '|'.join(name for name in BUILDINGS if name.endswith('楼')) + ')')
+
+PLACE_MAX_LENGTH = 200
+
+
+class ParsedLocation(NamedTuple):
+    campus: str
+    district: str
+    buildings: tuple
+    place: str
+
+    @property
+    def zone(self):
+        """所在片区：写明的片区，或按地名表由建筑推断"""
+        if self.district:
+            return self.district
+        for building in self.buildings:
+            if BUILDINGS.get(building):
+                return BUILDINGS[building]
+        return ''
+
+
+def normalize(text):
+    return re.sub(r'\s+', '', unicodedata.normalize('NFKC', text or '')).lower()[:PLACE_MAX_LENGTH]
+
+
+def parse_location(text):
+    """按地名表解析地点，未识别的部分忽略"""
+    place = normalize(text)
+    district, buildings = '', []
+    rest = place
+    for name, kind in _NAMES:
+        if name not in rest:
+            continue
+        rest = rest.replace(name, ' ')
+        if kind == 'district':
+            district = district or DISTRICT_ALIASES.get(name, name)
+        else:
+            buildings.append(name)
+    buildings.extend(f'{number}号{name}' for number, name in NUMBERED_BUILDING.findall(place))
+
+    if any(word in place for word in ONLINE_WORDS):
+        campus = CAMPUS_ONLINE
+    elif any(word in place for word in OFF_CAMPUS_WORDS) or any(name in buildings for name in OFF_CAMPUS_PLACES):
+        campus = CAMPUS_OUTSIDE
+    elif district or buildings:
+        campus = CAMPUS_INSIDE
+    else:
+        campus = ''
+    return ParsedLocation(campus, district, tuple(dict.fromkeys(buildings)), place)
+
+
+def location_tokens(text):
+    """兼职地点的索引条目 [(类型, 值)]；整个地点也作为一条，原样输入时能精确命中"""
+    parsed = parse_location(text)
+    tokens = []
+    if parsed.campus:
+        tokens.append(('campus', parsed.campus))
+    if parsed.zone:
+        tokens.append(('district', parsed.zone))
+    tokens.extend(('building', building) for building in parsed.buildings)
+    if parsed.place:
+        tokens.append(('place', parsed.place))
+    return list(dict.fromkeys(tokens))
+
+
+def query_groups(query, nearby=False):
+    """
+    地点筛选条件，返回值集合的列表：兼职需在每个集合中至少命中一个值。
+    只按查询里写明的部分筛选，"图书馆"不会因推断出东区而排除"西区图书馆"。
+    地名表中没有的地点返回 None，由调用方按子串匹配。
+    """
+    parsed = parse_location(query)
+    if not parsed.place:
+        return []
+    if not (parsed.district or parsed.buildings):
+        # 只写了校外、线上，或者是地名表以外的地点
+        return [{parsed.campus}] if parsed.campus else None
+    if nearby and parsed.zone:
+        return [{parsed.zone, *DISTRICTS.get(parsed.zone, ())}]
+    groups = [{parsed.district}] if parsed.district else []
+    groups.extend({building} for building in parsed.buildings)
+    return groups
+
+
+def filter_location(jobs, query, nearby=False):
+    """
+    按地点筛选兼职。片区、建筑这类条件命中的兼职很多，写成关联的 EXISTS：
+    列表仍沿排序索引读取，每行在 (value, job) 索引上查一次，读满一页即停，
+    不必先取出全部命中的兼职再排序。
+    地名表以外的地点与原先一样按子串匹配，全文索引（含地点字段）先取出
+    包含这些字的兼职，子串条件只作用于这些候选。
+    """
+    from .models import JobLocation
+    from .search import search_hits
+
+    groups = query_groups(query, nearby)
+    if groups is None:
+        hits = search_hits(query)
+        if hits is None:
+            return jobs.filter(location__icontains=query.strip())
+        return jobs.filter(pk__in=hits.values('job'), location__icontains=query.strip())
+    for values in groups:
+        jobs = jobs.filter(Exists(JobLocation.objects.filter(job=OuterRef('pk'), value__in=sorted(values))))
+    return jobs
+
+
+def build_locations(job):
+    from .models import JobLocation
+
+    return [JobLocation(job_id=job.pk, kind=kind, value=value) for kind, value in location_tokens(job.location)]
+
+
+def index_job_location(job):
+    """重建单个兼职的地点索引"""
+    from .models import JobLocation
+
+    JobLocation.objects.filter(job=job).delete()
+    JobLocation.objects.bulk_create(build_locations(job))
+
+
+def known_places():
+    """地名表中的地点，用于筛选框的输入提示"""
+    return list(DISTRICTS) + list(BUILDINGS) + list(OFF_CAMPUS_PLACES) + [CAMPUS_OUTSIDE, CAMPUS_ONLINE]
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from jobs.caching import bump_list_version
+from jobs.models import Job
+from jobs.salary import hourly_salary
+
+
+class Command(BaseCommand):
+    help = '按薪资、薪资类型和工作时长重新计算兼职的折合时薪'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='每个事务处理的兼职数')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_pk, total, changed = 0, 0, 0
+        while True:
+            batch = list(
+                Job.objects.filter(pk__gt=last_pk).order_by('pk')
+                .only('pk', 'salary', 'salary_type', 'duration', 'salary_hourly')[:batch_size]
+            )
+            if not batch:
+                break
+            stale = []
+            for job in batch:
+                value = hourly_salary(job.salary, job.salary_type, job.duration)
+                if job.salary_hourly != value:
+                    job.salary_hourly = value
+                    stale.append(job)
+            # 只改这一列，不经过 save()，updated_at 不变
+            with transaction.atomic():
+                Job.objects.bulk_update(stale, ['salary_hourly'])
+            last_pk = batch[-1].pk
+            total += len(batch)
+            changed += len(stale)
+        if changed:
+            bump_list_version()
+        self.stdout.write(self.style.SUCCESS(f'已检查 {total} 个兼职，更新 {changed} 个的折合时薪'))
@@ -0,0 +1,184 @@
+import asyncio
+import io
+import json
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from campus_jobs.benchmarking import git_revision, percentile
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = (
+        '在同一进程内分别以 WSGI（固定线程数）和 ASGI（异步视图）处理并发请求，'
+        '比较各并发数下的吞吐量和延迟，输出 JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', default='1,10,50,100,200', help='并发连接数，逗号分隔')
+        parser.add_argument('--requests', type=int, default=400, help='每个并发档位的请求总数')
+        parser.add_argument('--threads', type=int, default=8, help='WSGI worker 线程数（对应 gunicorn --threads）')
+        parser.add_argument('--query-latency', type=float, default=0.0,
+                            help='给每条查询额外加的延迟（毫秒），模拟远程数据库')
+        parser.add_argument('--slo', type=float, default=500.0, help='p95 延迟上限（毫秒），用于计算可承载的并发数')
+        parser.add_argument('--output', help='结果写入文件，默认输出到标准输出')
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(level) for level in options['concurrency'].split(',')]
+        except ValueError:
+            raise CommandError('--concurrency 应为逗号分隔的整数')
+        job = Job.objects.filter(status='open').order_by('-pk').first()
+        if job is None:
+            raise CommandError('数据库中没有招募中的兼职，请先运行 seed_jobs')
+        self.host = settings.ALLOWED_HOSTS[0].lstrip('.') if settings.ALLOWED_HOSTS else 'localhost'
+        urls = [reverse('jobs:job_list'), reverse('jobs:job_detail', args=[job.pk])]
+
+        delay = options['query_latency'] / 1000
+
+        def slow_query(execute, sql, params, many, context):
+            time.sleep(delay)
+            return execute(sql, params, many, context)
+
+        def add_delay(connection, **kwargs):
+            if slow_query not in connection.execute_wrappers:
+                connection.execute_wrappers.append(slow_query)
+
+        if delay:
+            connection_created.connect(add_delay)
+        try:
+            results = {
+                'wsgi': self.run_mode(self.wsgi_runner(options['threads']), urls, levels, options),
+                'asgi': self.run_mode(self.asgi_runner(), urls, levels, options),
+            }
+        finally:
+            connection_created.disconnect(add_delay)
+
+        report = {
+            'revision': git_revision(),
+            'wsgi_threads': options['threads'],
+            'query_latency_ms': options['query_latency'],
+            'slo_p95_ms': options['slo'],
+            'results': results,
+            # p95 不超过 SLO 的最高并发档位
+            'max_concurrency_within_slo': {
+                mode: max([r['concurrency'] for r in rows if r['p95_ms'] <= options['slo']], default=0)
+                for mode, rows in results.items()
+            },
+        }
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def run_mode(self, runner, urls, levels, options):
+        name, urlconf, request = runner
+        rows = []
+        with override_settings(ROOT_URLCONF=urlconf):
+            for concurrency in levels:
+                row = asyncio.run(self.run_level(request, urls, concurrency, options['requests']))
+                rows.append(dict(row, concurrency=concurrency))
+                self.stderr.write(
+                    f'{name} 并发 {concurrency}: {row["throughput"]} req/s, p95 {row["p95_ms"]} ms, '
+                    f'线程 {row["peak_threads"]}'
+                )
+        return rows
+
+    async def run_level(self, request, urls, concurrency, total):
+        """concurrency 个客户端各自连续发请求，直到总数达到 total"""
+        latencies, errors, counter = [], 0, iter(range(total))
+        peak_threads = threading.active_count()
+
+        async def client():
+            nonlocal errors, peak_threads
+            for i in counter:
+                start = time.perf_counter()
+                status = await request(urls[i % len(urls)])
+                latencies.append((time.perf_counter() - start) * 1000)
+                errors += status != 200
+                peak_threads = max(peak_threads, threading.active_count())
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        return {
+            'throughput': round(total / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'mean_ms': round(statistics.fmean(latencies), 2),
+            'errors': errors,
+            'peak_threads': peak_threads,
+        }
+
+    def wsgi_runner(self, threads):
+        """同步视图，请求排队等待固定数量的 worker 线程，和 gunicorn gthread 一样"""
+        application = get_wsgi_application()
+        pool = ThreadPoolExecutor(max_workers=threads)
+
+        def call(path):
+            environ = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+                'SERVER_NAME': self.host, 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_HOST': self.host, 'REMOTE_ADDR': '127.0.0.1',
+                'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(),
+                'wsgi.errors': sys.stderr, 'wsgi.multithread': True, 'wsgi.multiprocess': False,
+                'wsgi.run_once': False,
+            }
+            status = []
+            response = application(environ, lambda s, headers, exc_info=None: status.append(s))
+            try:
+                for _ in response:
+                    pass
+            finally:
+                response.close()
+            return int(status[0].split()[0])
+
+        async def request(path):
+            return await asyncio.get_running_loop().run_in_executor(pool, call, path)
+
+        return 'wsgi', 'campus_jobs.urls', request
+
+    def asgi_runner(self):
+        """异步视图，直接调用 ASGI 应用，请求在事件循环中并发处理"""
+        application = get_asgi_application()
+
+        async def request(path):
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+                'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'',
+                'root_path': '', 'headers': [(b'host', self.host.encode())],
+                'client': ('127.0.0.1', 0), 'server': (self.host, 80),
+            }
+            received = False
+            status = []
+
+            async def receive():
+                nonlocal received
+                if not received:
+                    received = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                # 客户端不会主动断开
+                await asyncio.Future()
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+
+            await application(scope, receive, send)
+            return status[0]
+
+        return 'asgi', 'campus_jobs.asgi_urls', request
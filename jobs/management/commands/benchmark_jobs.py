@@ -0,0 +1,137 @@
+import json
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from accounts.models import User
+from campus_jobs.benchmarking import git_revision, percentile
+from campus_jobs.dbtrace import collect_queries
+from jobs.filters import JobFilters
+from jobs.models import Application, Job
+from jobs.pagination import KeysetPaginator
+from jobs.views import JOB_LIST_PAGE_SIZE
+
+JOB_LIST_PARAMS = [
+    {},
+    {'order_by': 'oldest'},
+    {'order_by': 'salary_high'},
+    {'order_by': 'positions_low'},
+    {'category': 'tech'},
+    {'category': 'tutoring', 'order_by': 'salary_low'},
+    {'salary_type': 'daily', 'min_salary': '100'},
+    {'search': '家教'},
+    {'search': '图书馆', 'order_by': 'newest'},
+    {'location': '东区'},
+]
+
+
+class Command(BaseCommand):
+    help = '在当前数据库上压测兼职相关页面，输出各场景的延迟分位数和查询数（JSON）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='每个场景的请求次数')
+        parser.add_argument('--warmup', type=int, default=3, help='每个场景的预热请求次数')
+        parser.add_argument('--seed', type=int, default=42, help='挑选样本数据的随机种子')
+        parser.add_argument('--cold-cache', action='store_true', help='每次请求前清空缓存')
+        parser.add_argument('--output', help='结果写入文件，默认输出到标准输出')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        scenarios = self.build_scenarios(rng)
+        host = settings.ALLOWED_HOSTS[0].lstrip('.') if settings.ALLOWED_HOSTS else 'localhost'
+
+        results = {}
+        for name, user, urls in scenarios:
+            client = Client(HTTP_HOST=host)
+            if user is not None:
+                client.force_login(user)
+            results[name] = self.run(client, urls, options)
+            self.stderr.write(f'{name}: p50 {results[name]["p50_ms"]} ms, 查询 {results[name]["queries_max"]}')
+
+        report = {
+            'revision': git_revision(),
+            'database': connection.vendor,
+            'jobs': Job.objects.count(),
+            'applications': Application.objects.count(),
+            'iterations': options['iterations'],
+            'cold_cache': options['cold_cache'],
+            'scenarios': results,
+        }
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def build_scenarios(self, rng):
+        """每个场景是 (名称, 登录用户, 依次轮询的 URL 列表)"""
+        open_ids = list(Job.objects.filter(status='open').order_by('-pk').values_list('pk', flat=True)[:1000])
+        if not open_ids:
+            raise CommandError('数据库中没有招募中的兼职，请先运行 seed_jobs')
+
+        list_url = reverse('jobs:job_list')
+        scenarios = []
+        for params in JOB_LIST_PARAMS:
+            query = urlencode(params)
+            name = 'job_list' + ''.join(f' {key}={value}' for key, value in params.items())
+            scenarios.append((name, None, [f'{list_url}?{query}']))
+
+        # 第二页
+        paginator = KeysetPaginator(JobFilters().apply(), JobFilters().ordering, JOB_LIST_PAGE_SIZE)
+        page = paginator.get_page()
+        if page.has_next:
+            scenarios.append(('job_list (page 2)', None, [f'{list_url}?cursor={page.next_cursor}']))
+
+        detail_urls = [reverse('jobs:job_detail', args=[pk]) for pk in rng.sample(open_ids, min(50, len(open_ids)))]
+        scenarios.append(('job_detail', None, detail_urls))
+
+        busiest_job = Job.objects.order_by('-applied_count').first()
+        publisher = busiest_job.publisher
+        scenarios.append(('my_published', publisher, [reverse('jobs:my_published')]))
+        scenarios.append(('manage_applications', publisher,
+                          [reverse('jobs:manage_applications', args=[busiest_job.pk])]))
+
+        student = (
+            User.objects.filter(user_type='student')
+            .annotate(n=Count('applications')).order_by('-n').first()
+        )
+        if student is not None:
+            scenarios.append(('my_applications', student, [reverse('jobs:my_applications')]))
+        return scenarios
+
+    def run(self, client, urls, options):
+        for i in range(options['warmup']):
+            client.get(urls[i % len(urls)])
+
+        latencies, query_counts = [], []
+        for i in range(options['iterations']):
+            if options['cold_cache']:
+                cache.clear()
+            # 按读写分离配置时查询会落到副本库上，统计所有数据库别名的查询
+            queries = []
+            with collect_queries(lambda sql, duration: queries.append(sql)):
+                start = time.perf_counter()
+                response = client.get(urls[i % len(urls)])
+                latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f'{urls[i % len(urls)]} 返回 {response.status_code}')
+            query_counts.append(len(queries))
+
+        return {
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'mean_ms': round(statistics.fmean(latencies), 2),
+            'queries_p50': statistics.median(query_counts),
+            'queries_max': max(query_counts),
+        }
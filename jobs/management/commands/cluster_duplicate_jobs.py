@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from jobs.caching import bump_list_version
+from jobs.duplicates import DUPLICATE_THRESHOLD, build_fingerprint, cluster_duplicates
+from jobs.models import Job, JobBucket, JobFingerprint
+
+
+class Command(BaseCommand):
+    help = '把已有的近似重复兼职聚成组；可选地结束同一发布者重复发布的旧兼职'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threshold', type=float, default=DUPLICATE_THRESHOLD, help='视为重复的相似度')
+        parser.add_argument('--include-closed', action='store_true', help='已结束的兼职也参与聚类')
+        parser.add_argument('--rebuild', action='store_true', help='先重新计算所有兼职的签名')
+        parser.add_argument('--close', action='store_true',
+                            help='每组中同一发布者只保留最新的一个兼职，其余结束招募')
+        parser.add_argument('--batch-size', type=int, default=1000, help='重新计算签名时每个事务处理的兼职数')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            self.rebuild(options['batch_size'])
+
+        jobs = Job.objects.all() if options['include_closed'] else Job.objects.filter(status='open')
+        clusters = cluster_duplicates(jobs, options['threshold'])
+        for members in clusters:
+            self.stdout.write(f'  {len(members)} 个：' + ', '.join(f'#{pk}' for pk in members))
+
+        closed = 0
+        if options['close'] and clusters:
+            closed = self.close_older(clusters)
+        self.stdout.write(self.style.SUCCESS(
+            f'发现 {len(clusters)} 组重复兼职，涉及 {sum(len(members) for members in clusters)} 个兼职，'
+            f'结束招募 {closed} 个'
+        ))
+
+    def rebuild(self, batch_size):
+        last_pk = 0
+        while True:
+            batch = list(Job.objects.filter(pk__gt=last_pk).order_by('pk').only('pk', 'title', 'description')[:batch_size])
+            if not batch:
+                break
+            fingerprints, buckets = [], []
+            for job in batch:
+                fingerprint, job_buckets = build_fingerprint(job)
+                if fingerprint is not None:
+                    fingerprints.append(fingerprint)
+                    buckets.extend(job_buckets)
+            with transaction.atomic():
+                JobFingerprint.objects.filter(job__in=batch).delete()
+                JobBucket.objects.filter(job__in=batch).delete()
+                JobFingerprint.objects.bulk_create(fingerprints)
+                JobBucket.objects.bulk_create(buckets, batch_size=5000)
+            last_pk = batch[-1].pk
+
+    def close_older(self, clusters):
+        """每组中按发布者分开，保留最新发布的招募中兼职"""
+        stale = []
+        for members in clusters:
+            latest = {}
+            for pk, publisher_id in (
+                Job.objects.filter(pk__in=members, status='open')
+                .order_by('-created_at', '-pk').values_list('pk', 'publisher_id')
+            ):
+                if publisher_id in latest:
+                    stale.append(pk)
+                else:
+                    latest[publisher_id] = pk
+        # update() 不触发信号，列表缓存需要手动失效；卡片缓存按 updated_at 区分
+        closed = Job.objects.filter(pk__in=stale).update(status='closed', updated_at=timezone.now())
+        if closed:
+            bump_list_version()
+        return closed
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.intake import drain_intake
+
+
+class Command(BaseCommand):
+    help = '把暂存队列中的申请批量写入申请表'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='每个事务处理的申请数')
+        parser.add_argument('--loop', action='store_true', help='持续运行，作为后台 worker')
+        parser.add_argument('--interval', type=float, default=1.0, help='队列为空时的轮询间隔（秒）')
+
+    def handle(self, *args, **options):
+        total = created = dropped = 0
+        while True:
+            processed, batch_created, batch_dropped = drain_intake(options['batch_size'])
+            total += processed
+            created += batch_created
+            dropped += batch_dropped
+            if processed:
+                self.stdout.write(f'处理 {processed} 份，新建 {batch_created} 份，丢弃 {batch_dropped} 份')
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f'共处理 {total} 份申请，新建 {created} 份，丢弃 {dropped} 份'))
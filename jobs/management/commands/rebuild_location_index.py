@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from jobs.caching import bump_list_version
+from jobs.locations import build_locations
+from jobs.models import Job, JobLocation
+
+
+class Command(BaseCommand):
+    help = '按地名表重新解析兼职地点，重建地点索引'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='每个事务处理的兼职数')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_pk, total = 0, 0
+        while True:
+            batch = list(Job.objects.filter(pk__gt=last_pk).order_by('pk').only('pk', 'location')[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                JobLocation.objects.filter(job__in=batch).delete()
+                JobLocation.objects.bulk_create([location for job in batch for location in build_locations(job)])
+            last_pk = batch[-1].pk
+            total += len(batch)
+        bump_list_version()
+        self.stdout.write(self.style.SUCCESS(f'已重建 {total} 个兼职的地点索引'))
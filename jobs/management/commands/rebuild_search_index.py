@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from jobs.models import Job
+from jobs.search import index_job
+
+
+class Command(BaseCommand):
+    help = '重建兼职全文检索索引'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='每个事务处理的兼职数')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_pk, total = 0, 0
+        while True:
+            batch = list(Job.objects.filter(pk__gt=last_pk).order_by('pk')[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                for job in batch:
+                    index_job(job)
+            last_pk = batch[-1].pk
+            total += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'已重建 {total} 个兼职的检索索引'))
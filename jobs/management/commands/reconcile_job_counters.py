@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from jobs.models import Application, Job
+
+
+def actual_count(**filters):
+    """按申请表实际统计某个兼职的申请数"""
+    counts = (
+        Application.objects.filter(job=OuterRef('pk'), **filters)
+        .order_by().values('job').annotate(n=Count('pk')).values('n')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+# 计数字段 -> 统计条件
+COUNTER_FILTERS = {
+    'applied_count': {},
+    'accepted_count': {'status': 'accepted'},
+    'completed_count': {'status': 'completed'},
+    'withdrawn_count': {'status': 'withdrawn'},
+}
+
+
+class Command(BaseCommand):
+    help = '核对并修正兼职上的申请计数字段'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批核对的兼职数')
+        parser.add_argument('--dry-run', action='store_true', help='只报告偏差，不写入')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        annotations = {f'actual_{field}': actual_count(**filters) for field, filters in COUNTER_FILTERS.items()}
+        last_pk, fixed = 0, 0
+        while True:
+            pks = list(
+                Job.objects.filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+            last_pk = pks[-1]
+            with transaction.atomic():
+                rows = Job.objects.select_for_update().filter(pk__in=pks).annotate(**annotations)
+                for job in rows:
+                    changes = {
+                        field: getattr(job, f'actual_{field}')
+                        for field in COUNTER_FILTERS
+                        if getattr(job, field) != getattr(job, f'actual_{field}')
+                    }
+                    if not changes:
+                        continue
+                    fixed += 1
+                    detail = ', '.join(f'{field} {getattr(job, field)} -> {value}' for field, value in changes.items())
+                    self.stdout.write(f'#{job.pk} {job.title}: {detail}')
+                    if not dry_run:
+                        Job.objects.filter(pk=job.pk).update(**changes)
+        verb = '发现' if dry_run else '已修正'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {fixed} 个兼职的计数偏差'))
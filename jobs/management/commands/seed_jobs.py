@@ -0,0 +1,188 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import User
+from jobs.caching import bump_list_version
+from jobs.duplicates import build_fingerprint
+from jobs.locations import build_locations
+from jobs.models import Application, Job, JobBucket, JobFingerprint, JobLocation, JobSearchTerm
+from jobs.salary import hourly_salary
+from jobs.search import build_terms
+
+TITLES = {
+    'tutoring': ['初中数学家教', '高中英语辅导', '小学作业托管', '钢琴陪练', '雅思口语陪练'],
+    'service': ['食堂帮工', '快递站分拣', '超市理货员', '奶茶店店员', '图书馆整理助理'],
+    'promotion': ['校园地推', '社团招新宣传', '传单派发', '新品试用推广', '公众号运营助理'],
+    'event': ['运动会志愿者', '迎新活动助理', '讲座签到', '展会引导员', '晚会后台协助'],
+    'tech': ['Python 助教', '网站维护', '数据标注', '小程序前端开发', '机房值班'],
+    'other': ['问卷调查员', '摄影助理', '宠物代遛', '搬家帮手', '校园跑腿'],
+}
+DESCRIPTIONS = [
+    '工作内容简单，时间灵活，适合课余时间安排。',
+    '需要认真负责，能按时到岗，有相关经验者优先。',
+    '提供岗前培训，表现优秀者可长期合作。',
+    '工作地点在校内，交通方便，周末也可以安排。',
+    '需要良好的沟通能力，普通话标准。',
+    '结算及时，当天完成当天结算。',
+]
+REQUIREMENTS = ['', '在校大学生', '有耐心，细心', '会使用 Excel', '有家教经验优先', '身体健康，能吃苦']
+LOCATIONS = [
+    '东区图书馆', '西区食堂', '南门快递站', '北区体育馆', '主楼 A201', '计算机楼 302',
+    '学生活动中心', '校外 万达广场', '线上远程', '东区 3 号宿舍楼',
+]
+SALARY_RANGES = {'hourly': (15, 120), 'daily': (80, 400), 'total': (50, 3000)}
+# 申请状态分布
+STATUS_WEIGHTS = (('pending', 45), ('accepted', 15), ('rejected', 20), ('withdrawn', 10), ('completed', 10))
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """批量写入期间关闭 auto_now/auto_now_add，让造出来的数据带有分散的时间"""
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = '批量生成用于压测的用户、兼职和申请数据'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42, help='随机种子，相同参数生成相同数据')
+        parser.add_argument('--users', type=int, default=10_000, help='用户数')
+        parser.add_argument('--jobs', type=int, default=1_000_000, help='兼职数')
+        parser.add_argument('--applications', type=int, default=10_000_000, help='申请数（近似值）')
+        parser.add_argument('--batch-size', type=int, default=2000, help='每批写入的兼职数')
+        parser.add_argument('--skip-search-index', action='store_true', help='不生成检索索引和重复检测签名')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        prefix = f'seed{options["seed"]}_'
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f'已存在以 {prefix} 开头的用户，请换一个 --seed')
+
+        started = time.perf_counter()
+        students, employers = self.create_users(rng, prefix, options['users'])
+        if not employers or not students:
+            raise CommandError('用户数太少，至少需要一个学生和一个雇主')
+
+        total_jobs = options['jobs']
+        per_job = options['applications'] / total_jobs if total_jobs else 0
+        batch_size = options['batch_size']
+        now = timezone.now()
+        created_jobs = created_applications = 0
+        with explicit_timestamps(Job, Application):
+            while created_jobs < total_jobs:
+                count = min(batch_size, total_jobs - created_jobs)
+                jobs, applications = self.build_batch(rng, count, students, employers, per_job, now)
+                with transaction.atomic():
+                    Job.objects.bulk_create(jobs)
+                    for job, job_applications in applications:
+                        for application in job_applications:
+                            application.job_id = job.pk
+                    Application.objects.bulk_create(
+                        [a for _, job_applications in applications for a in job_applications],
+                        batch_size=5000,
+                    )
+                    JobLocation.objects.bulk_create(
+                        [location for job in jobs for location in build_locations(job)], batch_size=5000)
+                    if not options['skip_search_index']:
+                        JobSearchTerm.objects.bulk_create([
+                            JobSearchTerm(job_id=job.pk, term=term, weight=weight)
+                            for job in jobs for term, weight in build_terms(job).items()
+                        ], batch_size=5000)
+                        fingerprints = [build_fingerprint(job) for job in jobs]
+                        JobFingerprint.objects.bulk_create(
+                            [fingerprint for fingerprint, _ in fingerprints if fingerprint is not None])
+                        JobBucket.objects.bulk_create(
+                            [bucket for _, buckets in fingerprints for bucket in buckets], batch_size=5000)
+                created_jobs += count
+                created_applications += sum(len(a) for _, a in applications)
+                self.stdout.write(f'  兼职 {created_jobs}/{total_jobs}，申请 {created_applications}')
+        bump_list_version()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'已生成 {len(students) + len(employers)} 个用户、{created_jobs} 个兼职、'
+            f'{created_applications} 份申请，用时 {elapsed:.1f} 秒'
+        ))
+
+    def create_users(self, rng, prefix, total):
+        # 所有造出来的用户共用一个密码哈希，避免逐个计算 PBKDF2
+        password = make_password('benchmark-password')
+        users = []
+        for i in range(total):
+            user_type = 'employer' if rng.random() < 0.2 else 'student'
+            users.append(User(
+                username=f'{prefix}{i}', email=f'{prefix}{i}@example.com', password=password,
+                user_type=user_type, phone=f'1{rng.randint(3000000000, 9999999999)}',
+            ))
+        User.objects.bulk_create(users, batch_size=5000)
+        pks = User.objects.filter(username__startswith=prefix).values_list('pk', 'user_type')
+        students = [pk for pk, user_type in pks if user_type == 'student']
+        employers = [pk for pk, user_type in pks if user_type == 'employer']
+        return students, employers
+
+    def build_batch(self, rng, count, students, employers, per_job, now):
+        statuses = [status for status, _ in STATUS_WEIGHTS]
+        weights = [weight for _, weight in STATUS_WEIGHTS]
+        jobs, applications = [], []
+        for _ in range(count):
+            category = rng.choice(Job.CATEGORY_CHOICES)[0]
+            salary_type = rng.choice(Job.SALARY_TYPE_CHOICES)[0]
+            low, high = SALARY_RANGES[salary_type]
+            created_at = now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+            duration = f'每天{rng.randint(1, 8)}小时，共{rng.randint(1, 30)}天'
+            salary = Decimal(rng.randint(low, high))
+            job = Job(
+                title=rng.choice(TITLES[category]),
+                category=category,
+                description=''.join(rng.sample(DESCRIPTIONS, 3)),
+                requirements=rng.choice(REQUIREMENTS),
+                salary=salary,
+                salary_type=salary_type,
+                # bulk_create 不调用 save()，折合时薪需要自己算
+                salary_hourly=hourly_salary(salary, salary_type, duration),
+                location=rng.choice(LOCATIONS),
+                duration=duration,
+                positions=rng.randint(1, 20),
+                contact=f'1{rng.randint(3000000000, 9999999999)}',
+                publisher_id=rng.choice(employers),
+                status='open' if rng.random() < 0.7 else 'closed',
+                created_at=created_at,
+                updated_at=created_at,
+            )
+
+            # 申请数围绕均值波动，申请者在同一兼职内不重复
+            wanted = min(len(students), max(0, int(rng.expovariate(1 / per_job)))) if per_job else 0
+            job_applications = []
+            for applicant in rng.sample(students, wanted):
+                status = rng.choices(statuses, weights)[0]
+                applied_at = created_at + timedelta(seconds=rng.randint(60, 14 * 24 * 3600))
+                job_applications.append(Application(
+                    applicant_id=applicant, message='您好，我有相关经验，时间充裕。', status=status,
+                    created_at=applied_at, updated_at=applied_at,
+                    completed_at=applied_at + timedelta(days=3) if status == 'completed' else None,
+                ))
+                counter = Job.STATUS_COUNTERS.get(status)
+                if counter:
+                    setattr(job, counter, getattr(job, counter) + 1)
+            job.applied_count = len(job_applications)
+            jobs.append(job)
+            applications.append((job, job_applications))
+        return jobs, applications
@@ -0,0 +1,39 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = '用 SQLite 在线备份把主库复制到各只读副本，作为开发和测试环境中的复制替身'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--to', action='append', default=[], help='副本数据库文件路径，默认取 DATABASE_REPLICAS')
+        parser.add_argument('--loop', action='store_true', help='持续运行')
+        parser.add_argument('--interval', type=float, default=1.0, help='两次复制的间隔（秒）')
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError('只支持 SQLite 主库，其它数据库请使用数据库自带的复制')
+        targets = options['to'] or [
+            settings.DATABASES[alias]['NAME'] for alias in getattr(settings, 'DATABASE_REPLICAS', [])
+        ]
+        if not targets:
+            raise CommandError('没有配置只读副本')
+
+        while True:
+            primary.ensure_connection()
+            for path in targets:
+                target = sqlite3.connect(path)
+                try:
+                    # 在线备份得到的是主库某一时刻的一致快照
+                    primary.connection.backup(target)
+                finally:
+                    target.close()
+            self.stdout.write(f'已复制到 {len(targets)} 个副本')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
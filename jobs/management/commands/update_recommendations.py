@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.recommendations import np, update_recommendations
+
+
+class Command(BaseCommand):
+    help = '更新学生的推荐兼职：重新计算申请记录有变化的学生，并把新兼职合并进已有推荐'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='每批处理的学生数')
+        parser.add_argument('--full', action='store_true', help='重新计算所有有申请记录的学生')
+        parser.add_argument('--loop', action='store_true', help='持续运行，作为后台 worker')
+        parser.add_argument('--interval', type=float, default=30.0, help='没有变化时的轮询间隔（秒）')
+
+    def handle(self, *args, **options):
+        if np is None:
+            raise CommandError('计算推荐需要安装 NumPy')
+        full = options['full']
+        total_refreshed = total_merged = 0
+        while True:
+            refreshed, merged = update_recommendations(options['batch_size'], full=full)
+            full = False
+            total_refreshed += refreshed
+            total_merged += merged
+            if refreshed or merged:
+                self.stdout.write(f'重新计算 {refreshed} 个学生，合并新兼职到 {merged} 个推荐')
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(
+            f'共重新计算 {total_refreshed} 个学生，合并新兼职到 {total_merged} 个推荐'))
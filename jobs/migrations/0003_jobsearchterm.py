@@ -0,0 +1,76 @@
+# Generated by Django 4.2.17 on 2026-10-18 10:48
+
+import re
+import unicodedata
+from collections import Counter
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# 以下分词规则是本迁移编写时 jobs.search 的副本。迁移不引用现行代码，
+# 以后修改分词不会改变这里写入的内容；修改后用 rebuild_search_index 重建。
+FIELD_WEIGHTS = (
+    ('title', 5),
+    ('location', 3),
+    ('requirements', 1),
+    ('description', 1),
+)
+TERM_MAX_LENGTH = 32
+CJK_RUN = re.compile(r'[㐀-䶿一-鿿豈-﫿]+')
+WORD_RUN = re.compile(r'[0-9a-z]+')
+
+
+def tokenize(text):
+    terms = []
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    for match in re.finditer(f'{CJK_RUN.pattern}|{WORD_RUN.pattern}', text):
+        run = match.group()
+        if CJK_RUN.fullmatch(run):
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+            terms.append(run[-1])
+        else:
+            terms.append(run[:TERM_MAX_LENGTH])
+    return terms
+
+
+def build_terms(job):
+    weights = Counter()
+    for field, weight in FIELD_WEIGHTS:
+        for term in tokenize(getattr(job, field)):
+            weights[term] += weight
+    return weights
+
+
+def build_search_index(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    JobSearchTerm = apps.get_model('jobs', 'JobSearchTerm')
+    for job in Job.objects.iterator():
+        JobSearchTerm.objects.bulk_create([
+            JobSearchTerm(job=job, term=term, weight=weight)
+            for term, weight in build_terms(job).items()
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_application_completed_at_alter_application_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=32, verbose_name='词条')),
+                ('weight', models.PositiveIntegerField(default=1, verbose_name='权重')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='jobs.job', verbose_name='兼职任务')),
+            ],
+            options={
+                'verbose_name': '检索词条',
+                'verbose_name_plural': '检索词条',
+                'indexes': [models.Index(fields=['term', 'job'], name='jobs_search_term_job_idx')],
+            },
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
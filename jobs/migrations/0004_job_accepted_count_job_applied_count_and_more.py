@@ -0,0 +1,55 @@
+# Generated by Django 4.2.17 on 2026-10-18 10:49
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    Application = apps.get_model('jobs', 'Application')
+
+    def count_of(**filters):
+        counts = (
+            Application.objects.filter(job=OuterRef('pk'), **filters)
+            .order_by().values('job').annotate(n=Count('pk')).values('n')
+        )
+        return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+    Job.objects.update(
+        applied_count=count_of(),
+        accepted_count=count_of(status='accepted'),
+        completed_count=count_of(status='completed'),
+        withdrawn_count=count_of(status='withdrawn'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0003_jobsearchterm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='accepted_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='已接受人数'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='applied_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='申请人数'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='completed_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='已完成人数'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='withdrawn_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='已撤回人数'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
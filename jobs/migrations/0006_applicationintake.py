@@ -0,0 +1,31 @@
+# Generated by Django 4.2.17 on 2026-10-18 11:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('jobs', '0005_application_jobs_app_applicant_created_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationIntake',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message', models.TextField(verbose_name='申请留言')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='提交时间')),
+                ('applicant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='application_intakes', to=settings.AUTH_USER_MODEL, verbose_name='申请者')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='intakes', to='jobs.job', verbose_name='兼职任务')),
+            ],
+            options={
+                'verbose_name': '待处理申请',
+                'verbose_name_plural': '待处理申请',
+                'unique_together': {('job', 'applicant')},
+            },
+        ),
+    ]
@@ -0,0 +1,153 @@
+# Generated by Django 4.2.17 on 2026-10-18 11:36
+
+import re
+import unicodedata
+from typing import NamedTuple
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# 以下地点解析是本迁移编写时 jobs.locations 的副本。迁移不引用现行代码，
+# 以后修改地名表不会改变这里写入的内容；修改后用 rebuild_location_index 重建。
+
+CAMPUS_INSIDE = '校内'
+CAMPUS_OUTSIDE = '校外'
+CAMPUS_ONLINE = '线上'
+
+# 片区 -> 相邻片区
+DISTRICTS = {
+    '东区': ('北区', '南区', '中区'),
+    '西区': ('北区', '南区', '中区'),
+    '南区': ('东区', '西区', '中区'),
+    '北区': ('东区', '西区', '中区'),
+    '中区': ('东区', '西区', '南区', '北区'),
+}
+# 其它写法 -> 片区
+DISTRICT_ALIASES = {
+    '东校区': '东区', '西校区': '西区', '南校区': '南区', '北校区': '北区',
+    '东门': '东区', '西门': '西区', '南门': '南区', '北门': '北区',
+}
+# 校内建筑 -> 所在片区；各片区都有的（如食堂）为 None
+BUILDINGS = {
+    '图书馆': '东区',
+    '体育馆': '北区',
+    '主楼': '中区',
+    '计算机楼': '中区',
+    '学生活动中心': '中区',
+    '食堂': None,
+    '快递站': None,
+    '宿舍楼': None,
+    '教学楼': None,
+    '实验楼': None,
+}
+# 校外地点
+OFF_CAMPUS_PLACES = ('万达广场',)
+OFF_CAMPUS_WORDS = ('校外',)
+ONLINE_WORDS = ('线上', '远程', '在线', 'online')
+
+# 名称长的优先匹配，"学生活动中心"不会被拆开
+_NAMES = sorted(
+    [(name, 'district') for name in list(DISTRICTS) + list(DISTRICT_ALIASES)]
+    + [(name, 'building') for name in BUILDINGS]
+    + [(name, 'building') for name in OFF_CAMPUS_PLACES],
+    key=lambda item: -len(item[0]),
+)
+NUMBERED_BUILDING = re.compile(r'(\d+)号(' + '|'.join(name for name in BUILDINGS if name.endswith('楼')) + ')')
+
+PLACE_MAX_LENGTH = 200
+
+
+class ParsedLocation(NamedTuple):
+    campus: str
+    district: str
+    buildings: tuple
+    place: str
+
+    @property
+    def zone(self):
+        """所在片区：写明的片区，或按地名表由建筑推断"""
+        if self.district:
+            return self.district
+        for building in self.buildings:
+            if BUILDINGS.get(building):
+                return BUILDINGS[building]
+        return ''
+
+
+def normalize(text):
+    return re.sub(r'\s+', '', unicodedata.normalize('NFKC', text or '')).lower()[:PLACE_MAX_LENGTH]
+
+
+def parse_location(text):
+    """按地名表解析地点，未识别的部分忽略"""
+    place = normalize(text)
+    district, buildings = '', []
+    rest = place
+    for name, kind in _NAMES:
+        if name not in rest:
+            continue
+        rest = rest.replace(name, ' ')
+        if kind == 'district':
+            district = district or DISTRICT_ALIASES.get(name, name)
+        else:
+            buildings.append(name)
+    buildings.extend(f'{number}号{name}' for number, name in NUMBERED_BUILDING.findall(place))
+
+    if any(word in place for word in ONLINE_WORDS):
+        campus = CAMPUS_ONLINE
+    elif any(word in place for word in OFF_CAMPUS_WORDS) or any(name in buildings for name in OFF_CAMPUS_PLACES):
+        campus = CAMPUS_OUTSIDE
+    elif district or buildings:
+        campus = CAMPUS_INSIDE
+    else:
+        campus = ''
+    return ParsedLocation(campus, district, tuple(dict.fromkeys(buildings)), place)
+
+
+def location_tokens(text):
+    """兼职地点的索引条目 [(类型, 值)]；整个地点也作为一条，原样输入时能精确命中"""
+    parsed = parse_location(text)
+    tokens = []
+    if parsed.campus:
+        tokens.append(('campus', parsed.campus))
+    if parsed.zone:
+        tokens.append(('district', parsed.zone))
+    tokens.extend(('building', building) for building in parsed.buildings)
+    if parsed.place:
+        tokens.append(('place', parsed.place))
+    return list(dict.fromkeys(tokens))
+
+
+def build_location_index(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    JobLocation = apps.get_model('jobs', 'JobLocation')
+    for job in Job.objects.only('pk', 'location').iterator():
+        JobLocation.objects.bulk_create([
+            JobLocation(job=job, kind=kind, value=value)
+            for kind, value in location_tokens(job.location)
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0007_job_salary_hourly'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobLocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('campus', '校区'), ('district', '片区'), ('building', '建筑'), ('place', '完整地点')], max_length=10, verbose_name='类型')),
+                ('value', models.CharField(max_length=200, verbose_name='值')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='locations', to='jobs.job', verbose_name='兼职任务')),
+            ],
+            options={
+                'verbose_name': '地点索引',
+                'verbose_name_plural': '地点索引',
+                'indexes': [models.Index(fields=['value', 'job'], name='jobs_location_value_job_idx')],
+            },
+        ),
+        migrations.RunPython(build_location_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.17 on 2026-10-18 11:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_user_avatar_hash_user_avatar_pending_and_more'),
+        ('jobs', '0008_joblocation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Recommendation',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='recommendation', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='学生')),
+                ('profile', models.JSONField(default=dict, verbose_name='画像')),
+                ('categories', models.JSONField(default=dict, verbose_name='分类偏好')),
+                ('items', models.JSONField(default=list, verbose_name='推荐兼职')),
+                ('job_watermark', models.PositiveIntegerField(default=0, verbose_name='已处理兼职')),
+                ('applications_updated_at', models.DateTimeField(verbose_name='已处理申请')),
+                ('updated_at', models.DateTimeField(verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '推荐',
+                'verbose_name_plural': '推荐',
+            },
+        ),
+    ]
@@ -0,0 +1,129 @@
+# Generated by Django 4.2.17 on 2026-10-18 11:53
+
+import hashlib
+import random
+import re
+import struct
+import unicodedata
+import zlib
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# 以下签名算法是本迁移编写时 jobs.duplicates（及其使用的 jobs.search 切分规则）
+# 的副本。迁移不引用现行代码，以后修改算法不会改变这里写入的内容；
+# 修改后用 cluster_duplicate_jobs --rebuild 重建。
+CJK_RUN = re.compile(r'[㐀-䶿一-鿿豈-﫿]+')
+WORD_RUN = re.compile(r'[0-9a-z]+')
+
+
+def _normalize(text):
+    return unicodedata.normalize('NFKC', text or '').lower()
+
+
+def _runs(text):
+    """把文本切分为 (是否中文, 片段) 序列"""
+    text = _normalize(text)
+    for match in re.finditer(f'{CJK_RUN.pattern}|{WORD_RUN.pattern}', text):
+        run = match.group()
+        yield bool(CJK_RUN.fullmatch(run)), run
+
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+
+# 小于 2**32 的最大素数；a * h + b 不超过 64 位
+_PRIME = 4294967291
+# 固定种子，不同进程、不同时间算出的签名可以比较
+_rng = random.Random(20241018)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_SIGNATURE_FORMAT = f'<{NUM_PERM}I'
+_BAND_FORMAT = f'<{ROWS + 1}I'
+
+
+def _tokens(text):
+    tokens = []
+    for is_cjk, run in _runs(text):
+        tokens.extend(run if is_cjk else [run])
+    return tokens
+
+
+def shingles(title, description):
+    """标题和描述的片段集合，两者之间不跨界"""
+    result = set()
+    for text in (title, description):
+        tokens = _tokens(text)
+        if 0 < len(tokens) < SHINGLE_SIZE:
+            result.add(' '.join(tokens))
+        result.update(' '.join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1))
+    return result
+
+
+def minhash(title, description):
+    """MinHash 签名（NUM_PERM 个整数）；没有可用文本时返回 None"""
+    hashes = [zlib.crc32(shingle.encode()) for shingle in shingles(title, description)]
+    if not hashes:
+        return None
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def pack(signature):
+    return struct.pack(_SIGNATURE_FORMAT, *signature)
+
+
+def band_keys(signature):
+    """每段签名的哈希，带上段号，不同段的相同取值不会混在一起"""
+    keys = []
+    for band in range(BANDS):
+        data = struct.pack(_BAND_FORMAT, band, *signature[band * ROWS:(band + 1) * ROWS])
+        keys.append(int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little', signed=True))
+    return keys
+
+
+def build_fingerprints(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    JobFingerprint = apps.get_model('jobs', 'JobFingerprint')
+    JobBucket = apps.get_model('jobs', 'JobBucket')
+    for job in Job.objects.only('pk', 'title', 'description').iterator():
+        signature = minhash(job.title, job.description)
+        if signature is None:
+            continue
+        JobFingerprint.objects.create(job=job, signature=pack(signature))
+        JobBucket.objects.bulk_create([JobBucket(job=job, bucket=key) for key in band_keys(signature)])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0009_recommendation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobFingerprint',
+            fields=[
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='fingerprint', serialize=False, to='jobs.job', verbose_name='兼职任务')),
+                ('signature', models.BinaryField(verbose_name='签名')),
+            ],
+            options={
+                'verbose_name': '重复检测签名',
+                'verbose_name_plural': '重复检测签名',
+            },
+        ),
+        migrations.CreateModel(
+            name='JobBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.BigIntegerField(verbose_name='分段哈希')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='duplicate_buckets', to='jobs.job', verbose_name='兼职任务')),
+            ],
+            options={
+                'verbose_name': '重复检测分段',
+                'verbose_name_plural': '重复检测分段',
+                'indexes': [models.Index(fields=['bucket', 'job'], name='jobs_bucket_bucket_job_idx')],
+            },
+        ),
+        migrations.RunPython(build_fingerprints, migrations.RunPython.noop),
+    ]
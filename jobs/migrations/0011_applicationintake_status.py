@@ -0,0 +1,22 @@
+# Generated by Django 4.2.17 on 2026-10-18 12:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0010_job_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='applicationintake',
+            name='status',
+            field=models.CharField(choices=[('pending', '处理中'), ('duplicate', '您已经申请过此兼职'), ('closed', '该兼职已停止招募或名额已满')], default='pending', max_length=10, verbose_name='状态'),
+        ),
+        migrations.AddIndex(
+            model_name='applicationintake',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['id'], name='jobs_intake_pending_idx'),
+        ),
+    ]
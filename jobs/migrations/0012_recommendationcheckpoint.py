@@ -0,0 +1,28 @@
+# Generated by Django 4.2.17 on 2026-10-18 12:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0011_applicationintake_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecommendationCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('applications_checked_at', models.DateTimeField(verbose_name='已检查申请')),
+            ],
+            options={
+                'verbose_name': '推荐进度',
+                'verbose_name_plural': '推荐进度',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['updated_at'], name='jobs_app_updated_idx'),
+        ),
+    ]
@@ -1,8 +1,21 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.conf import settings
+from django.utils import timezone
+
+from campus_jobs.writes import write_transaction
+from .salary import hourly_salary
 
 # Create your models here.
 
+class NotEnoughPositions(Exception):
+    """剩余名额不足以接受这些申请"""
+
+    def __init__(self, remaining):
+        super().__init__(f'仅剩 {remaining} 个名额')
+        self.remaining = remaining
+
+
 class Job(models.Model):
     STATUS_CHOICES = (
         ('open', '招募中'),
@@ -18,6 +31,12 @@ class Job(models.Model):
         ('other', '其他'),
     )
 
+    SALARY_TYPE_CHOICES = (
+        ('hourly', '时薪'),
+        ('daily', '日薪'),
+        ('total', '总计'),
+    )
+
     title = models.CharField(max_length=200, verbose_name='职位标题')
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, verbose_name='职位类别')
     description = models.TextField(verbose_name='职位描述')
@@ -25,12 +44,15 @@ class Job(models.Model):
     salary = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='薪资')
     salary_type = models.CharField(
         max_length=10,
-        choices=(('hourly', '时薪'), ('daily', '日薪'), ('total', '总计')),
+        choices=SALARY_TYPE_CHOICES,
         default='hourly',
         verbose_name='薪资类型'
     )
     location = models.CharField(max_length=200, verbose_name='工作地点')
     duration = models.CharField(max_length=100, verbose_name='工作时长', help_text='例如：每天2小时，共5天')
+    # 按工作时长折算的时薪，保存时计算；不同薪资类型的兼职按它排序和筛选
+    salary_hourly = models.DecimalField(
+        max_digits=10, decimal_places=2, default=0, editable=False, verbose_name='折合时薪')
     positions = models.IntegerField(default=1, verbose_name='招聘人数')
     contact = models.CharField(max_length=100, verbose_name='联系方式')
 
@@ -45,21 +67,122 @@ class Job(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='发布时间')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
 
+    # 申请计数的冗余字段，随申请状态变化在同一事务中更新
+    applied_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='申请人数')
+    accepted_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='已接受人数')
+    completed_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='已完成人数')
+    withdrawn_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='已撤回人数')
+
+    # 申请状态 -> 对应的计数字段
+    STATUS_COUNTERS = {
+        'accepted': 'accepted_count',
+        'completed': 'completed_count',
+        'withdrawn': 'withdrawn_count',
+    }
+    COUNTER_FIELDS = ('applied_count',) + tuple(STATUS_COUNTERS.values())
+    # 折合时薪由这些字段计算
+    SALARY_SOURCE_FIELDS = ('salary', 'salary_type', 'duration')
+
     class Meta:
         verbose_name = '兼职任务'
         verbose_name_plural = '兼职任务'
         ordering = ['-created_at']
+        indexes = [
+            # 兼职列表只看招募中的兼职：按三种排序键各建一个部分索引，
+            # pk 作为游标分页的决胜字段放在末尾，正序倒序都能直接走索引
+            models.Index(fields=['created_at', 'id'], condition=models.Q(status='open'),
+                         name='jobs_open_created_idx'),
+            models.Index(fields=['salary_hourly', 'id'], condition=models.Q(status='open'),
+                         name='jobs_open_hourly_idx'),
+            models.Index(fields=['positions', 'id'], condition=models.Q(status='open'),
+                         name='jobs_open_positions_idx'),
+            # 按分类筛选后再排序
+            models.Index(fields=['category', 'created_at', 'id'], condition=models.Q(status='open'),
+                         name='jobs_open_cat_created_idx'),
+            models.Index(fields=['category', 'salary_hourly', 'id'], condition=models.Q(status='open'),
+                         name='jobs_open_cat_hourly_idx'),
+            models.Index(fields=['category', 'positions', 'id'], condition=models.Q(status='open'),
+                         name='jobs_open_cat_positions_idx'),
+            # 我发布的兼职
+            models.Index(fields=['publisher', 'created_at'], name='jobs_publisher_created_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    @write_transaction
+    def save(self, *args, **kwargs):
+        # 计数字段只通过 F() 表达式原子更新，普通保存不能用内存中的旧值覆盖它们
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        self.salary_hourly = hourly_salary(self.salary, self.salary_type, self.duration)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(self.SALARY_SOURCE_FIELDS) & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'salary_hourly'}
+        super().save(*args, **kwargs)
+
     def get_applied_count(self):
         """获取申请人数"""
-        return self.applications.count()
+        return self.applied_count
 
     def get_accepted_count(self):
         """获取已接受的申请人数"""
-        return self.applications.filter(status='accepted').count()
+        return self.accepted_count
+
+    @property
+    def remaining_positions(self):
+        """剩余名额，已完成的申请者同样占用名额"""
+        return max(0, self.positions - self.accepted_count - self.completed_count)
+
+    @write_transaction
+    def accept_applications(self, application_ids):
+        """
+        在名额范围内接受一批待审核申请，返回实际接受的数量。
+        先以条件更新在兼职行上预占名额，并发接受时不会超出招聘人数；
+        名额不足时一个也不接受，抛出 NotEnoughPositions。
+        """
+        with transaction.atomic():
+            ids = list(
+                self.applications.filter(pk__in=application_ids, status='pending')
+                .values_list('pk', flat=True)
+            )
+            if not ids:
+                return 0
+            reserved = Job.objects.filter(
+                pk=self.pk,
+                accepted_count__lte=F('positions') - F('completed_count') - len(ids),
+            ).update(accepted_count=F('accepted_count') + len(ids))
+            if not reserved:
+                self.refresh_from_db(fields=self.COUNTER_FIELDS)
+                raise NotEnoughPositions(self.remaining_positions)
+            accepted = Application.objects.filter(pk__in=ids, status='pending').update(
+                status='accepted', updated_at=timezone.now())
+            # 预占之后被并发撤回的申请，归还名额
+            if accepted < len(ids):
+                Job.objects.filter(pk=self.pk).update(accepted_count=F('accepted_count') - (len(ids) - accepted))
+        self.refresh_from_db(fields=self.COUNTER_FIELDS)
+        return accepted
+
+    @write_transaction
+    def reject_applications(self, application_ids=None):
+        """拒绝一批待审核申请，不传 application_ids 时拒绝全部待审核申请"""
+        pending = self.applications.filter(status='pending')
+        if application_ids is not None:
+            pending = pending.filter(pk__in=application_ids)
+        return pending.update(status='rejected', updated_at=timezone.now())
+
+    @classmethod
+    def counter_changes(cls, old_status, new_status):
+        """申请状态从 old_status 变为 new_status 时各计数字段的增量"""
+        changes = {}
+        if old_status in cls.STATUS_COUNTERS:
+            changes[cls.STATUS_COUNTERS[old_status]] = F(cls.STATUS_COUNTERS[old_status]) - 1
+        if new_status in cls.STATUS_COUNTERS:
+            changes[cls.STATUS_COUNTERS[new_status]] = F(cls.STATUS_COUNTERS[new_status]) + 1
+        return changes
 
 
 class Application(models.Model):
@@ -95,6 +218,210 @@ class Application(models.Model):
         verbose_name_plural = '申请记录'
         ordering = ['-created_at']
         unique_together = ['job', 'applicant']  # 防止重复申请
+        indexes = [
+            # 我的申请、管理申请都按申请时间倒序列出
+            models.Index(fields=['applicant', 'created_at'], name='jobs_app_applicant_created_idx'),
+            models.Index(fields=['job', 'created_at'], name='jobs_app_job_created_idx'),
+            # 推荐只重新计算上次检查之后申请有变化的学生
+            models.Index(fields=['updated_at'], name='jobs_app_updated_idx'),
+        ]
 
     def __str__(self):
         return f'{self.applicant.username} 申请 {self.job.title}'
+
+    @write_transaction
+    def submit(self):
+        """保存新申请，并在同一事务中累加兼职的申请计数"""
+        with transaction.atomic():
+            self.save()
+            changes = Job.counter_changes(None, self.status)
+            changes['applied_count'] = F('applied_count') + 1
+            Job.objects.filter(pk=self.job_id).update(**changes)
+
+    @write_transaction
+    def transition(self, status, **fields):
+        """
+        把申请从当前状态改为 status，并在同一事务中调整兼职计数。
+        以当前状态为条件更新，状态已被并发修改时不做任何改动并返回 False。
+        """
+        old_status = self.status
+        values = dict(fields, status=status, updated_at=timezone.now())
+        with transaction.atomic():
+            updated = Application.objects.filter(pk=self.pk, status=old_status).update(**values)
+            if not updated:
+                return False
+            changes = Job.counter_changes(old_status, status)
+            if changes:
+                Job.objects.filter(pk=self.job_id).update(**changes)
+        for name, value in values.items():
+            setattr(self, name, value)
+        return True
+
+
+class JobSearchTerm(models.Model):
+    """兼职全文检索的倒排索引条目，由 Job 保存时增量维护"""
+    job = models.ForeignKey(
+        Job,
+        on_delete=models.CASCADE,
+        related_name='search_terms',
+        verbose_name='兼职任务'
+    )
+    term = models.CharField(max_length=32, verbose_name='词条')
+    weight = models.PositiveIntegerField(default=1, verbose_name='权重')
+
+    class Meta:
+        verbose_name = '检索词条'
+        verbose_name_plural = '检索词条'
+        indexes = [
+            models.Index(fields=['term', 'job'], name='jobs_search_term_job_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.term} -> {self.job_id}'
+
+
+class JobLocation(models.Model):
+    """兼职地点解析出的校区、片区、建筑，由 Job 保存时维护，用于地点筛选"""
+    KIND_CHOICES = (
+        ('campus', '校区'),
+        ('district', '片区'),
+        ('building', '建筑'),
+        ('place', '完整地点'),
+    )
+
+    job = models.ForeignKey(
+        Job,
+        on_delete=models.CASCADE,
+        related_name='locations',
+        verbose_name='兼职任务'
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, verbose_name='类型')
+    value = models.CharField(max_length=200, verbose_name='值')
+
+    class Meta:
+        verbose_name = '地点索引'
+        verbose_name_plural = '地点索引'
+        indexes = [
+            models.Index(fields=['value', 'job'], name='jobs_location_value_job_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.value} -> {self.job_id}'
+
+
+class JobFingerprint(models.Model):
+    """兼职标题和描述的 MinHash 签名，由 Job 保存时维护，用于近似重复检测"""
+    job = models.OneToOneField(
+        Job,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='fingerprint',
+        verbose_name='兼职任务'
+    )
+    signature = models.BinaryField(verbose_name='签名')
+
+    class Meta:
+        verbose_name = '重复检测签名'
+        verbose_name_plural = '重复检测签名'
+
+    def __str__(self):
+        return f'{self.job_id}'
+
+
+class JobBucket(models.Model):
+    """MinHash 签名按 LSH 分段后每段的哈希，同一段哈希相同的兼职是重复候选"""
+    job = models.ForeignKey(
+        Job,
+        on_delete=models.CASCADE,
+        related_name='duplicate_buckets',
+        verbose_name='兼职任务'
+    )
+    bucket = models.BigIntegerField(verbose_name='分段哈希')
+
+    class Meta:
+        verbose_name = '重复检测分段'
+        verbose_name_plural = '重复检测分段'
+        indexes = [
+            models.Index(fields=['bucket', 'job'], name='jobs_bucket_bucket_job_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.bucket} -> {self.job_id}'
+
+
+class Recommendation(models.Model):
+    """为学生预先计算的推荐兼职，由 update_recommendations 维护"""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='recommendation',
+        verbose_name='学生'
+    )
+    # 词条 -> TF-IDF 权重（单位向量），分类 -> 申请占比
+    profile = models.JSONField(default=dict, verbose_name='画像')
+    categories = models.JSONField(default=dict, verbose_name='分类偏好')
+    # [[兼职 id, 得分], ...]，按得分降序
+    items = models.JSONField(default=list, verbose_name='推荐兼职')
+    # 已参与打分的最大兼职 id，更大的是之后发布的新兼职
+    job_watermark = models.PositiveIntegerField(default=0, verbose_name='已处理兼职')
+    # 计算画像时申请记录的最近更新时间，之后再有更新就需要重新计算
+    applications_updated_at = models.DateTimeField(verbose_name='已处理申请')
+    updated_at = models.DateTimeField(verbose_name='更新时间')
+
+    class Meta:
+        verbose_name = '推荐'
+        verbose_name_plural = '推荐'
+
+    def __str__(self):
+        return f'{self.user_id}: {len(self.items)} 个推荐'
+
+
+class RecommendationCheckpoint(models.Model):
+    """update_recommendations 已检查过的申请更新时间，只有一行"""
+    applications_checked_at = models.DateTimeField(verbose_name='已检查申请')
+
+    class Meta:
+        verbose_name = '推荐进度'
+        verbose_name_plural = '推荐进度'
+
+
+class ApplicationIntake(models.Model):
+    """
+    申请提交的暂存队列。高峰期提交先写入这里（按 job + applicant 去重），
+    由 drain_application_intake 批量转为正式申请，用户无需等待写锁。
+    未能转为申请的条目保留下来并记下原因，"我的申请"中提示用户。
+    """
+    STATUS_CHOICES = (
+        ('pending', '处理中'),
+        ('duplicate', '您已经申请过此兼职'),
+        ('closed', '该兼职已停止招募或名额已满'),
+    )
+
+    job = models.ForeignKey(
+        Job,
+        on_delete=models.CASCADE,
+        related_name='intakes',
+        verbose_name='兼职任务'
+    )
+    applicant = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='application_intakes',
+        verbose_name='申请者'
+    )
+    message = models.TextField(verbose_name='申请留言')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', verbose_name='状态')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='提交时间')
+
+    class Meta:
+        verbose_name = '待处理申请'
+        verbose_name_plural = '待处理申请'
+        unique_together = ['job', 'applicant']
+        indexes = [
+            # 只按提交顺序读取待处理的条目
+            models.Index(fields=['id'], condition=models.Q(status='pending'), name='jobs_intake_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.applicant_id} -> {self.job_id}'
@@ -0,0 +1,164 @@
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(Exception):
+    """游标无法解析"""
+
+
+class KeysetPage:
+    """一页结果，附带前后翻页游标"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class KeysetPaginator:
+    """
+    游标（keyset）分页。
+
+    按 (排序字段, pk) 排序，pk 作为并列时的决胜字段，因此同一排序值
+    的多条记录也能稳定翻页。每页只读取 page_size + 1 行，翻到多深都不
+    需要 OFFSET，耗时与表大小无关。
+    """
+
+    def __init__(self, queryset, ordering, page_size=20):
+        self.queryset = queryset
+        self.descending = ordering.startswith('-')
+        self.field = ordering.lstrip('-')
+        self.page_size = page_size
+
+    def _order(self, reverse=False):
+        descending = self.descending != reverse
+        prefix = '-' if descending else ''
+        return [prefix + self.field, prefix + 'pk']
+
+    def _after(self, value, pk, reverse=False):
+        """
+        位于 (value, pk) 之后的记录。
+        先写成排序字段上的闭区间，让数据库能直接在 (字段, pk) 索引上定位。
+        """
+        descending = self.descending != reverse
+        op = 'lt' if descending else 'gt'
+        return (
+            Q(**{f'{self.field}__{op}e': value}) &
+            (Q(**{f'{self.field}__{op}': value}) | Q(**{f'pk__{op}': pk}))
+        )
+
+    def encode_cursor(self, obj, direction):
+        value = getattr(obj, self.field)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = str(value)
+        payload = json.dumps([direction, value, obj.pk], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            direction, value, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (ValueError, TypeError):
+            raise InvalidCursor(cursor)
+        if direction not in ('n', 'p') or not isinstance(pk, int):
+            raise InvalidCursor(cursor)
+        try:
+            internal_type = self.queryset.model._meta.get_field(self.field).get_internal_type()
+        except FieldDoesNotExist:
+            # 注解字段（如相关度）只支持数值
+            internal_type = None
+        if internal_type == 'DateTimeField':
+            value = parse_datetime(value) if isinstance(value, str) else None
+        elif internal_type == 'DecimalField':
+            try:
+                value = Decimal(value)
+            except (ArithmeticError, TypeError, ValueError):
+                value = None
+        elif not isinstance(value, int):
+            value = None
+        if value is None:
+            raise InvalidCursor(cursor)
+        return direction, value, pk
+
+    def _query(self, cursor):
+        direction, value, pk = 'n', None, None
+        if cursor:
+            try:
+                direction, value, pk = self.decode_cursor(cursor)
+            except InvalidCursor:
+                direction, value, pk = 'n', None, None
+
+        backwards = direction == 'p'
+        qs = self.queryset.order_by(*self._order(reverse=backwards))
+        if pk is not None:
+            qs = qs.filter(self._after(value, pk, reverse=backwards))
+        return qs[:self.page_size + 1], backwards, pk is not None
+
+    def _page(self, rows, backwards, came_from_cursor):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if backwards:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            # 带游标翻页时，来的方向上一定还有数据
+            if has_more if not backwards else came_from_cursor:
+                next_cursor = self.encode_cursor(rows[-1], 'n')
+            if has_more if backwards else came_from_cursor:
+                previous_cursor = self.encode_cursor(rows[0], 'p')
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+    def get_page(self, cursor=None):
+        """取得游标所指的一页；游标为空或无效时返回第一页"""
+        qs, backwards, came_from_cursor = self._query(cursor)
+        return self._page(list(qs), backwards, came_from_cursor)
+
+    async def aget_page(self, cursor=None):
+        qs, backwards, came_from_cursor = self._query(cursor)
+        return self._page([obj async for obj in qs], backwards, came_from_cursor)
+
+
+def bounded_count(queryset, limit):
+    """
+    有上限的计数：最多数到 limit，超出时返回 (limit, True)。
+    在 LIMIT 子查询上做 COUNT，大表上也只扫描 limit + 1 行。
+    """
+    count = queryset.order_by().values('pk')[:limit + 1].count()
+    return _capped(count, limit)
+
+
+async def abounded_count(queryset, limit):
+    count = await queryset.order_by().values('pk')[:limit + 1].acount()
+    return _capped(count, limit)
+
+
+def _capped(count, limit):
+    if count > limit:
+        return limit, True
+    return count, False
@@ -0,0 +1,339 @@
+"""
+"为你推荐"：按学生的申请记录预先计算推荐兼职。
+
+兼职的词条向量直接取自检索索引 JobSearchTerm（标题、地点、要求、描述的
+二元组及字段权重），分类另算一项亲和度。学生画像是其申请过的兼职的
+TF-IDF 向量按申请状态加权求和，只保留权重最高的 PROFILE_TERMS 个词条。
+打分是候选兼职的稀疏矩阵（COO：兼职、词条、词频三个数组）与画像向量的
+乘积，用 NumPy 的 bincount 完成，不依赖 SciPy。
+
+update_recommendations 在后台维护 Recommendation：申请记录有变化的学生
+成批重新计算，同一批共用一个候选矩阵；新发布的兼职只和已有画像打分，
+合并进各自的列表。页面只按主键读取一行推荐，再取回其中仍在招募的兼职。
+有变化的学生从 RecommendationCheckpoint 记下的时间之后更新过的申请中
+找出（按 updated_at 索引），每次只涉及这段时间里有申请变化的学生。
+"""
+import math
+from datetime import timedelta
+
+from django.db.models import Count, F, Max, Min, Q
+from django.utils import timezone
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 只有后台计算推荐时需要，页面读取推荐不依赖它
+    np = None
+
+# 页面上显示的条数，以及每个学生保存的条数（兼职结束后从后面的补上）
+RECOMMENDATION_COUNT = 5
+STORED_COUNT = 30
+PROFILE_TERMS = 64
+# 申请状态 -> 对画像的贡献
+APPLICATION_WEIGHTS = {
+    'pending': 1.0,
+    'accepted': 1.5,
+    'completed': 2.0,
+    'rejected': 0.5,
+    'withdrawn': 0.2,
+}
+# 分类亲和度（学生申请中该分类的占比）在得分中的权重
+CATEGORY_WEIGHT = 0.3
+# 词频饱和参数，同一个词反复出现不会无限加分
+TF_SATURATION = 1.2
+# term__in 每次查询的词条数
+TERM_CHUNK = 500
+# 申请的 updated_at 在事务提交前取值，检查时往前多看一段，不漏掉提交较晚的写入
+CHECKPOINT_OVERLAP = timedelta(minutes=5)
+
+
+def _saturate(tf):
+    return tf * (TF_SATURATION + 1) / (tf + TF_SATURATION)
+
+
+def _chunks(items, size=TERM_CHUNK):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class Profile:
+    """学生画像：词条 -> TF-IDF 权重（单位向量）、分类 -> 申请占比"""
+
+    def __init__(self, terms, categories, applied=(), applications_updated_at=None):
+        self.terms = terms
+        self.categories = categories
+        self.applied = set(applied)
+        self.applications_updated_at = applications_updated_at
+
+
+class CandidateMatrix:
+    """候选兼职的稀疏矩阵，一次构建，可与多个画像相乘"""
+
+    def __init__(self, rows):
+        job_ids, categories, terms, tf = zip(*rows)
+        self.vocab, self.columns = np.unique(np.array(terms, dtype=object), return_inverse=True)
+        self.jobs, self.job_rows = np.unique(np.array(job_ids), return_inverse=True)
+        self.values = _saturate(np.array(tf, dtype=float))
+        self.term_index = {term: i for i, term in enumerate(self.vocab)}
+        category_of = dict(zip(job_ids, categories))
+        self.category_names = sorted(set(categories))
+        codes = {name: i for i, name in enumerate(self.category_names)}
+        self.category_codes = np.array([codes[category_of[job_id]] for job_id in self.jobs])
+
+    @classmethod
+    def load(cls, *querysets):
+        """querysets 为 JobSearchTerm 查询，没有任何行时返回 None"""
+        rows = []
+        for queryset in querysets:
+            rows.extend(queryset.values_list('job_id', 'job__category', 'term', 'weight'))
+        return cls(rows) if rows else None
+
+    def score(self, profile):
+        """每个候选兼职对该画像的得分，与 self.jobs 对齐"""
+        query = np.zeros(len(self.vocab))
+        for term, weight in profile.terms.items():
+            index = self.term_index.get(term)
+            if index is not None:
+                query[index] = weight
+        scores = np.bincount(self.job_rows, weights=self.values * query[self.columns], minlength=len(self.jobs))
+        affinity = np.array([profile.categories.get(name, 0.0) for name in self.category_names])
+        return scores + CATEGORY_WEIGHT * affinity[self.category_codes]
+
+
+def _top_items(jobs, scores, count=STORED_COUNT):
+    """得分最高的 count 个，[[兼职 id, 得分], ...] 按得分降序，同分时新兼职在前"""
+    keep = scores > 0
+    jobs, scores = jobs[keep], scores[keep]
+    if len(jobs) > count:
+        top = np.argpartition(-scores, count - 1)[:count]
+        jobs, scores = jobs[top], scores[top]
+    order = np.lexsort((-jobs, -scores))
+    return [[int(jobs[i]), round(float(scores[i]), 6)] for i in order]
+
+
+def _idf(vocab):
+    from .models import Job, JobSearchTerm
+
+    df = {}
+    for terms in _chunks(vocab):
+        df.update(
+            JobSearchTerm.objects.filter(term__in=terms)
+            .values('term').annotate(n=Count('job')).values_list('term', 'n')
+        )
+    document_count = Job.objects.count()
+    return np.array([math.log((document_count + 1) / (df.get(term, 0) + 1)) + 1 for term in vocab])
+
+
+def build_profile(user_id):
+    """由申请记录计算学生画像；没有申请记录时返回 None"""
+    from .models import Application, JobSearchTerm
+
+    applications = list(
+        Application.objects.filter(applicant_id=user_id)
+        .values_list('job_id', 'job__category', 'status', 'updated_at')
+    )
+    if not applications:
+        return None
+    job_weights = {job_id: APPLICATION_WEIGHTS.get(status, 1.0) for job_id, _, status, _ in applications}
+    categories = {}
+    for job_id, category, _, _ in applications:
+        categories[category] = categories.get(category, 0) + job_weights[job_id]
+    total = sum(categories.values()) or 1
+    categories = {category: weight / total for category, weight in categories.items()}
+    # 以申请记录自身的时间作为水位，不受服务器时钟影响
+    updated_at = max(row[3] for row in applications)
+
+    rows = list(JobSearchTerm.objects.filter(job_id__in=list(job_weights)).values_list('job_id', 'term', 'weight'))
+    if not rows:
+        return Profile({}, categories, job_weights, updated_at)
+    job_ids, terms, tf = zip(*rows)
+    vocab, columns = np.unique(np.array(terms, dtype=object), return_inverse=True)
+    jobs, job_rows = np.unique(np.array(job_ids), return_inverse=True)
+
+    # 每个兼职的 TF-IDF 向量先归一化，描述长的兼职不会主导画像
+    values = _saturate(np.array(tf, dtype=float)) * _idf(vocab)[columns]
+    norms = np.sqrt(np.bincount(job_rows, weights=values ** 2))
+    values = values / norms[job_rows] * np.array([job_weights[job_id] for job_id in jobs])[job_rows]
+    profile = np.bincount(columns, weights=values, minlength=len(vocab))
+
+    top = np.argsort(-profile)[:PROFILE_TERMS]
+    top = top[profile[top] > 0]
+    weights = profile[top] / np.linalg.norm(profile[top])
+    terms = {str(vocab[i]): round(float(w), 6) for i, w in zip(top, weights)}
+    return Profile(terms, categories, job_weights, updated_at)
+
+
+def refresh_users(user_ids):
+    """成批重新计算学生的画像和推荐，没有申请记录的学生删除其推荐"""
+    from .models import Job, JobSearchTerm, Recommendation
+
+    watermark = Job.objects.aggregate(last=Max('pk'))['last'] or 0
+    profiles = {user_id: build_profile(user_id) for user_id in user_ids}
+    Recommendation.objects.filter(pk__in=[user_id for user_id, profile in profiles.items() if profile is None]).delete()
+    profiles = {user_id: profile for user_id, profile in profiles.items() if profile is not None}
+
+    # 候选兼职：与任一画像有共同词条、仍在招募的兼职，整批只读取一次
+    terms = set()
+    for profile in profiles.values():
+        terms.update(profile.terms)
+    matrix = CandidateMatrix.load(*(
+        JobSearchTerm.objects.filter(term__in=chunk, job__status='open', job_id__lte=watermark)
+        for chunk in _chunks(sorted(terms))
+    ))
+
+    now = timezone.now()
+    for user_id, profile in profiles.items():
+        items = []
+        if matrix is not None:
+            scores = matrix.score(profile)
+            scores[np.isin(matrix.jobs, list(profile.applied))] = 0
+            items = _top_items(matrix.jobs, scores)
+        Recommendation.objects.update_or_create(pk=user_id, defaults={
+            'profile': profile.terms,
+            'categories': profile.categories,
+            'items': items,
+            'job_watermark': watermark,
+            'applications_updated_at': profile.applications_updated_at,
+            'updated_at': now,
+        })
+    return len(user_ids)
+
+
+def stale_users(limit, since=None):
+    """
+    申请记录在上次计算之后有变化（或从未计算过）的学生。
+    since 不为空时只看该时间之后有申请更新的学生，不必聚合全部申请。
+    """
+    from accounts.models import User
+    from .models import Application
+
+    users = User.objects.filter(user_type='student')
+    if since is not None:
+        users = users.filter(pk__in=Application.objects.filter(updated_at__gt=since).values('applicant'))
+    return list(
+        users.annotate(last_applied=Max('applications__updated_at'))
+        .filter(last_applied__isnull=False)
+        .filter(Q(recommendation__isnull=True) |
+                Q(last_applied__gt=F('recommendation__applications_updated_at')))
+        .order_by('pk').values_list('pk', flat=True)[:limit]
+    )
+
+
+def score_new_jobs(batch_size=500):
+    """新发布的兼职与已有画像打分，合并进推荐列表，返回更新的推荐数"""
+    from .models import Job, JobSearchTerm, Recommendation
+
+    low = Recommendation.objects.aggregate(low=Min('job_watermark'))['low']
+    high = Job.objects.aggregate(last=Max('pk'))['last']
+    if low is None or high is None or high <= low:
+        return 0
+    matrix = CandidateMatrix.load(JobSearchTerm.objects.filter(job_id__gt=low, job_id__lte=high, job__status='open'))
+
+    now = timezone.now()
+    updated, pending = 0, []
+    for recommendation in Recommendation.objects.filter(job_watermark__lt=high).iterator(chunk_size=batch_size):
+        if matrix is not None:
+            profile = Profile(recommendation.profile, recommendation.categories)
+            fresh = matrix.jobs > recommendation.job_watermark
+            scores = matrix.score(profile)[fresh]
+            if (scores > 0).any():
+                merged_jobs = np.concatenate([
+                    np.array([job_id for job_id, _ in recommendation.items], dtype=int), matrix.jobs[fresh]])
+                merged_scores = np.concatenate([
+                    np.array([score for _, score in recommendation.items], dtype=float), scores])
+                items = _top_items(merged_jobs, merged_scores)
+                if items != recommendation.items:
+                    recommendation.items = items
+                    recommendation.updated_at = now
+        recommendation.job_watermark = high
+        pending.append(recommendation)
+        if len(pending) >= batch_size:
+            Recommendation.objects.bulk_update(pending, ['items', 'job_watermark', 'updated_at'])
+            updated += len(pending)
+            pending = []
+    if pending:
+        Recommendation.objects.bulk_update(pending, ['items', 'job_watermark', 'updated_at'])
+        updated += len(pending)
+    return updated
+
+
+def update_recommendations(batch_size=500, full=False):
+    """
+    更新推荐，返回 (重新计算的学生数, 合并新兼职的推荐数)。
+    full 为真时重新计算所有有申请记录的学生。
+    """
+    from accounts.models import User
+    from .models import RecommendationCheckpoint
+
+    if np is None:
+        raise RuntimeError('计算推荐需要安装 NumPy')
+    started = timezone.now()
+    checkpoint = RecommendationCheckpoint.objects.filter(pk=1).first()
+    refreshed = 0
+    if full:
+        users = (
+            User.objects.filter(user_type='student', applications__isnull=False)
+            .distinct().order_by('pk').values_list('pk', flat=True)
+        )
+        for user_ids in _chunks(users.iterator(), batch_size):
+            refreshed += refresh_users(user_ids)
+        done = True
+    else:
+        # 还没有检查点时（首次运行）检查全部学生
+        since = checkpoint.applications_checked_at - CHECKPOINT_OVERLAP if checkpoint else None
+        user_ids = stale_users(batch_size, since)
+        refreshed = refresh_users(user_ids)
+        # 这一批没取完时检查点不前移，下次从同一时间继续
+        done = len(user_ids) < batch_size
+    if done:
+        RecommendationCheckpoint.objects.update_or_create(pk=1, defaults={'applications_checked_at': started})
+    return refreshed, score_new_jobs(batch_size)
+
+
+def _is_student(user):
+    return user.is_authenticated and user.user_type == 'student'
+
+
+def get_recommendation(user):
+    """当前学生的推荐（一次主键查询）；不是学生或还没有推荐时返回 None"""
+    from .models import Recommendation
+
+    if not _is_student(user):
+        return None
+    return Recommendation.objects.filter(pk=user.pk).only('items', 'updated_at').first()
+
+
+async def aget_recommendation(user):
+    from .models import Recommendation
+
+    if not _is_student(user):
+        return None
+    return await Recommendation.objects.filter(pk=user.pk).only('items', 'updated_at').afirst()
+
+
+def _recommended_queryset(recommendation, exclude):
+    from .models import Job
+
+    ids = [job_id for job_id, _ in recommendation.items if job_id != exclude]
+    return ids, Job.objects.filter(pk__in=ids, status='open').only(
+        'pk', 'title', 'category', 'salary', 'salary_type', 'location')
+
+
+def _in_order(ids, jobs, limit):
+    by_pk = {job.pk: job for job in jobs}
+    return [by_pk[job_id] for job_id in ids if job_id in by_pk][:limit]
+
+
+def recommended_jobs(recommendation, limit=RECOMMENDATION_COUNT, exclude=None):
+    """按推荐顺序取回仍在招募中的兼职，exclude 为要排除的兼职 id"""
+    if recommendation is None:
+        return []
+    ids, jobs = _recommended_queryset(recommendation, exclude)
+    return _in_order(ids, list(jobs), limit) if ids else []
+
+
+async def arecommended_jobs(recommendation, limit=RECOMMENDATION_COUNT, exclude=None):
+    if recommendation is None:
+        return []
+    ids, jobs = _recommended_queryset(recommendation, exclude)
+    return _in_order(ids, [job async for job in jobs], limit) if ids else []
@@ -0,0 +1,122 @@
+"""
+薪资折算为时薪。
+
+日薪、总计薪资与时薪不能直接比较，这里按"工作时长"的文字描述（例如
+"每天2小时，共5天"）折算成每小时的薪资，保存在 Job.salary_hourly 上，
+列表按它排序和筛选薪资区间。时长写得不完整时，每天按 8 小时、总天数
+按 1 天计。
+"""
+import re
+import unicodedata
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import NamedTuple, Optional
+
+# 时长缺省时的假设
+DEFAULT_HOURS_PER_DAY = Decimal('8')
+DEFAULT_DAYS = Decimal('1')
+# 折算时的最少工时，"共1分钟"这类写法不会折算出天价时薪
+MIN_HOURS = Decimal('1')
+# Job.salary_hourly（max_digits=10, decimal_places=2）能存下的最大值
+MAX_HOURLY = Decimal('99999999.99')
+DAYS_PER_WEEK = 7
+WEEKS_PER_MONTH = Decimal('4')
+
+CENT = Decimal('0.01')
+
+CHINESE_DIGITS = {'零': 0, '一': 1, '二': 2, '两': 2, '三': 3, '四': 4, '五': 5, '六': 6, '七': 7, '八': 8, '九': 9}
+
+NUMBER = r'(\d+(?:\.\d+)?|[零一二两三四五六七八九十]+半?|半)'
+HOUR_UNIT = r'(?:个)?(?:半)?(?:小时|钟头|h\b)'
+# "共/总计"开头的是总量，"每"开头的是每天（每次）的量
+TOTAL_PREFIX = r'(?:共|总共|总计|合计|累计|一共)\s*'
+
+TOTAL_HOURS = re.compile(TOTAL_PREFIX + NUMBER + r'\s*' + HOUR_UNIT)
+# 前面不能紧接数字，避免只匹配到多位数的末尾几位
+NOT_AFTER_NUMBER = r'(?<![\d.零一二两三四五六七八九十])'
+HOURS = re.compile(NOT_AFTER_NUMBER + NUMBER + r'\s*(' + HOUR_UNIT + r'|分钟)')
+HALF_DAY = re.compile(r'半天|半日')
+PER_WEEK = re.compile(r'每周\s*' + NUMBER + r'\s*(?:天|日|次)')
+DAYS = re.compile(NOT_AFTER_NUMBER + NUMBER + r'\s*(?:个)?(天|日|次|周|星期|月)')
+
+
+class Duration(NamedTuple):
+    """解析出的工作时长，无法确定的部分为 None"""
+    hours_per_day: Optional[Decimal]
+    days: Optional[Decimal]
+    total_hours: Optional[Decimal]
+
+
+def _number(text):
+    """阿拉伯数字或一百以内的中文数字，"两个半"这样的半数也能识别"""
+    half = Decimal('0.5') if text.endswith('半') else Decimal('0')
+    text = text.rstrip('半')
+    if not text:
+        return half
+    try:
+        return Decimal(text) + half
+    except InvalidOperation:
+        pass
+    tens, _, ones = text.rpartition('十')
+    if '十' in text:
+        value = CHINESE_DIGITS.get(tens, 1) * 10 + CHINESE_DIGITS.get(ones, 0) if tens or ones else 10
+    else:
+        value = CHINESE_DIGITS.get(text)
+    return None if value is None else Decimal(value) + half
+
+
+def parse_duration(text):
+    """解析"每天2小时，共5天"、"共20小时"、"每周3次，每次1.5小时，共4周"等描述"""
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    total_hours = hours_per_day = days = None
+
+    match = TOTAL_HOURS.search(text)
+    if match:
+        total_hours = _number(match.group(1))
+        text = TOTAL_HOURS.sub(' ', text)
+
+    match = HOURS.search(text)
+    if match:
+        hours = _number(match.group(1))
+        unit = match.group(2)
+        if hours is not None:
+            if unit == '分钟':
+                hours /= 60
+            elif '半' in unit:
+                hours += Decimal('0.5')
+            hours_per_day = hours
+    elif HALF_DAY.search(text):
+        hours_per_day = DEFAULT_HOURS_PER_DAY / 2
+
+    per_week = PER_WEEK.search(text)
+    per_week = _number(per_week.group(1)) if per_week else None
+    # "每周3次"是频率，"半天"是每天的时长，都不是总天数
+    for match in DAYS.finditer(HALF_DAY.sub(' ', PER_WEEK.sub(' ', text))):
+        count = _number(match.group(1))
+        if count is None:
+            continue
+        unit = match.group(2)
+        if unit in ('周', '星期'):
+            days = count * (per_week or DAYS_PER_WEEK)
+        elif unit == '月':
+            days = count * WEEKS_PER_MONTH * (per_week or DAYS_PER_WEEK)
+        else:
+            days = count
+        break
+
+    if total_hours is None and hours_per_day is not None and days is not None:
+        total_hours = hours_per_day * days
+    return Duration(hours_per_day, days, total_hours)
+
+
+def hourly_salary(salary, salary_type, duration):
+    """按薪资类型和工作时长折算时薪，保留两位小数"""
+    salary = Decimal(salary)
+    if salary_type == 'hourly':
+        return min(salary, MAX_HOURLY).quantize(CENT, ROUND_HALF_UP)
+    parsed = parse_duration(duration)
+    hours_per_day = parsed.hours_per_day or DEFAULT_HOURS_PER_DAY
+    if salary_type == 'daily':
+        hours = hours_per_day
+    else:
+        hours = parsed.total_hours or hours_per_day * (parsed.days or DEFAULT_DAYS)
+    return min(salary / max(hours, MIN_HOURS), MAX_HOURLY).quantize(CENT, ROUND_HALF_UP)
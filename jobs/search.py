@@ -0,0 +1,131 @@
+import re
+import unicodedata
+from collections import Counter
+
+from django.db.models import Case, IntegerField, Max, OuterRef, Q, Subquery, Sum, Value, When
+
+# 参与索引的字段及其权重，标题命中比描述命中更相关
+FIELD_WEIGHTS = (
+    ('title', 5),
+    ('location', 3),
+    ('requirements', 1),
+    ('description', 1),
+)
+
+TERM_MAX_LENGTH = 32
+
+# 一次搜索最多使用的词条数，防止超长输入拖慢查询
+QUERY_MAX_TERMS = 8
+
+# 前缀匹配时的上界字符
+PREFIX_END = '\U0010ffff'
+
+CJK_RUN = re.compile(r'[㐀-䶿一-鿿豈-﫿]+')
+WORD_RUN = re.compile(r'[0-9a-z]+')
+
+
+def _normalize(text):
+    return unicodedata.normalize('NFKC', text or '').lower()
+
+
+def _runs(text):
+    """把文本切分为 (是否中文, 片段) 序列"""
+    text = _normalize(text)
+    for match in re.finditer(f'{CJK_RUN.pattern}|{WORD_RUN.pattern}', text):
+        run = match.group()
+        yield bool(CJK_RUN.fullmatch(run)), run
+
+
+def tokenize(text):
+    """
+    文档分词：中文按二元组（bigram）切分，并额外保留每段的末字，
+    使单字查询总能通过前缀命中；英文和数字按整词切分。
+    """
+    terms = []
+    for is_cjk, run in _runs(text):
+        if is_cjk:
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+            terms.append(run[-1])
+        else:
+            terms.append(run[:TERM_MAX_LENGTH])
+    return terms
+
+
+def query_terms(query):
+    """
+    查询分词，返回 (词条, 是否前缀匹配) 列表。
+    单个汉字和英文单词按前缀匹配，以保留原先子串搜索的手感。
+    """
+    terms = []
+    for is_cjk, run in _runs(query):
+        if is_cjk and len(run) > 1:
+            terms.extend((run[i:i + 2], False) for i in range(len(run) - 1))
+        else:
+            terms.append((run[:TERM_MAX_LENGTH], True))
+    # 去重并保持顺序
+    return list(dict.fromkeys(terms))[:QUERY_MAX_TERMS]
+
+
+def build_terms(job):
+    """计算一个兼职的 {词条: 权重}"""
+    weights = Counter()
+    for field, weight in FIELD_WEIGHTS:
+        for term in tokenize(getattr(job, field)):
+            weights[term] += weight
+    return weights
+
+
+def index_job(job):
+    """重建单个兼职的索引条目"""
+    from .models import JobSearchTerm
+
+    JobSearchTerm.objects.filter(job=job).delete()
+    JobSearchTerm.objects.bulk_create([
+        JobSearchTerm(job=job, term=term, weight=weight)
+        for term, weight in build_terms(job).items()
+    ])
+
+
+def _term_q(term, prefix):
+    if prefix:
+        return Q(term__gte=term, term__lt=term + PREFIX_END)
+    return Q(term=term)
+
+
+def search_hits(query):
+    """
+    命中全部查询词条的兼职，按 job 分组并给出相关度 rank。
+    只读取查询词条对应的倒排记录，与兼职总数无关。
+    """
+    from .models import JobSearchTerm
+
+    terms = query_terms(query)
+    if not terms:
+        return None
+
+    conditions = [_term_q(term, prefix) for term, prefix in terms]
+    any_term = Q()
+    for condition in conditions:
+        any_term |= condition
+
+    # 每个查询词条是否在该兼职中出现过
+    matched = {
+        f'm{i}': Max(Case(When(condition, then=Value(1)), default=Value(0), output_field=IntegerField()))
+        for i, condition in enumerate(conditions)
+    }
+    hits = (
+        JobSearchTerm.objects.filter(any_term)
+        .values('job')
+        .annotate(rank=Sum('weight'), **matched)
+        .filter(**{name: 1 for name in matched})
+    )
+    return hits
+
+
+def apply_search(jobs, query):
+    """按关键词过滤兼职，并附加 search_rank 相关度注解"""
+    hits = search_hits(query)
+    if hits is None:
+        return jobs.none()
+    rank = Subquery(hits.filter(job=OuterRef('pk')).values('rank')[:1], output_field=IntegerField())
+    return jobs.filter(pk__in=hits.values('job')).annotate(search_rank=rank)
@@ -0,0 +1,52 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import bump_list_version
+from .duplicates import index_job_fingerprint
+from .locations import index_job_location
+from .models import Job
+from .search import FIELD_WEIGHTS, index_job
+
+INDEXED_FIELDS = {field for field, _ in FIELD_WEIGHTS}
+
+
+@receiver(post_save, sender=Job)
+def update_search_index(sender, instance, update_fields=None, raw=False, **kwargs):
+    """兼职保存后同步检索索引；删除时索引条目随外键级联删除"""
+    if raw:
+        return
+    if update_fields is not None and not INDEXED_FIELDS & set(update_fields):
+        return
+    index_job(instance)
+
+
+@receiver(post_save, sender=Job)
+def update_location_index(sender, instance, update_fields=None, raw=False, **kwargs):
+    """兼职保存后同步地点索引"""
+    if raw:
+        return
+    if update_fields is not None and 'location' not in update_fields:
+        return
+    index_job_location(instance)
+
+
+@receiver(post_save, sender=Job)
+def update_fingerprint(sender, instance, update_fields=None, raw=False, **kwargs):
+    """兼职保存后同步重复检测签名"""
+    if raw:
+        return
+    if update_fields is not None and not {'title', 'description'} & set(update_fields):
+        return
+    index_job_fingerprint(instance)
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def invalidate_job_lists(sender, instance, **kwargs):
+    """
+    兼职发布、编辑、结束或删除后，使列表和分面缓存失效。等事务提交后再
+    递增版本号：提交前并发读到的仍是旧数据，若此时已换成新版本号，旧数据
+    会缓存在新版本下，直到下一次变动才失效。
+    """
+    transaction.on_commit(bump_list_version)
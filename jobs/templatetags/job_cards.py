@@ -0,0 +1,15 @@
+from django import template
+
+from jobs.caching import render_job_cards
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def job_cards(context, jobs, template_name):
+    """渲染一组兼职卡片，单张卡片的 HTML 会被缓存"""
+    # 异步视图已预先取好卡片
+    rendered = context.get('rendered_cards')
+    if rendered is not None:
+        return rendered
+    return render_job_cards(jobs, template_name)
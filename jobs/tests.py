@@ -1,3 +1,1070 @@
-from django.test import TestCase
+from decimal import Decimal
 
-# Create your tests here.
+import gzip
+import json
+from io import StringIO
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from campus_jobs import metrics
+from . import async_views, intake
+from .models import (Application, ApplicationIntake, Job, JobBucket, JobFingerprint, JobLocation,
+                     NotEnoughPositions, Recommendation, RecommendationCheckpoint)
+from .caching import list_version, render_job_cards
+from .duplicates import find_duplicates, minhash, shingles, similarity
+from .facets import compute_facets, get_facets
+from .filters import JobFilters
+from .locations import location_tokens, query_groups
+from .pagination import KeysetPaginator, bounded_count
+from .recommendations import update_recommendations
+from .salary import hourly_salary, parse_duration
+from .search import apply_search, query_terms, tokenize
+
+
+def make_job(publisher, **kwargs):
+    fields = {
+        'title': '家教',
+        'category': 'tutoring',
+        'description': '辅导初中数学',
+        'salary': Decimal('50.00'),
+        'salary_type': 'hourly',
+        'location': '东区图书馆',
+        'duration': '每天2小时，共5天',
+        'positions': 1,
+        'contact': '13800000000',
+        'publisher': publisher,
+    }
+    fields.update(kwargs)
+    return Job.objects.create(**fields)
+
+
+class KeysetPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.publisher = User.objects.create_user('boss', password='pw-123456', user_type='employer')
+        # 薪资只有三种取值，大量并列值用来检验 pk 决胜
+        for i in range(25):
+            make_job(cls.publisher, title=f'job {i}', salary=Decimal(i % 3), positions=i % 4)
+
+    def walk(self, ordering, page_size=4):
+        paginator = KeysetPaginator(Job.objects.filter(status='open'), ordering, page_size)
+        seen, cursor, pages = [], None, []
+        while True:
+            page = paginator.get_page(cursor)
+            pages.append(page)
+            seen.extend(job.pk for job in page)
+            if not page.has_next:
+                return seen, pages
+            cursor = page.next_cursor
+
+    def test_every_order_visits_each_job_once(self):
+        for ordering in ('-created_at', 'created_at', '-salary', 'salary', '-positions', 'positions'):
+            seen, _ = self.walk(ordering)
+            self.assertEqual(len(seen), 25, ordering)
+            self.assertEqual(len(set(seen)), 25, ordering)
+            tiebreaker = '-pk' if ordering.startswith('-') else 'pk'
+            expected = list(Job.objects.order_by(ordering, tiebreaker).values_list('pk', flat=True))
+            self.assertEqual(seen, expected, ordering)
+
+    def test_previous_cursor_returns_same_page(self):
+        paginator = KeysetPaginator(Job.objects.all(), '-salary', 4)
+        first = paginator.get_page()
+        self.assertFalse(first.has_previous)
+        second = paginator.get_page(first.next_cursor)
+        back = paginator.get_page(second.previous_cursor)
+        self.assertEqual([j.pk for j in back], [j.pk for j in first])
+        self.assertFalse(back.has_previous)
+        self.assertTrue(back.has_next)
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        paginator = KeysetPaginator(Job.objects.all(), 'positions', 4)
+        first = paginator.get_page()
+        self.assertEqual([j.pk for j in paginator.get_page('not-a-cursor')], [j.pk for j in first])
+
+    def test_bounded_count(self):
+        self.assertEqual(bounded_count(Job.objects.all(), 10), (10, True))
+        self.assertEqual(bounded_count(Job.objects.all(), 100), (25, False))
+
+
+class JobListViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.publisher = User.objects.create_user('boss', password='pw-123456', user_type='employer')
+        for i in range(30):
+            make_job(cls.publisher, title=f'job {i}')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_first_page_is_bounded(self):
+        response = self.client.get(reverse('jobs:job_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['jobs']), 20)
+        self.assertEqual(response.context['total_count'], 30)
+        self.assertTrue(response.context['page'].has_next)
+
+    def test_next_page_keeps_filters(self):
+        response = self.client.get(reverse('jobs:job_list'), {'category': 'tutoring', 'order_by': 'oldest'})
+        self.assertContains(response, 'category=tutoring&amp;order_by=oldest&amp;cursor=')
+        cursor = response.context['page'].next_cursor
+        response = self.client.get(reverse('jobs:job_list'),
+                                   {'category': 'tutoring', 'order_by': 'oldest', 'cursor': cursor})
+        self.assertEqual(len(response.context['jobs']), 10)
+        self.assertFalse(response.context['page'].has_next)
+
+
+class SearchIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.publisher = User.objects.create_user('boss', password='pw-123456', user_type='employer')
+        cls.library = make_job(cls.publisher, title='图书馆整理助理', description='整理书架', location='东区图书馆')
+        cls.tutor = make_job(cls.publisher, title='数学家教', description='辅导初中数学，地点在图书馆附近',
+                             location='西区')
+        cls.python = make_job(cls.publisher, title='Python 助教', description='批改作业', location='计算机楼',
+                              requirements='熟悉 Django')
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, query):
+        return list(apply_search(Job.objects.all(), query).order_by('-search_rank', '-pk'))
+
+    def test_tokenize_uses_cjk_bigrams(self):
+        self.assertEqual(tokenize('图书馆 Python3'), ['图书', '书馆', '馆', 'python3'])
+        self.assertEqual(query_terms('图书馆'), [('图书', False), ('书馆', False)])
+
+    def test_results_are_ranked_by_relevance(self):
+        self.assertEqual(self.search('图书馆'), [self.library, self.tutor])
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.search('图书馆 数学'), [self.tutor])
+
+    def test_single_character_and_word_prefix(self):
+        self.assertEqual(self.search('馆'), [self.library, self.tutor])
+        self.assertEqual(self.search('djan'), [self.python])
+
+    def test_index_follows_edits(self):
+        self.python.title = '网球陪练'
+        self.python.save()
+        self.assertEqual(self.search('python'), [])
+        self.assertEqual(self.search('网球'), [self.python])
+
+    def test_job_list_search(self):
+        response = self.client.get(reverse('jobs:job_list'), {'search': '图书馆'})
+        self.assertEqual(response.context['order_by'], 'relevance')
+        self.assertEqual(list(response.context['jobs']), [self.library, self.tutor])
+
+
+class LocationIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.publisher = User.objects.create_user('boss', password='pw-123456', user_type='employer')
+        cls.library = make_job(cls.publisher, location='东区图书馆')
+        cls.west_library = make_job(cls.publisher, location='西区图书馆')
+        cls.dorm = make_job(cls.publisher, location='东区 3 号宿舍楼')
+        cls.main = make_job(cls.publisher, location='主楼 A201')
+        cls.gym = make_job(cls.publisher, location='北区体育馆')
+        cls.mall = make_job(cls.publisher, location='校外 万达广场')
+        cls.online = make_job(cls.publisher, location='线上远程')
+
+    def setUp(self):
+        cache.clear()
+
+    def filter(self, location, nearby=False):
+        return set(JobFilters(location=location, nearby=nearby).apply())
+
+    def test_location_tokens(self):
+        self.assertEqual(location_tokens('东区 3 号宿舍楼'), [
+            ('campus', '校内'), ('district', '东区'), ('building', '宿舍楼'), ('building', '3号宿舍楼'),
+            ('place', '东区3号宿舍楼'),
+        ])
+        # 片区由地名表按建筑推断
+        self.assertIn(('district', '中区'), location_tokens('主楼 A201'))
+        self.assertEqual(location_tokens('南门快递站')[:3],
+                         [('campus', '校内'), ('district', '南区'), ('building', '快递站')])
+        self.assertEqual(location_tokens('线上远程')[0], ('campus', '线上'))
+
+    def test_exact_lookups(self):
+        self.assertEqual(self.filter('东区'), {self.library, self.dorm})
+        self.assertEqual(self.filter('图书馆'), {self.library, self.west_library})
+        self.assertEqual(self.filter('东区图书馆'), {self.library})
+        self.assertEqual(self.filter('3号宿舍楼'), {self.dorm})
+        self.assertEqual(self.filter('中区'), {self.main})
+        self.assertEqual(self.filter('校外'), {self.mall})
+        self.assertEqual(self.filter('线上'), {self.online})
+        self.assertEqual(self.filter('主楼 A201'), {self.main})
+        self.assertEqual(self.filter('南区'), set())
+
+    def test_free_text_places_match_substrings(self):
+        mall = make_job(self.publisher, location='万达广场3楼')
+        zgc = make_job(self.publisher, title='展会引导员', location='海淀区中关村大街')
+        make_job(self.publisher, title='中关村科技公司实习', location='线上')
+        self.assertIsNone(query_groups('中关村'))
+        self.assertEqual(self.filter('万达'), {self.mall, mall})
+        self.assertEqual(self.filter('中关村'), {zgc})
+        self.assertEqual(self.filter('3楼'), {mall})
+        self.assertEqual(self.filter('五道口'), set())
+
+    def test_nearby_zones(self):
+        self.assertEqual(query_groups('东区', nearby=True), [{'东区', '北区', '南区', '中区'}])
+        self.assertEqual(self.filter('东区', nearby=True), {self.library, self.dorm, self.main, self.gym})
+        # 只写建筑时按建筑所在片区扩展
+        self.assertEqual(self.filter('体育馆', nearby=True), {self.library, self.west_library, self.dorm,
+                                                              self.main, self.gym})
+
+    def test_index_follows_edits(self):
+        self.gym.location = '南门快递站'
+        self.gym.save(update_fields=['location'])
+        self.assertEqual(self.filter('南区'), {self.gym})
+        self.assertEqual(self.filter('北区'), set())
+
+    def test_job_list_filter(self):
+        response = self.client.get(reverse('jobs:job_list'), {'location': '东区', 'nearby': '1'})
+        self.assertEqual(set(response.context['jobs']), {self.library, self.dorm, self.main, self.gym})
+        self.assertTrue(response.context['nearby'])
+
+    def test_rebuild_command(self):
+        JobLocation.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_location_index', '--batch-size', '3', stdout=out)
+        self.assertIn('已重建 7 个', out.getvalue())
+        self.assertEqual(self.filter('东区'), {self.library, self.dorm})
+
+
+DESCRIPTION = '负责初中数学一对一辅导，每周三次，需要耐心细致，有家教经验者优先，表现优秀可长期合作。'
+
+
+class DuplicateDetectionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.publisher = User.objects.create_user('boss', password='pw-123456', user_type='employer')
+        cls.other = User.objects.create_user('other', password='pw-123456', user_type='employer')
+        cls.job = make_job(cls.publisher, title='初中数学家教', description=DESCRIPTION)
+
+    def setUp(self):
+        cache.clear()
+
+    def form_data(self, **kwargs):
+        data = {
+            'title': '初中数学家教', 'category': 'tutoring', 'description': DESCRIPTION, 'requirements': '',
+            'salary': '60', 'salary_type': 'hourly', 'location': '东区图书馆', 'duration': '每天2小时，共5天',
+            'positions': '1', 'contact': '13800000000',
+        }
+        data.update(kwargs)
+        return data
+
+    def test_shingles_and_similarity(self):
+        self.assertIn('初 中 数', shingles('初中数学', ''))
+        self.assertIn('python 助 教', shingles('Python 助教', ''))
+        self.assertEqual(minhash('', ''), None)
+        near = minhash('初中数学家教', DESCRIPTION.replace('三次', '两次'))
+        self.assertGreaterEqual(similarity(minhash('初中数学家教', DESCRIPTION), near), 0.7)
+        self.assertLess(similarity(minhash('初中数学家教', DESCRIPTION), minhash('快递站分拣', '分拣包裹，搬运货物')), 0.2)
+
+    def test_index_follows_edits(self):
+        self.assertEqual(JobBucket.objects.filter(job=self.job).count(), 16)
+        self.assertEqual(find_duplicates('初中数学家教', DESCRIPTION), [(self.job, 1.0)])
+        self.job.description = '周末展会引导员，负责签到和引导观众入场。'
+        self.job.save(update_fields=['description'])
+        self.assertEqual(find_duplicates('初中数学家教', DESCRIPTION), [])
+        self.job.delete()
+        self.assertFalse(JobFingerprint.objects.exists())
+
+    def test_lookup_is_one_query(self):
+        with self.assertNumQueries(1):
+            duplicates = find_duplicates('初中数学家教', DESCRIPTION + '欢迎来聊', publisher=self.publisher)
+        self.assertEqual([job for job, _ in duplicates], [self.job])
+        self.assertEqual(find_duplicates('初中数学家教', DESCRIPTION, publisher=self.other), [])
+        self.assertEqual(find_duplicates('初中数学家教', DESCRIPTION, exclude=self.job.pk), [])
+
+    @override_settings(JOB_DUPLICATE_ACTION='block')
+    def test_create_blocks_own_duplicate(self):
+        self.client.force_login(self.publisher)
+        response = self.client.post(reverse('jobs:job_create'), self.form_data())
+        self.assertContains(response, '内容几乎相同')
+        self.assertContains(response, reverse('jobs:job_detail', args=[self.job.pk]))
+        self.assertEqual(Job.objects.count(), 1)
+
+        # 其他发布者、已结束的兼职不算
+        self.client.force_login(self.other)
+        self.client.post(reverse('jobs:job_create'), self.form_data())
+        self.job.status = 'closed'
+        self.job.save(update_fields=['status'])
+        self.client.force_login(self.publisher)
+        self.client.post(reverse('jobs:job_create'), self.form_data())
+        self.assertEqual(Job.objects.count(), 3)
+
+    def test_edit_excludes_itself(self):
+        self.client.force_login(self.publisher)
+        response = self.client.post(reverse('jobs:job_edit', args=[self.job.pk]), self.form_data(salary='70'))
+        self.assertRedirects(response, reverse('jobs:job_detail', args=[self.job.pk]))
+
+    @override_settings(JOB_DUPLICATE_ACTION='block')
+    def test_edit_is_not_blocked_by_existing_duplicates(self):
+        copy = make_job(self.publisher, title='初中数学家教', description=DESCRIPTION)
+        self.client.force_login(self.publisher)
+        response = self.client.post(reverse('jobs:job_edit', args=[copy.pk]), self.form_data(salary='70'), follow=True)
+        self.assertRedirects(response, reverse('jobs:job_detail', args=[copy.pk]))
+        self.assertContains(response, '请避免重复发布')
+        copy.refresh_from_db()
+        self.assertEqual(copy.salary, Decimal('70'))
+
+    def test_warn_mode(self):
+        self.client.force_login(self.publisher)
+        response = self.client.post(reverse('jobs:job_create'), self.form_data(), follow=True)
+        self.assertEqual(Job.objects.count(), 2)
+        self.assertContains(response, '请避免重复发布')
+
+    def test_cluster_command(self):
+        copies = [make_job(self.publisher, title='初中数学家教', description=DESCRIPTION + suffix)
+                  for suffix in ('', '欢迎来聊')]
+        make_job(self.other, title='初中数学家教', description=DESCRIPTION)
+        make_job(self.publisher, title='快递站分拣', description='分拣包裹，搬运货物，每天下午两小时。')
+        JobFingerprint.objects.all().delete()
+        JobBucket.objects.all().delete()
+
+        out = StringIO()
+        call_command('cluster_duplicate_jobs', '--rebuild', '--close', stdout=out)
+        self.assertIn('发现 1 组重复兼职，涉及 4 个兼职，结束招募 2 个', out.getvalue())
+        # 同一发布者只保留最新的一个，其他发布者的不受影响
+        self.assertEqual(set(Job.objects.filter(publisher=self.publisher, status='open')),
+                         {copies[1], Job.objects.get(title='快递站分拣')})
+        self.assertTrue(Job.objects.filter(publisher=self.other, status='open').exists())
+
+
+class RecommendationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.publisher = User.objects.create_user('boss', password='pw-123456', user_type='employer')
+        cls.student = User.objects.create_user('stu', password='pw-123456')
+        cls.applied = make_job(cls.publisher, title='初中数学家教', description='辅导初中数学作业')
+        cls.math = make_job(cls.publisher, title='高中数学家教', description='辅导高中数学，讲解习题')
+        cls.english = make_job(cls.publisher, title='英语家教', description='辅导英语口语')
+        cls.tech = make_job(cls.publisher, title='Python 助教', description='批改编程作业', category='tech')
+        cls.closed = make_job(cls.publisher, title='小学数学家教', description='辅导数学', status='closed')
+        Application(job=cls.applied, applicant=cls.student, message='hi').submit()
+
+    def setUp(self):
+        cache.clear()
+
+    def recommended(self):
+        return [job_id for job_id, _ in Recommendation.objects.get(pk=self.student.pk).items]
+
+    def test_ranks_similar_open_jobs(self):
+        self.assertEqual(update_recommendations(), (1, 0))
+        recommended = self.recommended()
+        self.assertEqual(recommended[0], self.math.pk)
+        self.assertLess(recommended.index(self.english.pk), recommended.index(self.tech.pk))
+        self.assertNotIn(self.applied.pk, recommended)
+        self.assertNotIn(self.closed.pk, recommended)
+        # 没有变化时什么都不做
+        self.assertEqual(update_recommendations(), (0, 0))
+
+    def test_new_jobs_are_merged_incrementally(self):
+        update_recommendations()
+        new = make_job(self.publisher, title='初中数学辅导', description='辅导初中数学作业和习题')
+        self.assertEqual(update_recommendations(), (0, 1))
+        self.assertEqual(self.recommended()[0], new.pk)
+
+    def test_new_application_triggers_refresh(self):
+        update_recommendations()
+        Application(job=self.tech, applicant=self.student, message='hi').submit()
+        self.assertEqual(update_recommendations(), (1, 0))
+        self.assertNotIn(self.tech.pk, self.recommended())
+
+    def test_only_recently_changed_applications_are_scanned(self):
+        update_recommendations()
+        checked_at = RecommendationCheckpoint.objects.get().applications_checked_at
+        with CaptureQueriesContext(connection) as queries:
+            update_recommendations()
+        stale = next(q['sql'] for q in queries if 'MAX("jobs_application"."updated_at")' in q['sql'])
+        self.assertIn('"updated_at" >', stale)
+        self.assertGreaterEqual(RecommendationCheckpoint.objects.get().applications_checked_at, checked_at)
+
+        # 批次没取完时检查点不前移
+        other = User.objects.create_user('stu2', password='pw-123456')
+        Application(job=self.math, applicant=other, message='hi').submit()
+        Application(job=self.math, applicant=self.student, message='hi').submit()
+        before = RecommendationCheckpoint.objects.get().applications_checked_at
+        self.assertEqual(update_recommendations(batch_size=1), (1, 0))
+        self.assertEqual(RecommendationCheckpoint.objects.get().applications_checked_at, before)
+        self.assertEqual(update_recommendations(batch_size=1), (1, 0))
+        self.assertEqual(update_recommendations(batch_size=1), (0, 0))
+        self.assertGreater(RecommendationCheckpoint.objects.get().applications_checked_at, before)
+
+    def test_pages_read_precomputed_list(self):
+        update_recommendations()
+        self.client.force_login(self.student)
+        response = self.client.get(reverse('home'))
+        self.assertEqual([job.pk for job in response.context['recommended_jobs']][:1], [self.math.pk])
+        response = self.client.get(reverse('jobs:job_detail', args=[self.math.pk]))
+        self.assertNotIn(self.math, response.context['recommended_jobs'])
+        self.assertContains(response, '为你推荐')
+        # 推荐更新后详情页的 ETag 随之变化
+        etag = response['ETag']
+        Recommendation.objects.filter(pk=self.student.pk).update(updated_at=timezone.now())
+        response = self.client.get(reverse('jobs:job_detail', args=[self.math.pk]), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_employers_get_no_recommendations(self):
+        self.client.force_login(self.publisher)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('home'))
+        self.assertEqual(response.context['recommended_jobs'], [])
+        self.assertFalse([q for q in queries if 'jobs_recommendation' in q['sql']])
+
+    def test_command(self):
+        out = StringIO()
+        call_command('update_recommendations', '--full', stdout=out)
+        self.assertIn('共重新计算 1 个学生', out.getvalue())
+
+
+class JobCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.publisher = User.objects.create_user('boss', password='pw-123456', user_type='employer')
+        cls.student = User.objects.create_user('stu', password='pw-123456')
+        cls.job = make_job(cls.publisher, positions=3)
+
+    def test_counters_follow_application_lifecycle(self):
+        self.client.force_login(self.student)
+        self.client.post(reverse('jobs:apply_job', args=[self.job.pk]), {'message': '我有经验'})
+        application = Application.objects.get()
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.applied_count, self.job.accepted_count), (1, 0))
+
+        self.client.force_login(self.publisher)
+        self.client.get(reverse('jobs:update_application_status', args=[application.pk, 'accepted']))
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.accepted_count, 1)
+
+        self.client.get(reverse('jobs:complete_application', args=[application.pk]))
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.accepted_count, self.job.completed_count), (0, 1))
+        self.assertEqual(self.job.get_applied_count(), 1)
+
+    def test_withdraw_counts(self):
+        application = Application(job=self.job, applicant=self.student, message='hi')
+        application.submit()
+        self.client.force_login(self.student)
+        self.client.get(reverse('jobs:withdraw_application', args=[application.pk]))
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.applied_count, self.job.withdrawn_count), (1, 1))
+
+    def test_stale_transition_is_rejected(self):
+        application = Application(job=self.job, applicant=self.student, message='hi')
+        application.submit()
+        stale = Application.objects.get(pk=application.pk)
+        self.assertTrue(application.transition('accepted'))
+        self.assertFalse(stale.transition('withdrawn'))
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.accepted_count, self.job.withdrawn_count), (1, 0))
+
+    def test_job_save_keeps_counters(self):
+        stale = Job.objects.get(pk=self.job.pk)
+        Application(job=self.job, applicant=self.student, message='hi').submit()
+        stale.status = 'closed'
+        stale.save()
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.applied_count, 1)
+
+    def test_my_published_does_not_count_per_job(self):
+        for i in range(5):
+            make_job(self.publisher, title=f'job {i}')
+        self.client.force_login(self.publisher)
+        # 会话在 Cookie 中；用户（登录时保存过，缓存未命中）、兼职列表；申请数不再逐个统计
+        with self.assertNumQueries(2):
+            self.client.get(reverse('jobs:my_published'))
+
+    def test_reconcile_command_fixes_drift(self):
+        Application.objects.create(job=self.job, applicant=self.student, message='hi', status='accepted')
+        out = StringIO()
+        call_command('reconcile_job_counters', stdout=out)
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.applied_count, self.job.accepted_count), (1, 1))
+        self.assertIn('已修正 1 个', out.getvalue())
+
+
+class QueryPlanTests(TestCase):
+    """
+    热点视图的查询计划回归测试：每条 SELECT 都必须走索引，
+    不能全表扫描，也不能为 ORDER BY 建临时 B 树排序。
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.publisher = User.objects.create_user('boss', password='pw-123456', user_type='employer')
+        cls.student = User.objects.create_user('stu', password='pw-123456')
+        categories = [value for value, _ in Job.CATEGORY_CHOICES]
+        salary_types = ['hourly', 'daily', 'total']
+        jobs = [
+            Job(title=f'job {i}', category=categories[i % len(categories)], description='desc',
+                salary=Decimal(i % 50), salary_type=salary_types[i % 3], location='东区',
+                duration='1天', positions=i % 7 + 1, contact='x', publisher=cls.publisher,
+                status='open' if i % 5 else 'closed')
+            for i in range(300)
+        ]
+        Job.objects.bulk_create(jobs)
+        cls.job = Job.objects.filter(status='open').first()
+        Application.objects.bulk_create([
+            Application(job=job, applicant=cls.student, message='hi')
+            for job in Job.objects.all()[:50]
+        ])
+
+    def capture_plans(self, url, params=None):
+        statements = []
+
+        def record(execute, sql, sql_params, many, context):
+            if sql.lstrip().upper().startswith('SELECT'):
+                statements.append((sql, sql_params))
+            return execute(sql, sql_params, many, context)
+
+        with connection.execute_wrapper(record):
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+
+        plans = []
+        with connection.cursor() as cursor:
+            for sql, sql_params in statements:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql, sql_params)
+                plans.append((sql, [row[-1] for row in cursor.fetchall()]))
+        return plans
+
+    def assertIndexedPlans(self, url, params=None):
+        for sql, plan in self.capture_plans(url, params):
+            for step in plan:
+                full_scan = step.startswith('SCAN ') and ' USING ' not in step and 'subquery' not in step
+                self.assertFalse(full_scan, f'全表扫描: {step}\n{sql}')
+                self.assertNotIn('TEMP B-TREE FOR ORDER BY', step, f'临时排序: {step}\n{sql}')
+
+    def test_job_list_plans(self):
+        url = reverse('jobs:job_list')
+        combinations = [
+            (order_by, filters)
+            for order_by in ('newest', 'oldest', 'salary_high', 'salary_low', 'positions_high', 'positions_low')
+            for filters in ({}, {'category': 'tech'}, {'salary_type': 'daily'},
+                            {'location': '东区'}, {'location': '图书馆', 'nearby': '1'})
+        ]
+        # 薪资区间与其它排序键组合时，区间过滤和排序无法共用一个索引，只检验按薪资排序
+        combinations += [
+            (order_by, filters)
+            for order_by in ('salary_high', 'salary_low')
+            for filters in ({'min_salary': '10'}, {'category': 'event', 'max_salary': '30'})
+        ]
+        for order_by, filters in combinations:
+            params = dict(filters, order_by=order_by)
+            with self.subTest(**params):
+                self.assertIndexedPlans(url, params)
+                cursor = self.client.get(url, params).context['page'].next_cursor
+                if cursor:
+                    self.assertIndexedPlans(url, dict(params, cursor=cursor))
+
+    def test_personal_pages_plans(self):
+        self.client.force_login(self.student)
+        self.assertIndexedPlans(reverse('jobs:my_applications'))
+        self.client.force_login(self.publisher)
+        self.assertIndexedPlans(reverse('jobs:my_published'))
+        self.assertIndexedPlans(reverse('jobs:manage_applications', args=[self.job.pk]))
+        self.assertIndexedPlans(reverse('jobs:job_detail', args=[self.job.pk]))
+
+
+class FacetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.publisher = User.objects.create_user('boss', password='pw-123456', user_type='employer')
+        make_job(cls.publisher, category='tech', salary_type='hourly', salary=Decimal('30'))
+        make_job(cls.publisher, category='tech', salary_type='daily', salary=Decimal('150'))
+        make_job(cls.publisher, category='event', salary_type='daily', salary=Decimal('80'))
+        make_job(cls.publisher, category='event', salary_type='daily', salary=Decimal('80'), status='closed')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_counts_without_filters(self):
+        facets = compute_facets(JobFilters())
+        self.assertEqual(facets['category']['tech'], 2)
+        self.assertEqual(facets['category']['event'], 1)
+        self.assertEqual(facets['salary_type'], {'hourly': 1, 'daily': 2, 'total': 0})
+        # 按折合时薪分桶：30、75（150 元/天，每天 2 小时）、40
+        self.assertEqual(facets['salary'], [0, 0, 2, 1])
+
+    def test_each_facet_ignores_its_own_filter(self):
+        facets = compute_facets(JobFilters(category='tech', salary_type='daily'))
+        # 分类计数只受薪资类型影响，薪资类型计数只受分类影响
+        self.assertEqual(facets['category']['tech'], 1)
+        self.assertEqual(facets['category']['event'], 1)
+        self.assertEqual(facets['salary_type'], {'hourly': 1, 'daily': 1, 'total': 0})
+        self.assertEqual(facets['salary'], [0, 0, 0, 1])
+
+    def test_single_aggregate_query_and_cache(self):
+        with self.assertNumQueries(1):
+            get_facets(JobFilters(category='tech'))
+        with self.assertNumQueries(0):
+            get_facets(JobFilters(category=' tech '))
+
+    def test_job_list_shows_counts(self):
+        response = self.client.get(reverse('jobs:job_list'), {'category': 'tech'})
+        self.assertIn(('event', '活动助理', 1), response.context['categories'])
+        self.assertContains(response, '活动助理 (1)')
+
+
+class SalaryNormalizationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.publisher = User.objects.create_user('boss', password='pw-123456', user_type='employer')
+
+    def test_parse_duration(self):
+        cases = {
+            '每天2小时，共5天': ('2', '5', '10'),
+            '共20小时': (None, None, '20'),
+            '每周3次，每次1.5小时，共4周': ('1.5', '12', '18'),
+            '每天两个半小时，共十二天': ('2.5', '12', '30'),
+            '半天': ('4', None, None),
+            '长期': (None, None, None),
+        }
+        for text, expected in cases.items():
+            with self.subTest(text):
+                parsed = parse_duration(text)
+                self.assertEqual(parsed, tuple(Decimal(value) if value else None for value in expected))
+
+    def test_hourly_salary(self):
+        self.assertEqual(hourly_salary(Decimal('30'), 'hourly', '长期'), Decimal('30.00'))
+        self.assertEqual(hourly_salary(Decimal('150'), 'daily', '每天2小时，共5天'), Decimal('75.00'))
+        self.assertEqual(hourly_salary(Decimal('200'), 'total', '每天2小时，共5天'), Decimal('20.00'))
+        # 时长不明时每天按 8 小时、共 1 天计
+        self.assertEqual(hourly_salary(Decimal('100'), 'daily', '长期'), Decimal('12.50'))
+        self.assertEqual(hourly_salary(Decimal('100'), 'total', '长期'), Decimal('12.50'))
+
+    def test_tiny_duration_fits_the_field(self):
+        # 不足 1 小时按 1 小时计，结果不超过字段能存的最大值
+        self.assertEqual(hourly_salary(Decimal('20'), 'total', '共1分钟'), Decimal('20.00'))
+        job = make_job(self.publisher, salary=Decimal('2000000'), salary_type='total', duration='共1分钟')
+        self.assertEqual(job.salary_hourly, Decimal('2000000.00'))
+        job = make_job(self.publisher, salary=Decimal('99999999'), salary_type='daily', duration='每天1分钟')
+        job.refresh_from_db()
+        self.assertEqual(job.salary_hourly, Decimal('99999999.00'))
+
+    def test_kept_current_on_save(self):
+        job = make_job(self.publisher, salary=Decimal('200'), salary_type='total', duration='共10小时')
+        self.assertEqual(job.salary_hourly, Decimal('20.00'))
+        job.duration = '共40小时'
+        job.save(update_fields=['duration'])
+        job.refresh_from_db()
+        self.assertEqual(job.salary_hourly, Decimal('5.00'))
+
+    def test_list_sorts_and_filters_across_salary_types(self):
+        hourly = make_job(self.publisher, title='hourly', salary=Decimal('40'), salary_type='hourly')
+        daily = make_job(self.publisher, title='daily', salary=Decimal('100'), salary_type='daily',
+                         duration='每天4小时，共3天')
+        total = make_job(self.publisher, title='total', salary=Decimal('600'), salary_type='total',
+                         duration='每天2小时，共5天')
+        response = self.client.get(reverse('jobs:job_list'), {'order_by': 'salary_high'})
+        self.assertEqual([job.pk for job in response.context['page']], [total.pk, hourly.pk, daily.pk])
+        response = self.client.get(reverse('jobs:job_list'), {'min_salary': '30', 'max_salary': '50'})
+        self.assertEqual([job.pk for job in response.context['page']], [hourly.pk])
+
+    def test_backfill_command(self):
+        job = make_job(self.publisher, salary=Decimal('150'), salary_type='daily')
+        Job.objects.filter(pk=job.pk).update(salary_hourly=0)
+        out = StringIO()
+        call_command('backfill_salary_hourly', '--batch-size', '1', stdout=out)
+        self.assertIn('更新 1 个', out.getvalue())
+        job.refresh_from_db()
+        self.assertEqual(job.salary_hourly, Decimal('75.00'))
+
+
+class JobListCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.publisher = User.objects.create_user('boss', password='pw-123456', user_type='employer')
+        cls.job = make_job(cls.publisher, title='图书馆助理')
+
+    def setUp(self):
+        cache.clear()
+
+    def titles(self, params=None):
+        response = self.client.get(reverse('jobs:job_list'), params or {})
+        return [job.title for job in response.context['jobs']]
+
+    def test_cached_page_skips_filtering_and_counting(self):
+        self.titles({'search': '图书馆'})
+        with self.assertNumQueries(1):
+            # 只按主键取回兼职
+            self.assertEqual(self.titles({'search': '图书馆'}), ['图书馆助理'])
+
+    def test_edit_close_and_delete_invalidate(self):
+        self.assertEqual(self.titles(), ['图书馆助理'])
+        version = list_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job.title = '食堂帮工'
+            self.job.save()
+            # 提交前版本号不变，并发读到的旧数据不会缓存到新版本下
+            self.assertEqual(list_version(), version)
+        self.assertEqual(self.titles(), ['食堂帮工'])
+        with self.captureOnCommitCallbacks(execute=True):
+            make_job(self.publisher, title='新兼职')
+        self.assertEqual(self.titles(), ['新兼职', '食堂帮工'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job.status = 'closed'
+            self.job.save()
+        self.assertEqual(self.titles(), ['新兼职'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Job.objects.get(title='新兼职').delete()
+        self.assertEqual(self.titles(), [])
+
+
+class SeedAndBenchmarkTests(TestCase):
+    def test_seed_then_benchmark(self):
+        call_command('seed_jobs', seed=7, users=20, jobs=30, applications=90, batch_size=10, stdout=StringIO())
+        self.assertEqual(Job.objects.count(), 30)
+        job = Job.objects.order_by('-applied_count').first()
+        self.assertEqual(job.applied_count, job.applications.count())
+        self.assertEqual(job.accepted_count, job.applications.filter(status='accepted').count())
+
+        out = StringIO()
+        call_command('benchmark_jobs', iterations=2, warmup=0, stdout=out, stderr=StringIO())
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['jobs'], 30)
+        for name in ('job_list', 'job_detail', 'my_published', 'manage_applications', 'my_applications'):
+            self.assertIn(name, report['scenarios'])
+            self.assertIn('p99_ms', report['scenarios'][name])
+            self.assertGreater(report['scenarios'][name]['queries_max'], 0)
+
+
+class QueryBudgetViewTests(TestCase):
+    """视图的查询数不随行数增长；超出 @query_budget 时测试中会直接抛出异常"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.publisher = User.objects.create_user('boss', password='pw-123456', user_type='employer')
+        cls.student = User.objects.create_user('stu', password='pw-123456')
+        cls.job = make_job(cls.publisher)
+        for i in range(15):
+            job = make_job(User.objects.create_user(f'boss{i}', password='pw-123456'), title=f'job {i}')
+            applicant = User.objects.create_user(f'stu{i}', password='pw-123456')
+            Application(job=cls.job, applicant=applicant, message='hi').submit()
+            Application(job=job, applicant=cls.student, message='hi').submit()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_views_stay_within_budget(self):
+        self.client.force_login(self.student)
+        for url in (reverse('jobs:job_list'), reverse('jobs:job_detail', args=[self.job.pk]),
+                    reverse('jobs:my_applications')):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.client.force_login(self.publisher)
+        for url in (reverse('jobs:my_published'), reverse('jobs:manage_applications', args=[self.job.pk])):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class BulkApplicationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.publisher = User.objects.create_user('boss', password='pw-123456', user_type='employer')
+        cls.job = make_job(cls.publisher, positions=2)
+        cls.applications = []
+        for i in range(4):
+            application = Application(job=cls.job, applicant=User.objects.create_user(f'stu{i}'), message='hi')
+            application.submit()
+            cls.applications.append(application)
+
+    def setUp(self):
+        self.client.force_login(self.publisher)
+
+    def post(self, action, applications, **extra):
+        data = dict(extra, action=action, applications=[a.pk for a in applications])
+        return self.client.post(reverse('jobs:bulk_update_applications', args=[self.job.pk]), data)
+
+    def statuses(self):
+        return list(Application.objects.order_by('pk').values_list('status', flat=True))
+
+    def test_bulk_accept_and_reject(self):
+        self.post('accept', self.applications[:2])
+        self.post('reject', self.applications[2:])
+        self.assertEqual(self.statuses(), ['accepted', 'accepted', 'rejected', 'rejected'])
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.accepted_count, 2)
+
+    def test_accepting_beyond_positions_is_refused(self):
+        response = self.post('accept', self.applications[:3])
+        self.assertEqual(self.statuses(), ['pending'] * 4)
+        self.assertContains(self.client.get(response.url), '仅剩 2 个名额')
+
+    def test_concurrent_accepts_cannot_overfill(self):
+        first, second = Job.objects.get(pk=self.job.pk), Job.objects.get(pk=self.job.pk)
+        self.assertEqual(first.accept_applications([self.applications[0].pk, self.applications[1].pk]), 2)
+        with self.assertRaises(NotEnoughPositions):
+            second.accept_applications([self.applications[2].pk])
+        self.client.get(reverse('jobs:update_application_status', args=[self.applications[3].pk, 'accepted']))
+        self.assertEqual(self.statuses(), ['accepted', 'accepted', 'pending', 'pending'])
+
+    def test_auto_close_when_full(self):
+        self.post('accept', self.applications[:2], auto_close='1')
+        self.assertEqual(self.statuses(), ['accepted', 'accepted', 'rejected', 'rejected'])
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'closed')
+
+    def test_only_publisher_can_bulk_update(self):
+        self.client.force_login(User.objects.get(username='stu0'))
+        self.post('reject', self.applications)
+        self.assertEqual(self.statuses(), ['pending'] * 4)
+
+
+class ApplicationIntakeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.publisher = User.objects.create_user('boss', password='pw-123456', user_type='employer')
+        cls.student = User.objects.create_user('stu', password='pw-123456')
+        cls.job = make_job(cls.publisher, positions=1)
+
+    def test_duplicate_submission_is_idempotent(self):
+        self.assertEqual(intake.submit_application(self.job, self.student, 'hi'), intake.CREATED)
+        self.assertEqual(intake.submit_application(self.job, self.student, 'again'), intake.DUPLICATE)
+        self.assertEqual(Application.objects.count(), 1)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.applied_count, 1)
+
+    def test_withdrawn_application_cannot_reapply(self):
+        intake.submit_application(self.job, self.student, 'hi')
+        application = Application.objects.get()
+        self.assertTrue(application.transition('withdrawn'))
+        self.assertEqual(intake.submit_application(self.job, self.student, 'back'), intake.DUPLICATE)
+        with override_settings(APPLICATION_INTAKE_MODE='queue'):
+            intake.submit_application(self.job, self.student, 'back')
+        self.assertEqual(intake.drain_intake(), (1, 0, 1))
+        application.refresh_from_db()
+        self.assertEqual((application.status, application.message), ('withdrawn', 'hi'))
+
+        # 视图不再自行查询，由 intake 判断
+        self.client.force_login(self.student)
+        response = self.client.post(reverse('jobs:apply_job', args=[self.job.pk]), {'message': 'back'}, follow=True)
+        self.assertContains(response, '您已经申请过此兼职')
+
+    def test_conflicting_intake_row_does_not_abort_the_batch(self):
+        # 队列条目写入后、转换前，同一用户的申请已经直接写入
+        intake.submit_application(self.job, self.student, 'hi')
+        ApplicationIntake.objects.create(job=self.job, applicant=self.student, message='again')
+        other = User.objects.create_user('stu2', password='pw-123456')
+        ApplicationIntake.objects.create(job=self.job, applicant=other, message='hi')
+
+        self.assertEqual(intake.drain_intake(), (2, 1, 1))
+        self.assertTrue(Application.objects.filter(job=self.job, applicant=other).exists())
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.applied_count, 2)
+        # 冲突的条目标上原因留给用户，不再参与处理
+        self.assertEqual(ApplicationIntake.objects.get().status, intake.DUPLICATE)
+        self.assertEqual(intake.drain_intake(), (0, 0, 0))
+        self.client.force_login(self.student)
+        self.assertContains(self.client.get(reverse('jobs:my_applications')), '未能提交：您已经申请过此兼职')
+        # 再次提交时替换掉旧的条目
+        with override_settings(APPLICATION_INTAKE_MODE='queue'):
+            intake.submit_application(self.job, self.student, 'third')
+        self.assertEqual(ApplicationIntake.objects.get().status, 'pending')
+
+    def test_full_or_closed_job_is_refused(self):
+        other = User.objects.create_user('stu2')
+        intake.submit_application(self.job, other, 'hi')
+        self.job.accept_applications(Application.objects.values_list('pk', flat=True))
+        self.assertEqual(intake.submit_application(self.job, self.student, 'hi'), intake.CLOSED)
+        Job.objects.filter(pk=self.job.pk).update(status='closed')
+        self.assertEqual(intake.submit_application(self.job, other, 'hi'), intake.CLOSED)
+
+    @override_settings(APPLICATION_INTAKE_MODE='queue')
+    def test_queue_mode_and_drain(self):
+        students = [User.objects.create_user(f'q{i}') for i in range(3)]
+        self.client.force_login(students[0])
+        self.client.post(reverse('jobs:apply_job', args=[self.job.pk]), {'message': 'hi'})
+        self.client.post(reverse('jobs:apply_job', args=[self.job.pk]), {'message': 'hi'})
+        self.assertContains(self.client.get(reverse('jobs:my_applications')), '正在处理中')
+        for student in students[1:]:
+            intake.submit_application(self.job, student, 'hi')
+        self.assertEqual((ApplicationIntake.objects.count(), Application.objects.count()), (3, 0))
+
+        out = StringIO()
+        call_command('drain_application_intake', batch_size=2, stdout=out)
+        self.assertIn('共处理 3 份申请，新建 3 份', out.getvalue())
+        self.assertFalse(ApplicationIntake.objects.exists())
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.applied_count, 3)
+        self.assertEqual(intake.drain_intake(), (0, 0, 0))
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.publisher = User.objects.create_user('boss', password='pw-123456', user_type='employer')
+        cls.student = User.objects.create_user('stu', password='pw-123456')
+        cls.job = make_job(cls.publisher)
+
+    def setUp(self):
+        cache.clear()
+
+    def revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_job_detail_not_modified(self):
+        url = reverse('jobs:job_detail', args=[self.job.pk])
+        response = self.client.get(url)
+        self.assertIn('private', response['Cache-Control'])
+        # 校验只读兼职本身，不聚合申请
+        with CaptureQueriesContext(connection) as queries:
+            not_modified = self.revalidate(url, response)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('jobs_application', queries[0]['sql'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], response['ETag'])
+
+    def test_job_detail_changes_with_applications_and_user(self):
+        url = reverse('jobs:job_detail', args=[self.job.pk])
+        response = self.client.get(url)
+        application = Application(job=self.job, applicant=User.objects.create_user('other'), message='hi')
+        application.submit()
+        response = self.revalidate(url, response)
+        self.assertEqual(response.status_code, 200)
+        application.transition('withdrawn')
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+        self.client.force_login(self.student)
+        response = self.client.get(url)
+        self.assertEqual(self.revalidate(url, response).status_code, 304)
+        self.client.post(reverse('jobs:apply_job', args=[self.job.pk]), {'message': 'hi'})
+        # 跳转后带着提示消息，必须完整渲染
+        self.assertContains(self.revalidate(url, response), '申请提交成功')
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_job_list_not_modified_until_jobs_change(self):
+        url = reverse('jobs:job_list') + '?category=tech'
+        response = self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.revalidate(url, response).status_code, 304)
+        self.assertEqual(self.revalidate(reverse('jobs:job_list'), response).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            make_job(self.publisher, title='新兼职')
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.publisher = User.objects.create_user('boss', password='pw-123456', user_type='employer')
+        cls.student = User.objects.create_user('stu', password='pw-123456')
+        cls.jobs = [make_job(cls.publisher, title=f'家教{i}', salary=Decimal(10 + i)) for i in range(5)]
+        make_job(cls.publisher, title='食堂帮工', category='service')
+        Application(job=cls.jobs[0], applicant=cls.student, message='hi').submit()
+
+    def get(self, name, *args, **params):
+        return self.client.get(reverse(f'api:{name}', args=args), params)
+
+    def test_job_list_uses_list_filters_and_cursor(self):
+        data = self.get('job_list', search='家教', order_by='salary_high', page_size=3).json()
+        self.assertEqual([job['title'] for job in data['results']], ['家教4', '家教3', '家教2'])
+        self.assertEqual(data['results'][0]['salary'], '14.00')
+        data = self.get('job_list', search='家教', order_by='salary_high', page_size=3, cursor=data['next']).json()
+        self.assertEqual([job['title'] for job in data['results']], ['家教1', '家教0'])
+        self.assertIsNone(data['next'])
+
+    def test_sparse_fields_only_load_requested_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.get('job_list', fields='title,publisher').json()
+        self.assertEqual(set(data['results'][0]), {'title', 'publisher'})
+        self.assertEqual(data['results'][0]['publisher'], 'boss')
+        self.assertNotIn('description', queries[-1]['sql'])
+        self.assertEqual(self.get('job_list', fields='title,password').status_code, 400)
+
+    def test_job_detail(self):
+        data = self.get('job_detail', self.jobs[0].pk).json()
+        self.assertEqual((data['title'], data['applied_count']), ('家教0', 1))
+        self.assertEqual(self.get('job_detail', 0).status_code, 404)
+
+    def test_my_applications_requires_login(self):
+        self.assertEqual(self.get('my_applications').status_code, 401)
+        self.client.force_login(self.student)
+        data = self.get('my_applications', fields='job_title,status').json()
+        self.assertEqual(data['results'], [{'job_title': '家教0', 'status': 'pending'}])
+
+    def test_gzip(self):
+        response = self.client.get(reverse('api:job_list'), {'page_size': 100}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))['results']), 6)
+
+
+class JobCardCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.publisher = User.objects.create_user('boss', password='pw-123456', user_type='employer')
+        cls.job = make_job(cls.publisher, title='图书馆助理')
+
+    def setUp(self):
+        cache.clear()
+
+    def cards(self, template_name='jobs/job_card.html'):
+        return render_job_cards(Job.objects.select_related('publisher'), template_name)
+
+    def test_cards_are_cached_until_job_changes(self):
+        self.assertIn('图书馆助理', self.cards())
+        # 绕过 save() 的修改不会更新 updated_at，卡片仍来自缓存
+        Job.objects.filter(pk=self.job.pk).update(title='食堂帮工')
+        with self.assertNumQueries(1):
+            self.assertIn('图书馆助理', self.cards())
+        job = Job.objects.get(pk=self.job.pk)
+        job.save()
+        self.assertIn('食堂帮工', self.cards())
+
+    def test_published_cards_follow_counters(self):
+        self.assertIn('0人申请', self.cards('jobs/published_job_card.html'))
+        Application(job=self.job, applicant=User.objects.create_user('stu'), message='hi').submit()
+        self.assertIn('1人申请', self.cards('jobs/published_job_card.html'))
+        self.client.force_login(self.publisher)
+        self.assertContains(self.client.get(reverse('jobs:my_published')), '1人申请')
+
+
+@override_settings(ROOT_URLCONF='campus_jobs.asgi_urls')
+class AsyncViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.publisher = User.objects.create_user('boss', password='pw-123456', user_type='employer')
+        cls.student = User.objects.create_user('stu', password='pw-123456')
+        cls.job = make_job(cls.publisher, title='图书馆助理')
+        Application(job=cls.job, applicant=cls.student, message='hi').submit()
+
+    def setUp(self):
+        cache.clear()
+        metrics.registry.values.clear()
+
+    async def test_job_list(self):
+        url = reverse('jobs:job_list')
+        response = await self.async_client.get(url)
+        self.assertIs(response.resolver_match.func, async_views.job_list)
+        self.assertContains(response, '图书馆助理')
+        response = await self.async_client.get(url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_job_detail_with_session_user(self):
+        await sync_to_async(self.async_client.force_login)(self.student)
+        response = await self.async_client.get(reverse('jobs:job_detail', args=[self.job.pk]))
+        self.assertContains(response, '欢迎，stu')
+        self.assertContains(response, '已申请（待审核）')
+        self.assertEqual((await self.async_client.get(reverse('jobs:job_detail', args=[0]))).status_code, 404)
+
+    async def test_my_applications_requires_login(self):
+        url = reverse('jobs:my_applications')
+        self.assertEqual((await self.async_client.get(url)).status_code, 302)
+        await sync_to_async(self.async_client.force_login)(self.student)
+        self.assertContains(await self.async_client.get(url), '图书馆助理')
+
+    async def test_queries_are_attributed_to_async_requests(self):
+        await self.async_client.get(reverse('jobs:job_detail', args=[self.job.pk]))
+        key = ('db_queries_per_request', (('view', 'jobs:job_detail'),))
+        self.assertEqual(metrics.registry.values[key]['sum'], 1)
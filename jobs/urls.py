@@ -23,7 +23,8 @@ urlpatterns = [
 
     # 管理申请
     path('<int:pk>/applications/', views.manage_applications, name='manage_applications'),
-    path('application/<int:pk>/<str:status>/', views.update_application_status, name='update_application_status'),
+    path('<int:pk>/applications/bulk/', views.bulk_update_applications, name='bulk_update_applications'),
     path('application/<int:pk>/withdraw/', views.withdraw_application, name='withdraw_application'),
     path('application/<int:pk>/complete/', views.complete_application, name='complete_application'),
+    path('application/<int:pk>/<str:status>/', views.update_application_status, name='update_application_status'),
 ]
@@ -1,88 +1,113 @@
+from decimal import Decimal
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q
-from .models import Job, Application
+from django.views.decorators.http import require_POST
+from campus_jobs.querybudget import query_budget
+from campus_jobs.routers import use_primary
+from . import intake
+from .intake import submit_application
+from .models import Job, Application, ApplicationIntake, NotEnoughPositions
 from .forms import JobForm, ApplicationForm
+from .pagination import KeysetPaginator, bounded_count
+from .caching import conditional_render, get_job_page, list_version, make_etag
+from .facets import SALARY_BUCKETS, get_facets
+from .filters import JobFilters
+from .locations import known_places
+from .recommendations import get_recommendation, recommended_jobs
+
+# 兼职列表每页条数，以及总数最多统计到多少条
+JOB_LIST_PAGE_SIZE = 20
+JOB_LIST_COUNT_LIMIT = 1000
 
 # Create your views here.
 
+@query_budget(4)
+def home(request):
+    """首页，学生可看到预先计算的推荐兼职"""
+    recommendation = get_recommendation(request.user)
+    return render(request, 'home.html', {'recommended_jobs': recommended_jobs(recommendation)})
+
+
+@query_budget(5)
 def job_list(request):
     """兼职列表页面"""
-    jobs = Job.objects.filter(status='open')
-
-    # 搜索功能
-    search_query = request.GET.get('search', '')
-    if search_query:
-        jobs = jobs.filter(
-            Q(title__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(location__icontains=search_query)
-        )
-
-    # 分类筛选
-    category = request.GET.get('category', '')
-    if category:
-        jobs = jobs.filter(category=category)
-
-    # 薪资类型筛选
-    salary_type = request.GET.get('salary_type', '')
-    if salary_type:
-        jobs = jobs.filter(salary_type=salary_type)
-
-    # 薪资范围筛选
-    min_salary = request.GET.get('min_salary', '')
-    max_salary = request.GET.get('max_salary', '')
-    if min_salary:
-        try:
-            jobs = jobs.filter(salary__gte=float(min_salary))
-        except ValueError:
-            pass
-    if max_salary:
-        try:
-            jobs = jobs.filter(salary__lte=float(max_salary))
-        except ValueError:
-            pass
+    # 搜索、分类、薪资、地点等筛选条件
+    filters = JobFilters.from_query(request.GET)
+    cursor = request.GET.get('cursor')
+
+    # 列表版本号不变时结果也不变；页头显示当前用户，校验值也要区分用户
+    etag = make_etag(list_version(), filters.key(), filters.ordering, cursor, request.user.pk)
+    return conditional_render(request, etag, None, lambda: render_job_list(request, filters, cursor))
+
+
+def render_job_list(request, filters, cursor):
+    """渲染兼职列表"""
+    def build_page():
+        # 游标分页，pk 作为并列排序值的决胜字段
+        jobs = filters.apply().select_related('publisher')
+        paginator = KeysetPaginator(jobs, filters.ordering, page_size=JOB_LIST_PAGE_SIZE)
+        page = paginator.get_page(cursor)
+        return (page,) + bounded_count(jobs, JOB_LIST_COUNT_LIMIT)
+
+    # 结果 id 按筛选条件缓存，兼职变动时整体失效
+    page, total_count, count_capped = get_job_page(filters, cursor, build_page)
+
+    # 各筛选项的结果数
+    facets = get_facets(filters)
+    context = job_list_context(request, filters, page, total_count, count_capped, facets)
+    return render(request, 'jobs/job_list.html', context)
 
-    # 地点筛选
-    location_filter = request.GET.get('location', '')
-    if location_filter:
-        jobs = jobs.filter(location__icontains=location_filter)
-
-    # 排序功能
-    order_by = request.GET.get('order_by', '-created_at')
-    valid_orders = {
-        'newest': '-created_at',
-        'oldest': 'created_at',
-        'salary_high': '-salary',
-        'salary_low': 'salary',
-        'positions_high': '-positions',
-        'positions_low': 'positions',
-    }
-    if order_by in valid_orders:
-        jobs = jobs.order_by(valid_orders[order_by])
-    else:
-        jobs = jobs.order_by('-created_at')
-
-    context = {
-        'jobs': jobs,
-        'search_query': search_query,
-        'category': category,
-        'salary_type': salary_type,
-        'min_salary': min_salary,
-        'max_salary': max_salary,
-        'location_filter': location_filter,
-        'order_by': order_by,
-        'categories': Job.CATEGORY_CHOICES,
-        'salary_types': (('hourly', '时薪'), ('daily', '日薪'), ('total', '总计')),
-        'total_count': jobs.count(),
+
+def job_list_context(request, filters, page, total_count, count_capped, facets):
+    """兼职列表模板的上下文，同步和异步视图共用"""
+    # 翻页链接保留当前的筛选条件
+    query_params = request.GET.copy()
+    query_params.pop('cursor', None)
+
+    # 薪资区间快捷筛选，区间为左闭右开
+    salary_facets = []
+    for (low, high, label), count in zip(SALARY_BUCKETS, facets['salary']):
+        bucket_params = query_params.copy()
+        bucket_params['min_salary'] = low if low is not None else ''
+        bucket_params['max_salary'] = high - Decimal('0.01') if high is not None else ''
+        salary_facets.append({'label': label, 'count': count, 'query_string': bucket_params.urlencode()})
+
+    return {
+        'jobs': page,
+        'page': page,
+        'query_string': query_params.urlencode(),
+        'search_query': request.GET.get('search', ''),
+        'category': request.GET.get('category', ''),
+        'salary_type': request.GET.get('salary_type', ''),
+        'min_salary': request.GET.get('min_salary', ''),
+        'max_salary': request.GET.get('max_salary', ''),
+        'location_filter': request.GET.get('location', ''),
+        'nearby': filters.nearby,
+        'known_places': known_places(),
+        # 有筛选条件时默认展开高级筛选面板
+        'has_filters': any(
+            request.GET.get(name)
+            for name in ('search', 'category', 'salary_type', 'min_salary', 'max_salary', 'location')
+        ),
+        'order_by': filters.order_by or ('relevance' if filters.search else 'newest'),
+        'categories': [
+            (value, label, facets['category'][value]) for value, label in Job.CATEGORY_CHOICES
+        ],
+        'salary_types': [
+            (value, label, facets['salary_type'][value]) for value, label in Job.SALARY_TYPE_CHOICES
+        ],
+        'salary_facets': salary_facets,
+        'total_count': total_count,
+        'count_capped': count_capped,
     }
-    return render(request, 'jobs/job_list.html', context)
 
 
+@query_budget(6)
 def job_detail(request, pk):
     """兼职详情页面"""
-    job = get_object_or_404(Job, pk=pk)
+    job = get_object_or_404(Job.objects.select_related('publisher'), pk=pk)
 
     # 检查当前用户是否已申请
     has_applied = False
@@ -93,25 +118,53 @@ def job_detail(request, pk):
             has_applied = True
         except Application.DoesNotExist:
             pass
+    recommendation = get_recommendation(request.user)
+
+    etag = detail_etag(job, request.user, user_application, recommendation)
+
+    def render_page():
+        context = {
+            'job': job,
+            'has_applied': has_applied,
+            'user_application': user_application,
+            'recommended_jobs': recommended_jobs(recommendation, exclude=job.pk),
+        }
+        return render(request, 'jobs/job_detail.html', context)
+
+    return conditional_render(request, etag, None, render_page)
 
-    context = {
-        'job': job,
-        'has_applied': has_applied,
-        'user_application': user_application,
-    }
-    return render(request, 'jobs/job_detail.html', context)
+
+def detail_etag(job, user, user_application, recommendation):
+    """
+    兼职详情页的校验值。申请人数等计数随申请状态变化而不更新兼职的
+    updated_at，直接取兼职上的冗余计数，不必聚合该兼职的申请。
+    计数变化时 updated_at 不变，因此不提供 Last-Modified，只用 ETag。
+    """
+    return make_etag(
+        job.pk, job.updated_at, job.applied_count, job.accepted_count, job.completed_count, job.withdrawn_count,
+        user.pk, user_application and (user_application.status, user_application.updated_at),
+        recommendation and recommendation.updated_at,
+    )
+
+
+def warn_duplicates(request, form):
+    """保存后提示近似重复的兼职（JOB_DUPLICATE_ACTION 为 'warn'，或编辑已有兼职时）"""
+    if form.duplicates:
+        titles = '、'.join(f'「{job.title}」' for job in form.duplicates[:3])
+        messages.warning(request, f'该兼职与您发布的{titles}内容几乎相同，请避免重复发布。')
 
 
 @login_required
 def job_create(request):
     """发布兼职"""
     if request.method == 'POST':
-        form = JobForm(request.POST)
+        form = JobForm(request.POST, publisher=request.user)
         if form.is_valid():
             job = form.save(commit=False)
             job.publisher = request.user
             job.save()
             messages.success(request, '兼职发布成功！')
+            warn_duplicates(request, form)
             return redirect('jobs:job_detail', pk=job.pk)
         else:
             messages.error(request, '发布失败，请检查输入信息。')
@@ -127,15 +180,16 @@ def job_edit(request, pk):
     job = get_object_or_404(Job, pk=pk)
 
     # 只有发布者才能编辑
-    if job.publisher != request.user:
+    if job.publisher_id != request.user.pk:
         messages.error(request, '您无权编辑此兼职！')
         return redirect('jobs:job_detail', pk=pk)
 
     if request.method == 'POST':
-        form = JobForm(request.POST, instance=job)
+        form = JobForm(request.POST, instance=job, publisher=request.user)
         if form.is_valid():
             form.save()
             messages.success(request, '兼职信息已更新！')
+            warn_duplicates(request, form)
             return redirect('jobs:job_detail', pk=pk)
     else:
         form = JobForm(instance=job)
@@ -149,7 +203,7 @@ def job_delete(request, pk):
     job = get_object_or_404(Job, pk=pk)
 
     # 只有发布者才能删除
-    if job.publisher != request.user:
+    if job.publisher_id != request.user.pk:
         messages.error(request, '您无权删除此兼职！')
         return redirect('jobs:job_detail', pk=pk)
 
@@ -162,12 +216,13 @@ def job_delete(request, pk):
 
 
 @login_required
+@use_primary()
 def job_close(request, pk):
     """结束招募"""
     job = get_object_or_404(Job, pk=pk)
 
     # 只有发布者才能结束招募
-    if job.publisher != request.user:
+    if job.publisher_id != request.user.pk:
         messages.error(request, '您无权操作此兼职！')
         return redirect('jobs:job_detail', pk=pk)
 
@@ -183,15 +238,10 @@ def apply_job(request, pk):
     job = get_object_or_404(Job, pk=pk)
 
     # 不能申请自己发布的兼职
-    if job.publisher == request.user:
+    if job.publisher_id == request.user.pk:
         messages.error(request, '您不能申请自己发布的兼职！')
         return redirect('jobs:job_detail', pk=pk)
 
-    # 检查是否已申请
-    if Application.objects.filter(job=job, applicant=request.user).exists():
-        messages.warning(request, '您已经申请过此兼职！')
-        return redirect('jobs:job_detail', pk=pk)
-
     # 检查兼职是否还在招募
     if job.status != 'open':
         messages.error(request, '此兼职已结束招募！')
@@ -200,11 +250,16 @@ def apply_job(request, pk):
     if request.method == 'POST':
         form = ApplicationForm(request.POST)
         if form.is_valid():
-            application = form.save(commit=False)
-            application.job = job
-            application.applicant = request.user
-            application.save()
-            messages.success(request, '申请提交成功！请等待发布者审核。')
+            # 是否已申请过、名额是否已满都在写入时原子地判断
+            result = submit_application(job, request.user, form.cleaned_data['message'])
+            if result == intake.CREATED:
+                messages.success(request, '申请提交成功！请等待发布者审核。')
+            elif result == intake.QUEUED:
+                messages.success(request, '申请已收到，正在处理中，稍后可在“我的申请”中查看。')
+            elif result == intake.DUPLICATE:
+                messages.warning(request, '您已经申请过此兼职！')
+            else:
+                messages.error(request, '此兼职已结束招募或名额已满！')
             return redirect('jobs:job_detail', pk=pk)
     else:
         form = ApplicationForm()
@@ -213,6 +268,7 @@ def apply_job(request, pk):
 
 
 @login_required
+@query_budget(3)
 def my_published(request):
     """我发布的兼职"""
     jobs = Job.objects.filter(publisher=request.user)
@@ -220,52 +276,107 @@ def my_published(request):
 
 
 @login_required
+@query_budget(4)
 def my_applications(request):
     """我的申请"""
-    applications = Application.objects.filter(applicant=request.user)
-    return render(request, 'jobs/my_applications.html', {'applications': applications})
+    applications = Application.objects.filter(applicant=request.user).select_related('job')
+    # 仍在暂存队列中的提交，以及未能写入申请表的提交及其原因
+    queued = ApplicationIntake.objects.filter(applicant=request.user).select_related('job')
+    return render(request, 'jobs/my_applications.html', {'applications': applications, 'queued': queued})
 
 
 @login_required
+@query_budget(4)
 def manage_applications(request, pk):
     """管理兼职申请"""
     job = get_object_or_404(Job, pk=pk)
 
     # 只有发布者才能管理申请
-    if job.publisher != request.user:
+    if job.publisher_id != request.user.pk:
         messages.error(request, '您无权查看此页面！')
         return redirect('jobs:job_detail', pk=pk)
 
-    applications = job.applications.all()
+    applications = job.applications.select_related('applicant')
     return render(request, 'jobs/manage_applications.html', {'job': job, 'applications': applications})
 
 
 @login_required
+@use_primary()
 def update_application_status(request, pk, status):
     """更新申请状态"""
-    application = get_object_or_404(Application, pk=pk)
+    application = get_object_or_404(Application.objects.select_related('job'), pk=pk)
 
     # 只有发布者才能更新申请状态
-    if application.job.publisher != request.user:
+    if application.job.publisher_id != request.user.pk:
         messages.error(request, '您无权操作此申请！')
         return redirect('jobs:job_detail', pk=application.job.pk)
 
-    if status in ['accepted', 'rejected']:
-        application.status = status
-        application.save()
-        status_text = '接受' if status == 'accepted' else '拒绝'
-        messages.success(request, f'已{status_text}该申请！')
+    if status == 'accepted':
+        # 接受时检查名额
+        try:
+            if application.job.accept_applications([application.pk]):
+                messages.success(request, '已接受该申请！')
+            else:
+                messages.error(request, '该申请状态已发生变化，请刷新后重试！')
+        except NotEnoughPositions as e:
+            messages.error(request, f'名额已满，{e}！')
+    elif status == 'rejected':
+        if application.transition(status):
+            messages.success(request, '已拒绝该申请！')
+        else:
+            messages.error(request, '该申请状态已发生变化，请刷新后重试！')
 
     return redirect('jobs:manage_applications', pk=application.job.pk)
 
 
 @login_required
+@require_POST
+def bulk_update_applications(request, pk):
+    """批量接受或拒绝申请"""
+    job = get_object_or_404(Job, pk=pk)
+
+    # 只有发布者才能更新申请状态
+    if job.publisher_id != request.user.pk:
+        messages.error(request, '您无权操作此申请！')
+        return redirect('jobs:job_detail', pk=pk)
+
+    action = request.POST.get('action')
+    ids = [int(value) for value in request.POST.getlist('applications') if value.isdigit()]
+    if not ids:
+        messages.warning(request, '请先选择要处理的申请！')
+        return redirect('jobs:manage_applications', pk=pk)
+
+    if action == 'accept':
+        try:
+            accepted = job.accept_applications(ids)
+        except NotEnoughPositions as e:
+            messages.error(request, f'名额不足，{e}，请减少选择的人数！')
+            return redirect('jobs:manage_applications', pk=pk)
+        messages.success(request, f'已接受 {accepted} 份申请！')
+
+        # 名额已满时自动拒绝其余申请并结束招募
+        if request.POST.get('auto_close') and job.remaining_positions == 0:
+            rejected = job.reject_applications()
+            job.status = 'closed'
+            job.save()
+            messages.info(request, f'名额已满，已自动拒绝其余 {rejected} 份申请并结束招募。')
+    elif action == 'reject':
+        rejected = job.reject_applications(ids)
+        messages.success(request, f'已拒绝 {rejected} 份申请！')
+    else:
+        messages.error(request, '未知的操作！')
+
+    return redirect('jobs:manage_applications', pk=pk)
+
+
+@login_required
+@use_primary()
 def withdraw_application(request, pk):
     """撤回申请"""
     application = get_object_or_404(Application, pk=pk)
 
     # 只有申请者才能撤回
-    if application.applicant != request.user:
+    if application.applicant_id != request.user.pk:
         messages.error(request, '您无权操作此申请！')
         return redirect('jobs:my_applications')
 
@@ -274,21 +385,23 @@ def withdraw_application(request, pk):
         messages.error(request, '只能撤回待审核的申请！')
         return redirect('jobs:my_applications')
 
-    application.status = 'withdrawn'
-    application.save()
+    if not application.transition('withdrawn'):
+        messages.error(request, '只能撤回待审核的申请！')
+        return redirect('jobs:my_applications')
     messages.success(request, '申请已撤回！')
     return redirect('jobs:my_applications')
 
 
 @login_required
+@use_primary()
 def complete_application(request, pk):
     """完成兼职"""
     from django.utils import timezone
 
-    application = get_object_or_404(Application, pk=pk)
+    application = get_object_or_404(Application.objects.select_related('job'), pk=pk)
 
     # 只有申请者或发布者才能标记完成
-    if application.applicant != request.user and application.job.publisher != request.user:
+    if application.applicant_id != request.user.pk and application.job.publisher_id != request.user.pk:
         messages.error(request, '您无权操作此申请！')
         return redirect('jobs:job_detail', pk=application.job.pk)
 
@@ -297,11 +410,11 @@ def complete_application(request, pk):
         messages.error(request, '只能完成已接受的申请！')
         return redirect('jobs:my_applications')
 
-    application.status = 'completed'
-    application.completed_at = timezone.now()
-    application.save()
+    if not application.transition('completed', completed_at=timezone.now()):
+        messages.error(request, '只能完成已接受的申请！')
+        return redirect('jobs:my_applications')
 
-    if request.user == application.applicant:
+    if request.user.pk == application.applicant_id:
         messages.success(request, '兼职已标记为完成！')
         return redirect('jobs:my_applications')
     else:
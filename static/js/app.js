@@ -0,0 +1,14 @@
+// 兼职列表：展开 / 收起高级筛选面板
+function toggleFilter() {
+    const content = document.getElementById('filterContent');
+    const text = document.getElementById('filterToggleText');
+    content.hidden = !content.hidden;
+    text.textContent = content.hidden ? '展开' : '收起';
+}
+
+// 管理申请：全选 / 取消全选待审核的申请
+function toggleAll(source) {
+    document.querySelectorAll('.application-checkbox').forEach(function(box) {
+        box.checked = source.checked;
+    });
+}